@@ -3,31 +3,45 @@ from __future__ import annotations
 
 import argparse
 import csv
+import difflib
 import json
 import os
 import sys
 import time
 import re
 import html
+import functools
+import gzip
+import hashlib
+import inspect
+import zlib
+import xml.etree.ElementTree as ET
+from array import array
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List
 from urllib.parse import urlparse, urljoin
 
-import requests
-from dotenv import load_dotenv
-from openai import OpenAI
+# Heavy third-party modules (requests, openai, dotenv, playwright) are imported where first used,
+# so --help, argument errors and --replay runs start without paying for them.
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 STARTUPS_FILE = "2508_inv.csv"
 OUTPUT_CSV = "2508_inv.with_analysis.csv"
 DEFAULT_MODEL_DEPLOYMENT = "gpt-5-mini"
 
-# Optional Playwright support (for JS-rendered pages)
-try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-    HAS_PLAYWRIGHT = True
-except Exception:  # noqa: BLE001
-    HAS_PLAYWRIGHT = False
+@functools.lru_cache(maxsize=1)
+def has_playwright() -> bool:
+    """Optional Playwright support (for JS-rendered pages), checked on first render rather than at import."""
+    try:
+        import playwright.sync_api  # noqa: F401
+
+        return True
+    except Exception:  # noqa: BLE001
+        return False
 
 
 # --- Classification Taxonomy (top verticals -> representative sub-verticals) ---
@@ -191,6 +205,112 @@ TAXONOMY: dict[str, list[str]] = {
 }
 
 
+# ------- Taxonomy validation -------
+TAXONOMY_FUZZY_CUTOFF = 0.82
+
+
+def _norm_label(label: str) -> str:
+    """Case/punctuation-insensitive key: 'RAG / Vector DBs' -> 'rag vector dbs', '&' -> 'and'."""
+    return " ".join(re.findall(r"[a-z0-9]+", (label or "").lower().replace("&", " and ")))
+
+
+def _fuzzy_lookup(key: str, table: Dict[str, str]) -> str | None:
+    """Resolve a normalized label against ``table`` (normalized -> exact): exact, token-subset, then edit distance.
+
+    Token-subset hits must also clear TAXONOMY_FUZZY_CUTOFF, so one generic shared token
+    ('banking' vs 'family banking') is not enough to snap.
+    """
+    if not key:
+        return None
+    hit = table.get(key)
+    if hit is not None:
+        return hit
+    tokens = set(key.split())
+    subset = {
+        v
+        for k, v in table.items()
+        if (tokens <= set(k.split()) or set(k.split()) <= tokens)
+        and difflib.SequenceMatcher(None, key, k).ratio() >= TAXONOMY_FUZZY_CUTOFF
+    }
+    if len(subset) == 1:
+        return subset.pop()
+    close = difflib.get_close_matches(key, table.keys(), n=2, cutoff=TAXONOMY_FUZZY_CUTOFF)
+    if len(close) == 1 or (
+        len(close) == 2
+        and difflib.SequenceMatcher(None, key, close[0]).ratio() - difflib.SequenceMatcher(None, key, close[1]).ratio()
+        > 0.05
+    ):
+        return table[close[0]]
+    return None
+
+
+class TaxonomyIndex:
+    """Lookup structure over TAXONOMY for validating and snapping model output locally.
+
+    Holds normalized vertical keys (plus parenthesised aliases such as 'HealthTech'), per-vertical
+    normalized sub-vertical keys, and a sub-vertical -> vertical reverse map. Lookups are memoized
+    per instance, so repeated near-misses across a run cost a dict hit.
+    """
+
+    EXACT = "exact"
+    SNAPPED = "snapped"
+    INVALID = "invalid"
+
+    def __init__(self, taxonomy: Dict[str, List[str]]) -> None:
+        self.verticals: Dict[str, str] = {}
+        self.subs: Dict[str, Dict[str, str]] = {}
+        self.sub_owners: Dict[str, List[str]] = {}
+        for vertical, subs in taxonomy.items():
+            self.verticals[_norm_label(vertical)] = vertical
+            alias = re.search(r"\(([^)]+)\)", vertical)
+            if alias:
+                self.verticals.setdefault(_norm_label(alias.group(1)), vertical)
+            self.subs[vertical] = {_norm_label(sub): sub for sub in subs}
+            for sub in subs:
+                self.sub_owners.setdefault(_norm_label(sub), []).append(vertical)
+        # Memoized per instance (lru_cache on the methods themselves would key on, and keep alive, self)
+        self.vertical = functools.lru_cache(maxsize=4096)(self._vertical)
+        self.sub_vertical = functools.lru_cache(maxsize=4096)(self._sub_vertical)
+
+    def _vertical(self, label: str) -> str | None:
+        return _fuzzy_lookup(_norm_label(label), self.verticals)
+
+    def _sub_vertical(self, vertical: str, label: str) -> str | None:
+        return _fuzzy_lookup(_norm_label(label), self.subs.get(vertical, {}))
+
+    def owners(self, label: str) -> tuple[str, ...]:
+        """Verticals whose list contains exactly this sub-vertical label (after normalization, no fuzzy matching)."""
+        return tuple(self.sub_owners.get(_norm_label(label), ()))
+
+    def snap(self, vertical: str, sub: str) -> tuple[str, str, str]:
+        """Return (vertical, sub_vertical, status) with near-misses snapped to exact TAXONOMY strings.
+
+        Empty fields are left empty (the prompt allows that when sources are insufficient). When the
+        vertical is unrecognisable but the sub-vertical is an exact label of exactly one vertical, the
+        vertical is recovered from the reverse map; a fuzzily matched sub-vertical never picks the
+        vertical. Anything else that doesn't resolve is reported as invalid (and re-asked).
+        """
+        vertical = (vertical or "").strip()
+        sub = (sub or "").strip()
+        if not vertical and not sub:
+            return vertical, sub, self.EXACT
+        v = self.vertical(vertical) if vertical else None
+        if v is None and sub:
+            owners = self.owners(sub)
+            if len(owners) == 1:
+                v = owners[0]
+        if v is None:
+            return vertical, sub, self.INVALID
+        s = self.sub_vertical(v, sub) if sub else ""
+        if s is None:
+            return v, sub, self.INVALID
+        status = self.EXACT if (v == vertical and s == sub) else self.SNAPPED
+        return v, s, status
+
+
+TAXONOMY_INDEX = TaxonomyIndex(TAXONOMY)
+
+
 def read_startup_urls(path: Path) -> List[str]:
     """Load startup URLs from a newline-delimited text file or a CSV.
 
@@ -224,7 +344,190 @@ def infer_startup_name(url: str) -> str:
     return name.capitalize()
 
 
-def serp_web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+# ------- Record/replay cassette -------
+CASSETTE_INDEX = "cassette.idx"
+CASSETTE_DATA = "cassette.bin"
+
+
+class ReplayedError(RuntimeError):
+    """An exception captured while recording, re-raised on replay when its type can't be rebuilt."""
+
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class CassetteMiss(KeyError):
+    """Replay found no recording for a call."""
+
+
+class Cassette:
+    """Compact indexed archive of external I/O results, for recording and deterministic replay.
+
+    Payloads are zlib-compressed JSON appended to ``cassette.bin``; ``cassette.idx`` holds one JSON
+    line per entry with its key, byte offset, length and the call's original duration. Keys hash the
+    call kind and its identifying arguments plus an occurrence counter, so repeated identical calls
+    (e.g. model retries) replay in the order they were recorded.
+    """
+
+    def __init__(self, directory: Path, mode: str, latency_factor: float = 0.0) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown cassette mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.latency_factor = latency_factor
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        index_path = directory / CASSETTE_INDEX
+        if mode == "replay":
+            if not index_path.exists():
+                raise RuntimeError(f"No cassette found in {directory}")
+            with index_path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.index[entry["k"]] = entry
+            self._data = (directory / CASSETTE_DATA).open("rb")
+            log(f"Cassette: replaying {len(self.index)} recorded call(s) from {directory}")
+        else:
+            # Appending to an old recording would duplicate keys, and on replay the last entry would win
+            if index_path.exists() or (directory / CASSETTE_DATA).exists():
+                raise RuntimeError(f"{directory} already holds a cassette; record into a new or empty directory")
+            directory.mkdir(parents=True, exist_ok=True)
+            self._data = (directory / CASSETTE_DATA).open("wb")
+            self._index_out = index_path.open("w", encoding="utf-8")
+            log(f"Cassette: recording external calls to {directory}")
+
+    def close(self) -> None:
+        self._data.close()
+        if self.mode == "record":
+            self._index_out.close()
+
+    def _key(self, kind: str, parts: Dict[str, Any]) -> str:
+        digest = hashlib.blake2b(
+            json.dumps([kind, parts], sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=12
+        ).hexdigest()
+        n = self.counters.get(digest, 0)
+        self.counters[digest] = n + 1
+        return f"{kind}:{digest}#{n}"
+
+    def _write(self, key: str, payload: Dict[str, Any], elapsed: float) -> None:
+        blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(blob)
+        self._data.flush()
+        self._index_out.write(json.dumps({"k": key, "o": offset, "n": len(blob), "t": round(elapsed, 4)}) + "\n")
+        self._index_out.flush()
+
+    def _read(self, key: str) -> tuple[Dict[str, Any], float]:
+        entry = self.index.get(key)
+        if entry is None:
+            raise CassetteMiss(key)
+        self._data.seek(entry["o"])
+        payload = json.loads(zlib.decompress(self._data.read(entry["n"])).decode("utf-8"))
+        return payload, float(entry.get("t", 0.0))
+
+    def call(
+        self,
+        kind: str,
+        parts: Dict[str, Any],
+        fn: Callable[[], Any],
+        encode: Callable[[Any], Any] = lambda v: v,
+        decode: Callable[[Any], Any] = lambda v: v,
+    ) -> Any:
+        key = self._key(kind, parts)
+        if self.mode == "replay":
+            payload, elapsed = self._read(key)
+            if self.latency_factor > 0:
+                time.sleep(elapsed * self.latency_factor)
+            if "error" in payload:
+                raise _replayed_exception(payload)
+            return decode(payload["value"])
+        t0 = time.monotonic()
+        try:
+            value = fn()
+        except Exception as exc:
+            status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+            self._write(key, {"error": str(exc), "status": status, "type": type(exc).__name__}, time.monotonic() - t0)
+            raise
+        self._write(key, {"value": encode(value)}, time.monotonic() - t0)
+        return value
+
+
+CASSETTE: Cassette | None = None
+
+
+def _replayed_exception(payload: Dict[str, Any]) -> Exception:
+    """Rebuild a recorded exception: the original type where callers branch on it, else ReplayedError."""
+    replayable = {cls.__name__: cls for cls in (CircuitOpenError, TimeoutError, ConnectionError)}
+    cls = replayable.get(payload.get("type") or "")
+    return cls(payload["error"]) if cls is not None else ReplayedError(payload["error"], payload.get("status"))
+
+
+def recorded(
+    kind: str, *key_args: str, on_miss: Callable[[], Any] | None = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Route a function through the active cassette, keyed on ``key_args`` (timeouts are excluded).
+
+    On replay, a call that was never recorded raises CassetteMiss unless ``on_miss`` supplies the
+    value the function would return on failure (e.g. "" for a page fetch).
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if CASSETTE is None:
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            parts = {name: bound.arguments[name] for name in key_args}
+            try:
+                return CASSETTE.call(kind, parts, lambda: fn(*args, **kwargs))
+            except CassetteMiss:
+                if on_miss is None:
+                    raise
+                log(f"Cassette: no recording for {kind} {parts}; treating as failed call")
+                return on_miss()
+
+        return wrapper
+
+    return decorator
+
+
+class RecordedClient:
+    """Stand-in for the OpenAI client that sends ``responses.create`` through the active cassette.
+
+    Only the response text is archived; on replay the SDK response is rebuilt as an object with
+    ``output_text``, which is all ``run_analysis_for_startup`` reads. ``client`` may be None on replay.
+    """
+
+    def __init__(self, client: Any, cassette: Cassette) -> None:
+        self.responses = self
+        self._client = client
+        self._cassette = cassette
+
+    def create(self, **kwargs: Any) -> Any:
+        parts = {"model": kwargs.get("model"), "input": kwargs.get("input")}
+
+        def _encode(response: Any) -> Dict[str, Any]:
+            text = _coerce_to_text(getattr(response, "output_text", None))
+            if not text:
+                text = extract_text_from_message_blocks(getattr(response, "output", None))
+            return {"output_text": text}
+
+        return self._cassette.call(
+            "llm",
+            parts,
+            lambda: self._client.responses.create(**kwargs),
+            encode=_encode,
+            decode=lambda v: SimpleNamespace(output_text=v.get("output_text"), output=None),
+        )
+
+
+@recorded("serp", "query", "num_results")
+def serp_web_search(query: str, num_results: int = 5, timeout_s: float = 30) -> Dict[str, Any]:
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         raise RuntimeError("SERPAPI_API_KEY must be set in the environment for web search")
@@ -238,7 +541,19 @@ def serp_web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
         "num": num_results,
     }
     url = os.getenv("SERP_API_URL", "https://serpapi.com/search.json")
-    response = requests.get(url, params=params, timeout=30)
+    import requests
+
+    SERP_BREAKER.check()
+    try:
+        response = requests.get(url, params=params, timeout=timeout_s)
+    except Exception:
+        SERP_BREAKER.record_failure()
+        raise
+    # Out of credits / auth problems and server errors trip the breaker; a bad query does not
+    if response.status_code in (401, 403, 429) or response.status_code >= 500:
+        SERP_BREAKER.record_failure()
+    else:
+        SERP_BREAKER.record_success()
     response.raise_for_status()
     data = response.json()
 
@@ -309,6 +624,168 @@ def safe_preview(text: str | None, limit: int = LOG_PREVIEW_CHARS) -> str:
     return s[:limit] + ("..." if len(s) > limit else "")
 
 
+# ------- Per-row deadline -------
+DEFAULT_LLM_RESERVE_FRACTION = 0.4
+MIN_STAGE_TIMEOUT_S = 2.0
+MIN_RENDER_BUDGET_S = 8.0
+SERP_TIMEOUT_S = 30.0
+FETCH_TIMEOUT_S = 15.0
+RENDER_TIMEOUT_S = 15.0
+
+
+class RowDeadline:
+    """Wall-clock budget for a single input row, shared by the SERP, crawl, render and LLM stages.
+
+    A fixed share of the budget is reserved for the model call: crawl-side stages only ever see
+    what is left after that reserve, so a slow site can eat into page fetches but never into the LLM.
+    A deadline built with ``budget_s=None`` is unlimited and every timeout falls back to its cap.
+    """
+
+    def __init__(self, budget_s: float | None, llm_reserve_fraction: float = DEFAULT_LLM_RESERVE_FRACTION) -> None:
+        self.budget_s = budget_s
+        self.started = time.monotonic()
+        self.llm_reserve_s = budget_s * llm_reserve_fraction if budget_s else 0.0
+
+    def remaining(self) -> float:
+        if self.budget_s is None:
+            return float("inf")
+        return self.budget_s - (time.monotonic() - self.started)
+
+    def crawl_remaining(self) -> float:
+        """Time left for pre-LLM stages (total remaining minus the LLM reserve)."""
+        return self.remaining() - self.llm_reserve_s
+
+    def allows(self, min_s: float = MIN_STAGE_TIMEOUT_S) -> bool:
+        """Whether an optional pre-LLM stage needing at least ``min_s`` seconds should still run."""
+        return self.crawl_remaining() >= min_s
+
+    def stage_timeout(self, cap_s: float) -> float:
+        """Timeout for a pre-LLM stage: its usual cap, shrunk to the crawl time remaining."""
+        return max(min(cap_s, self.crawl_remaining()), 0.0)
+
+    def llm_timeout(self, cap_s: float | None = None) -> float | None:
+        """Timeout for a model attempt: everything left, never less than MIN_STAGE_TIMEOUT_S."""
+        if self.budget_s is None:
+            return cap_s
+        remaining = max(self.remaining(), MIN_STAGE_TIMEOUT_S)
+        return min(cap_s, remaining) if cap_s is not None else remaining
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+# ------- Circuit breakers -------
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT_S = 60.0
+HOST_BREAKER_FAILURE_THRESHOLD = 3
+HOST_BREAKER_RESET_TIMEOUT_S = 300.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker around one external dependency.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and callers fail fast. Once
+    ``reset_timeout_s`` has passed a single probe call is let through (half-open): success closes the
+    breaker again, failure re-opens it for another full timeout. State changes are logged.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_s: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def _transition(self, state: str, reason: str) -> None:
+        if state != self.state:
+            log(f"Circuit {self.name}: {self.state} -> {state} ({reason})")
+            self.state = state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; moves an expired open breaker to half-open."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                return False
+            self._transition(self.HALF_OPEN, "probing")
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def is_open(self) -> bool:
+        """Peek without consuming the half-open probe: True while calls would be rejected outright."""
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout_s
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(f"circuit {self.name} is open")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probe_in_flight = False
+        self._transition(self.CLOSED, "call succeeded")
+
+    def release_probe(self) -> None:
+        """For a call whose outcome says nothing about the dependency (e.g. a 400): free the half-open
+        probe slot and leave state and failure count as they are."""
+        self.probe_in_flight = False
+
+    def record_response(self, status_code: int) -> None:
+        """Record an HTTP response: 5xx and 429 count as failures, anything else as success."""
+        if status_code >= 500 or status_code == 429:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(
+                self.OPEN, f"{self.failures} consecutive failure(s); next probe in {self.reset_timeout_s:.0f}s"
+            )
+
+
+SERP_BREAKER = CircuitBreaker("serpapi", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT_S)
+LLM_BREAKER = CircuitBreaker("azure-openai", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT_S)
+# Local browser/driver failures (Playwright launch) are the renderer's, never a crawled host's
+RENDER_BREAKER = CircuitBreaker("playwright", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT_S)
+_HOST_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def host_breaker(url: str) -> CircuitBreaker:
+    """Return the (lazily created) breaker for the canonical host of ``url``."""
+    host = _canonical_host(url)
+    breaker = _HOST_BREAKERS.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(f"host:{host}", HOST_BREAKER_FAILURE_THRESHOLD, HOST_BREAKER_RESET_TIMEOUT_S)
+        _HOST_BREAKERS[host] = breaker
+    return breaker
+
+
+def parse_duration(value: str) -> float:
+    """Parse a CLI duration such as '60s', '2m', '1.5m' or a bare number of seconds."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", value or "")
+    if not m:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value!r} (expected e.g. 60s, 2m, 90)")
+    amount = float(m.group(1))
+    unit = m.group(2) or "s"
+    return amount * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}[unit]
+
+
 def _canonical_host(u: str) -> str:
     try:
         p = urlparse(u)
@@ -329,25 +806,48 @@ def _likely_same_site(root: str, link: str) -> bool:
     return b.endswith("." + a)
 
 
+_BLOCK_TAG_RE = re.compile(
+    r"</?(?:p|div|section|article|header|footer|nav|aside|main|li|ul|ol|h[1-6]|br|tr|table|blockquote|pre|form)\b[^>]*>",
+    re.IGNORECASE,
+)
+
+
 def _strip_html(html_text: str) -> str:
     # Remove scripts/styles
     html_text = re.sub(r"<script[\s\S]*?</script>", " ", html_text, flags=re.IGNORECASE)
     html_text = re.sub(r"<style[\s\S]*?</style>", " ", html_text, flags=re.IGNORECASE)
+    # Block-level tags become line breaks so near-duplicate elimination can work per block
+    html_text = re.sub(_BLOCK_TAG_RE, "\n", html_text)
     # Remove tags
     text = re.sub(r"<[^>]+>", " ", html_text)
-    # Unescape entities and collapse whitespace
+    # Unescape entities and collapse whitespace (keeping one newline between blocks)
     text = html.unescape(text)
-    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"[^\S\n]+", " ", text)
+    text = re.sub(r"\s*\n\s*", "\n", text)
     return text.strip()
 
 
-def fetch_page_text(page_url: str, timeout_s: int = 15) -> str:
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+@recorded("fetch", "page_url", on_miss=str)
+def fetch_page_text(page_url: str, timeout_s: float = 15) -> str:
+    breaker = host_breaker(page_url)
+    if not breaker.allow():
+        log(f"SERP fetch skipped for {page_url}: circuit {breaker.name} is open")
+        return ""
+    import requests
+
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        }
-        resp = requests.get(page_url, headers=headers, timeout=timeout_s)
+        try:
+            resp = requests.get(page_url, headers=FETCH_HEADERS, timeout=timeout_s)
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_response(resp.status_code)
         if resp.status_code >= 400:
             log(f"SERP fetch: {page_url} -> HTTP {resp.status_code}")
             return ""
@@ -358,31 +858,130 @@ def fetch_page_text(page_url: str, timeout_s: int = 15) -> str:
         return ""
 
 
-def fetch_page_text_rendered(page_url: str, timeout_ms: int = 15000) -> str:
-    """Fetch fully rendered HTML via Playwright (if available), then strip to text."""
-    if not HAS_PLAYWRIGHT:
+# Render profiles: "text" blocks heavy/tracking requests and bounds waiting; "full" is the old behaviour
+RENDER_PROFILE = "text"
+RENDER_SETTLE_MS = 750
+RENDER_SCROLL_MAX_STEPS = 12
+RENDER_SCROLL_MAX_MS = 3000
+RENDER_SCROLL_INTERVAL_MS = 150
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "facebook.net", "connect.facebook.net", "hotjar.com", "segment.com", "segment.io", "mixpanel.com",
+    "amplitude.com", "heapanalytics.com", "fullstory.com", "clarity.ms", "bat.bing.com", "snap.licdn.com",
+    "ads-twitter.com", "analytics.tiktok.com", "hs-analytics.net", "hs-scripts.com", "hubspot.com",
+    "intercom.io", "intercomcdn.com", "drift.com", "optimizely.com", "newrelic.com", "nr-data.net",
+    "cookielaw.org", "onetrust.com", "cookiebot.com", "adroll.com", "quantserve.com", "scorecardresearch.com",
+)
+
+_BOUNDED_SCROLL_JS = """(opts) => new Promise(res => {
+  let y = 0, steps = 0; const t0 = Date.now();
+  const id = setInterval(() => {
+    window.scrollBy(0, 800); steps++;
+    if (window.scrollY > y && steps < opts.maxSteps && Date.now() - t0 < opts.maxMs) { y = window.scrollY; }
+    else { clearInterval(id); res(steps); }
+  }, opts.intervalMs);
+})"""
+_UNBOUNDED_SCROLL_JS = "() => new Promise(res => { let y=0; const id=setInterval(()=>{ window.scrollBy(0, 800); if (window.scrollY>y) { y=window.scrollY; } else { clearInterval(id); res(); } }, 200); })"
+
+
+def _registrable_domain(url: str) -> str:
+    """Approximate eTLD+1 without a public-suffix list: 'https://app.example.co.uk/x' -> 'example.co.uk'."""
+    labels = (urlparse(url).hostname or "").lower().strip(".").split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ("co", "com", "net", "org", "gov", "ac", "edu"):
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _is_tracker(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == d or host.endswith("." + d) for d in TRACKER_DOMAINS)
+
+
+@recorded("render", "page_url", on_miss=str)
+def fetch_page_text_rendered(page_url: str, timeout_ms: int = 15000, profile: str | None = None) -> str:
+    """Fetch rendered HTML via Playwright (if available), then strip to text.
+
+    The default "text" profile (RENDER_PROFILE) aborts image/media/font/stylesheet requests and
+    known tracker domains (never the navigation itself or the site's own domain, so hubspot.com or
+    segment.com can still be rendered), waits for DOMContentLoaded plus a short settle instead of networkidle,
+    and caps the lazy-load scroll loop by step count and time. "full" keeps the original
+    networkidle + unbounded scroll behaviour.
+    """
+    if not has_playwright():
+        return ""
+    from playwright.sync_api import sync_playwright
+    profile = profile or RENDER_PROFILE
+    # The host breaker is only consulted (without taking its half-open probe): a render failure is
+    # usually the browser's, and must not keep the static fetch_page_text fallback from the host
+    breaker = host_breaker(page_url)
+    if breaker.is_open():
+        log(f"Playwright fetch skipped for {page_url}: circuit {breaker.name} is open")
         return ""
+    if not RENDER_BREAKER.allow():
+        log(f"Playwright fetch skipped for {page_url}: circuit {RENDER_BREAKER.name} is open")
+        return ""
+    t0 = time.monotonic()
+    launched = False
+    blocked = 0
+    site = _registrable_domain(page_url)
+
+    def _route(route: Any) -> None:
+        nonlocal blocked
+        request = route.request
+        if request.is_navigation_request():
+            route.continue_()
+            return
+        tracker = _is_tracker(request.url) and _registrable_domain(request.url) != site
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or tracker:
+            blocked += 1
+            route.abort()
+        else:
+            route.continue_()
+
     try:
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
+            launched = True
+            RENDER_BREAKER.record_success()
             context = browser.new_context(ignore_https_errors=True)
+            if profile == "text":
+                context.route("**/*", _route)
             page = context.new_page()
             page.set_default_navigation_timeout(timeout_ms)
             page.set_default_timeout(timeout_ms)
-            page.goto(page_url, wait_until="networkidle")
+            if profile == "text":
+                page.goto(page_url, wait_until="domcontentloaded")
+                page.wait_for_timeout(RENDER_SETTLE_MS)
+            else:
+                page.goto(page_url, wait_until="networkidle")
             # Gentle scroll to trigger lazy-loaded content
             try:
-                page.evaluate(
-                    "() => new Promise(res => { let y=0; const id=setInterval(()=>{ window.scrollBy(0, 800); if (window.scrollY>y) { y=window.scrollY; } else { clearInterval(id); res(); } }, 200); })"
-                )
+                if profile == "text":
+                    page.evaluate(
+                        _BOUNDED_SCROLL_JS,
+                        {
+                            "maxSteps": RENDER_SCROLL_MAX_STEPS,
+                            "maxMs": min(RENDER_SCROLL_MAX_MS, max(timeout_ms // 4, 0)),
+                            "intervalMs": RENDER_SCROLL_INTERVAL_MS,
+                        },
+                    )
+                else:
+                    page.evaluate(_UNBOUNDED_SCROLL_JS)
             except Exception:
                 pass
             html_content = page.content()
             context.close()
             browser.close()
+        log(
+            f"Playwright render ({profile}) {page_url}: {time.monotonic() - t0:.2f}s, "
+            f"{blocked} request(s) blocked"
+        )
         return _strip_html(html_content or "")
     except Exception as exc:  # noqa: BLE001
-        log(f"Playwright fetch error for {page_url}: {exc}")
+        if not launched:
+            RENDER_BREAKER.record_failure()
+        log(f"Playwright fetch error for {page_url} after {time.monotonic() - t0:.2f}s: {exc}")
         return ""
 
 
@@ -467,14 +1066,272 @@ def _score_candidate(link: str, title: str | None, snippet: str | None) -> int:
     return score
 
 
-def gather_serp_context(root_url: str, max_pages: int = 5, max_chars: int = 8000) -> str:
-    """Use SerpAPI to discover a few key pages on the official site and fetch text excerpts.
+# ------- Sitemap / robots.txt discovery -------
+SITEMAP_URL_CAP = 5000
+SITEMAP_MAX_FILES = 8
+SITEMAP_PER_SECTION = 2
+SITEMAP_GOOD_SCORE = 6
+SITEMAP_MIN_GOOD_CANDIDATES = 3
+
+
+def _xml_local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _robots_sitemaps(root_url: str, timeout_s: float) -> List[str]:
+    """Return the Sitemap: entries listed in the site's robots.txt (may be empty)."""
+    p = urlparse(root_url)
+    robots_url = f"{p.scheme}://{p.netloc}/robots.txt"
+    import requests
+
+    breaker = host_breaker(robots_url)
+    if not breaker.allow():
+        return []
+    try:
+        try:
+            resp = requests.get(robots_url, headers=FETCH_HEADERS, timeout=timeout_s)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except Exception:
+            # Not the host's fault (e.g. a bad timeout): leave the breaker as it was
+            breaker.release_probe()
+            raise
+        breaker.record_response(resp.status_code)
+        if resp.status_code >= 400:
+            return []
+        found = []
+        for line in (resp.text or "").splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "sitemap" and value.strip():
+                found.append(urljoin(robots_url, value.strip()))
+        return found
+    except Exception as exc:  # noqa: BLE001
+        log(f"Sitemap: robots.txt fetch error for {robots_url}: {exc}")
+        return []
+
+
+def iter_sitemap_urls(
+    sitemap_urls: List[str],
+    max_urls: int = SITEMAP_URL_CAP,
+    max_files: int = SITEMAP_MAX_FILES,
+    deadline: RowDeadline | None = None,
+) -> Iterable[str]:
+    """Stream page URLs out of sitemaps, following nested sitemap indexes.
+
+    Each file is parsed incrementally from the response stream (gzip-compressed sitemaps included),
+    so multi-megabyte sitemaps never sit in memory; parsing stops at ``max_urls`` page URLs or
+    ``max_files`` sitemap files, whichever comes first.
+    """
+    import requests
+
+    if deadline is None:
+        deadline = RowDeadline(None)
+    queue = deque(sitemap_urls)
+    visited: set[str] = set()
+    emitted = 0
+    while queue and len(visited) < max_files and emitted < max_urls:
+        sm_url = queue.popleft()
+        if sm_url in visited:
+            continue
+        visited.add(sm_url)
+        if not deadline.allows():
+            log("Row deadline: skipping remaining sitemaps")
+            return
+        breaker = host_breaker(sm_url)
+        if not breaker.allow():
+            log(f"Sitemap fetch skipped for {sm_url}: circuit {breaker.name} is open")
+            continue
+        try:
+            resp = requests.get(
+                sm_url, headers=FETCH_HEADERS, timeout=deadline.stage_timeout(FETCH_TIMEOUT_S), stream=True
+            )
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            log(f"Sitemap fetch error for {sm_url}: {exc}")
+            continue
+        except Exception as exc:  # noqa: BLE001
+            breaker.release_probe()
+            log(f"Sitemap fetch error for {sm_url}: {exc}")
+            continue
+        breaker.record_response(resp.status_code)
+        with resp:
+            if resp.status_code >= 400:
+                log(f"Sitemap fetch: {sm_url} -> HTTP {resp.status_code}")
+                continue
+            resp.raw.decode_content = True
+            source: Any = resp.raw
+            already_decoded = "gzip" in (resp.headers.get("Content-Encoding") or "").lower()
+            if urlparse(sm_url).path.lower().endswith(".gz") and not already_decoded:
+                source = gzip.GzipFile(fileobj=resp.raw)
+            in_index = False
+            try:
+                for event, elem in ET.iterparse(source, events=("start", "end")):
+                    name = _xml_local_name(elem.tag)
+                    if event == "start":
+                        in_index = in_index or name == "sitemapindex"
+                        continue
+                    if name == "loc" and elem.text:
+                        loc = elem.text.strip()
+                        if in_index or loc.lower().split("?", 1)[0].endswith((".xml", ".xml.gz")):
+                            queue.append(loc)
+                        else:
+                            yield loc
+                            emitted += 1
+                            if emitted >= max_urls:
+                                log(f"Sitemap URL cap reached ({max_urls})")
+                                return
+                    elif name == "url":
+                        elem.clear()
+            except (ET.ParseError, OSError, EOFError) as exc:
+                log(f"Sitemap parse error for {sm_url}: {exc}")
+        log(f"Sitemap: parsed {sm_url} (urls so far={emitted}, pending sitemaps={len(queue)})")
+
+
+@recorded("sitemap", "root_url", "max_urls", on_miss=list)
+def discover_sitemap_candidates(
+    root_url: str,
+    max_urls: int = SITEMAP_URL_CAP,
+    deadline: RowDeadline | None = None,
+) -> list[dict]:
+    """Discover candidate pages from robots.txt/sitemap.xml without any SERP calls.
+
+    URLs are scored with ``_score_candidate`` on their path alone and at most SITEMAP_PER_SECTION
+    pages are kept per top-level section, so a blog with hundreds of posts does not crowd out
+    /product or /platform pages. Returns candidates sorted by score, best first.
+    """
+    if deadline is None:
+        deadline = RowDeadline(None)
+    if not deadline.allows():
+        log(f"Row deadline: skipping sitemap discovery for {root_url}")
+        return []
+    p = urlparse(root_url)
+    sitemaps = _robots_sitemaps(root_url, deadline.stage_timeout(FETCH_TIMEOUT_S))
+    if not sitemaps:
+        sitemaps = [f"{p.scheme}://{p.netloc}/sitemap.xml"]
+
+    best: dict[str, list[dict]] = {}
+    for loc in iter_sitemap_urls(sitemaps, max_urls=max_urls, deadline=deadline):
+        if not _likely_same_site(root_url, loc):
+            continue
+        score = _score_candidate(loc, None, None)
+        if score <= 0:
+            continue
+        section = (urlparse(loc).path or "/").strip("/").split("/", 1)[0].lower()
+        bucket = best.setdefault(section, [])
+        if len(bucket) < SITEMAP_PER_SECTION:
+            bucket.append({"link": loc, "title": "", "snippet": "", "score": score})
+        else:
+            worst = min(range(len(bucket)), key=lambda i: bucket[i]["score"])
+            if score > bucket[worst]["score"]:
+                bucket[worst] = {"link": loc, "title": "", "snippet": "", "score": score}
+
+    candidates = [c for bucket in best.values() for c in bucket]
+    candidates.sort(key=lambda x: x["score"], reverse=True)
+    log(f"Sitemap candidates for {root_url}: {len(candidates)} kept from {len(best)} section(s)")
+    return candidates
+
+
+# ------- Near-duplicate elimination -------
+SIMHASH_SHINGLE = 3
+SIMHASH_MAX_DISTANCE = 10  # unrelated pages sit ~32 bits apart; edited copies within ~10
+MIN_BLOCK_CHARS = 25
+MIN_DISTINCT_PAGE_CHARS = 200
+# Exact names only, plus the two families that are prefixed by spec; "ref"-style prefixes would eat real params
+TRACKING_PARAMS = frozenset(
+    {"gclid", "fbclid", "msclkid", "ref", "ref_src", "_ga", "_gl", "mc_cid", "mc_eid"}
+    | {"_hsenc", "_hsmi", "__hstc", "__hssc", "__hsfp", "hsctatracking"}
+)
+TRACKING_PARAM_PREFIXES = ("utm_", "hsa_")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def _link_key(link: str) -> str:
+    """Identity of a page for candidate de-duplication: host + path, minus fragments and tracking params."""
+    p = urlparse(link)
+    query = "&".join(
+        sorted(q for q in p.query.split("&") if q and not _is_tracking_param(q.split("=", 1)[0]))
+    )
+    path = p.path.rstrip("/") or "/"
+    return f"{_canonical_host(link)}{path.lower()}" + (f"?{query}" if query else "")
+
+
+def simhash64(text: str, shingle: int = SIMHASH_SHINGLE) -> int:
+    """64-bit SimHash over word shingles; near-identical texts land within a few bits of each other."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < shingle:
+        words = words + [""] * (shingle - len(words))
+    weights = [0] * 64
+    for i in range(len(words) - shingle + 1):
+        h = int.from_bytes(
+            hashlib.blake2b(" ".join(words[i : i + shingle]).encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class ContextDeduper:
+    """Removes boilerplate and near-duplicate pages while a row's context is assembled.
+
+    Blocks (lines produced by ``_strip_html``) already seen on an earlier page of the same site -
+    navigation, footers, cookie banners, repeated hero copy - are dropped before the snippet is cut.
+    A page whose remaining text is tiny, or whose SimHash is within SIMHASH_MAX_DISTANCE bits of a
+    page already kept (tracking-param variants, print views, mirrored copies), is skipped entirely.
+    """
+
+    def __init__(self) -> None:
+        self.seen_blocks: set[str] = set()
+        self.page_hashes: list[int] = []
+        self.dropped_chars = 0
+
+    def distinct_text(self, text: str) -> str:
+        kept: list[str] = []
+        for block in text.split("\n"):
+            block = block.strip()
+            if not block:
+                continue
+            key = _stable_hash(block)
+            if key in self.seen_blocks:
+                self.dropped_chars += len(block)
+                continue
+            self.seen_blocks.add(key)
+            kept.append(block)
+        distinct = "\n".join(kept)
+        if len(distinct) < MIN_DISTINCT_PAGE_CHARS and self.page_hashes:
+            return ""
+        # Short blocks (menu labels, buttons) are only remembered, never used to judge a page
+        fp = simhash64(" ".join(b for b in kept if len(b) >= MIN_BLOCK_CHARS) or distinct)
+        if any(bin(fp ^ other).count("1") <= SIMHASH_MAX_DISTANCE for other in self.page_hashes):
+            return ""
+        self.page_hashes.append(fp)
+        return distinct
+
+
+def gather_serp_context(
+    root_url: str,
+    max_pages: int = 5,
+    max_chars: int = 8000,
+    deadline: RowDeadline | None = None,
+    use_sitemap: bool = True,
+) -> str:
+    """Discover a few key pages on the official site (sitemap first, SerpAPI as fallback) and fetch text excerpts.
 
     Priority order: products/services/platform/solutions, then blog/research/engineering, then docs/API, then pricing.
-    Strict limits: up to max_pages pages and max_chars characters of context.
+    Candidates come from robots.txt/sitemap.xml when ``use_sitemap`` is set; the six SERP queries only run
+    when the sitemap yields fewer than SITEMAP_MIN_GOOD_CANDIDATES pages scoring SITEMAP_GOOD_SCORE or more.
+    Strict limits: up to max_pages pages and max_chars characters of context. When a ``deadline`` is given,
+    every SERP query and page fetch is bounded by the crawl time remaining; rendering and further pages are
+    skipped once the budget runs low.
     """
     if not root_url or not root_url.startswith("http"):
         return ""
+    if deadline is None:
+        deadline = RowDeadline(None)
 
     host = _canonical_host(root_url)
     if not host:
@@ -499,19 +1356,42 @@ def gather_serp_context(root_url: str, max_pages: int = 5, max_chars: int = 8000
         "snippet": "",
         "score": 5,
     })
-    seen.add(root_url)
+    seen.add(_link_key(root_url))
+
+    # Collect candidates from the sitemap first; SERP is only a fallback
+    good_candidates = 0
+    if use_sitemap:
+        try:
+            for cand in discover_sitemap_candidates(root_url, deadline=deadline):
+                if _link_key(cand["link"]) in seen:
+                    continue
+                candidates.append(cand)
+                seen.add(_link_key(cand["link"]))
+                if cand["score"] >= SITEMAP_GOOD_SCORE:
+                    good_candidates += 1
+        except Exception as exc:  # noqa: BLE001
+            log(f"Sitemap discovery failed for {root_url}: {exc}")
+    if good_candidates >= SITEMAP_MIN_GOOD_CANDIDATES:
+        log(f"Sitemap gave {good_candidates} good candidate(s); skipping SERP queries")
+        queries = []
 
     # Collect candidates from SERP (without fetching yet)
     for q in queries:
+        if not deadline.allows():
+            log(f"Row deadline: skipping remaining SERP queries ({deadline.crawl_remaining():.1f}s crawl budget left)")
+            break
         try:
-            sr = serp_web_search(q, num_results=6)
+            sr = serp_web_search(q, num_results=6, timeout_s=deadline.stage_timeout(SERP_TIMEOUT_S))
+        except CircuitOpenError as exc:
+            log(f"SERP queries skipped: {exc}")
+            break
         except Exception as exc:  # noqa: BLE001
             log(f"SERP query failed: {q} -> {exc}")
             continue
         results = sr.get("results", [])
         for item in results:
             link = (item.get("link") or "").strip()
-            if not link or link in seen:
+            if not link or _link_key(link) in seen:
                 continue
             if not _likely_same_site(root_url, link):
                 continue
@@ -519,7 +1399,7 @@ def gather_serp_context(root_url: str, max_pages: int = 5, max_chars: int = 8000
             snippet = item.get("snippet") or ""
             score = _score_candidate(link, title, snippet)
             candidates.append({"link": link, "title": title, "snippet": snippet, "score": score})
-            seen.add(link)
+            seen.add(_link_key(link))
             log(f"SERP candidate: score={score} | {link} | {title}")
 
     # Rank candidates and fetch top pages until limits reached
@@ -527,13 +1407,28 @@ def gather_serp_context(root_url: str, max_pages: int = 5, max_chars: int = 8000
     chunks: list[str] = []
     total_chars = 0
     used = 0
+    deduper = ContextDeduper()
     for cand in candidates:
         if used >= max_pages:
             break
+        if not deadline.allows():
+            log(f"Row deadline: skipping remaining pages ({deadline.crawl_remaining():.1f}s crawl budget left, used={used})")
+            break
         link = cand["link"]
-        text = fetch_page_text_rendered(link) or fetch_page_text(link)
+        text = ""
+        if deadline.allows(MIN_RENDER_BUDGET_S):
+            text = fetch_page_text_rendered(link, timeout_ms=int(deadline.stage_timeout(RENDER_TIMEOUT_S) * 1000))
+        if not text and deadline.allows():
+            text = fetch_page_text(link, timeout_s=deadline.stage_timeout(FETCH_TIMEOUT_S))
+        if not text:
+            continue
+        raw_chars = len(text)
+        text = deduper.distinct_text(text)
         if not text:
+            log(f"SERP context: skipped {link} (near-duplicate of a page already added)")
             continue
+        if len(text) < raw_chars:
+            log(f"SERP context: {link} trimmed {raw_chars} -> {len(text)} chars of repeated boilerplate")
         snippet = text[:2500] + ("..." if len(text) > 2500 else "")
         piece = f"URL: {link}\n{snippet}"
         prospective = total_chars + len(piece) + (4 if chunks else 0)
@@ -545,12 +1440,148 @@ def gather_serp_context(root_url: str, max_pages: int = 5, max_chars: int = 8000
         used += 1
         log(f"SERP context: added {link} (ranked, chars so far={total_chars}, used={used}/{max_pages})")
 
-    context = "\n\n---\n\n".join(chunks)
+    context = CONTEXT_SEPARATOR.join(chunks)
     if len(context) > max_chars:
         context = context[:max_chars] + "\n..."
-    log(f"SERP context assembled: {len(chunks)} page(s), {len(context)} chars (prioritized)")
+    log(
+        f"SERP context assembled: {len(chunks)} page(s), {len(context)} chars (prioritized, "
+        f"{deduper.dropped_chars} duplicate chars dropped)"
+    )
     return context
 
+# ------- Month-over-month reuse -------
+# Analysis columns appended to the input CSV
+ANALYSIS_COLUMNS = [
+    "products_summary",
+    "startup_vertical",
+    "startup_sub_vertical",
+    "use_case",
+    "uses_genai",
+    "genai_details",
+    "uses_traditional_ml",
+    "ml_details",
+    "unique_value",
+    "site_context_summary",
+    "evidence",
+    "analysis_fingerprint",
+    "analysis_source",
+]
+FINGERPRINT_VERSION = "v2"
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+UNPARSED_EVIDENCE = "Model response could not be parsed as JSON."
+
+
+def row_key(url: str) -> str:
+    """Canonical host used to match a row against last month's output (scheme/www/path-insensitive)."""
+    url = (url or "").strip()
+    if not url or url == "N/A":
+        return ""
+    host = _canonical_host(url if "://" in url else f"//{url}")
+    return host.split("/", 1)[0]
+
+
+_DATE_LIKE = re.compile(r"\b(?:\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|(?:19|20)\d{2})\b")
+
+
+def _stable_hash(text: str, size: int = 8) -> str:
+    # Years and dates are dropped so copyright lines and "updated on" stamps don't count as changes;
+    # other numbers (prices, headcounts, funding) still do
+    normalized = re.sub(r"\s+", " ", _DATE_LIKE.sub("", text or "")).strip().lower()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=size).hexdigest()
+
+
+def compute_fingerprint(org_description: str | None, org_industries: str | None, serp_ctx: str) -> str:
+    """Fingerprint of everything the model sees for a row: CSV fields plus one hash per crawled page."""
+    csv_part = _stable_hash(f"{org_description or ''}\x1f{org_industries or ''}")
+    page_hashes = sorted(_stable_hash(chunk, 4) for chunk in serp_ctx.split(CONTEXT_SEPARATOR) if chunk.strip())
+    return f"{FINGERPRINT_VERSION}:{csv_part}:{','.join(page_hashes)}"
+
+
+def is_reusable_analysis(row: Dict[str, Any]) -> bool:
+    """False for rows that failed, whose answer couldn't be parsed, or that are still off-taxonomy.
+
+    Such rows get no fingerprint when written, and are filtered here too for outputs written before that.
+    """
+    if (row.get("genai_details") or "").startswith("Error:") or row.get("evidence") == UNPARSED_EVIDENCE:
+        return False
+    _, _, status = TAXONOMY_INDEX.snap(str(row.get("startup_vertical") or ""), str(row.get("startup_sub_vertical") or ""))
+    return status != TaxonomyIndex.INVALID
+
+
+def load_previous_results(path: Path) -> Dict[str, Dict[str, str]]:
+    """Index a previous run's output CSV by canonical host, keeping only rows that were analyzed OK."""
+    previous: Dict[str, Dict[str, str]] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        if "analysis_fingerprint" not in (reader.fieldnames or []):
+            log(f"Previous output {path} has no analysis_fingerprint column; nothing can be reused")
+            return previous
+        for row in reader:
+            key = row_key(row.get("Organization Website") or "")
+            if not key or not row.get("analysis_fingerprint"):
+                continue
+            if not is_reusable_analysis(row):
+                continue
+            previous[key] = row
+    log(f"Loaded {len(previous)} reusable row(s) from previous output {path}")
+    return previous
+
+
+def _reask_taxonomy(client: Any, model: str, parsed: Dict[str, Any], deadline: RowDeadline) -> Dict[str, Any] | None:
+    """One small model call that asks only for the two taxonomy fields of an already-analyzed row."""
+    vertical = TAXONOMY_INDEX.vertical(str(parsed.get("startup_vertical") or ""))
+    allowed = {vertical: TAXONOMY[vertical]} if vertical else TAXONOMY
+    prompt = (
+        "Classify this company using ONLY the taxonomy below (exact strings, case-sensitive). "
+        'Return ONLY a single-line JSON object: {"startup_vertical": "...", "startup_sub_vertical": "..."}.\n'
+        f"Taxonomy: {json.dumps(allowed, ensure_ascii=False)}\n"
+        f"Company: {parsed.get('startup_name', '')} ({parsed.get('url', '')})\n"
+        f"Products: {parsed.get('products_summary', '')}\n"
+        f"Use case: {parsed.get('use_case', '')}\n"
+        f"Rejected answer (not in taxonomy): {parsed.get('startup_vertical', '')} / {parsed.get('startup_sub_vertical', '')}"
+    )
+    try:
+        LLM_BREAKER.check()
+        llm_timeout = deadline.llm_timeout()
+        extra: Dict[str, Any] = {"timeout": llm_timeout} if llm_timeout is not None else {}
+        response = client.responses.create(model=model, input=prompt, **extra)
+        LLM_BREAKER.record_success()
+        text = _coerce_to_text(getattr(response, "output_text", None)) or extract_text_from_message_blocks(
+            getattr(response, "output", None)
+        )
+        answer = json.loads(text or "")
+        return answer if isinstance(answer, dict) else None
+    except Exception as exc:  # noqa: BLE001
+        log(f"Taxonomy re-ask failed: {exc}")
+        return None
+
+
+def enforce_taxonomy(client: Any, model: str, parsed: Dict[str, Any], deadline: RowDeadline) -> Dict[str, Any]:
+    """Validate startup_vertical/startup_sub_vertical against TAXONOMY, snapping near-misses locally.
+
+    Only rows that cannot be snapped cost a (small, taxonomy-only) re-ask; if that still doesn't
+    resolve, the model's original strings are kept and the row is logged as off-taxonomy.
+    """
+    name = parsed.get("startup_name", "")
+    original = (str(parsed.get("startup_vertical") or ""), str(parsed.get("startup_sub_vertical") or ""))
+    vertical, sub, status = TAXONOMY_INDEX.snap(*original)
+    if status == TaxonomyIndex.INVALID:
+        log(f"Taxonomy: {name} returned off-taxonomy {original}; re-asking for classification only")
+        answer = _reask_taxonomy(client, model, parsed, deadline)
+        if answer:
+            vertical, sub, status = TAXONOMY_INDEX.snap(
+                str(answer.get("startup_vertical") or ""), str(answer.get("startup_sub_vertical") or "")
+            )
+    if status == TaxonomyIndex.INVALID:
+        log(f"Taxonomy: {name} still off-taxonomy {original}; keeping model output")
+        return parsed
+    if status == TaxonomyIndex.SNAPPED:
+        log(f"Taxonomy: {name} snapped {original} -> {(vertical, sub)}")
+    parsed["startup_vertical"] = vertical
+    parsed["startup_sub_vertical"] = sub
+    return parsed
+
+
 def run_analysis_for_startup(
     client: OpenAI,
     startup_name: str,
@@ -558,7 +1589,20 @@ def run_analysis_for_startup(
     model: str,
     org_description: str | None = None,
     org_industries: str | None = None,
+    deadline: RowDeadline | None = None,
+    use_sitemap: bool = True,
+    previous: Dict[str, str] | None = None,
 ) -> Dict[str, Any]:
+    """Crawl context for one startup and classify it with the model.
+
+    When ``previous`` (last month's output row for the same host) carries the same fingerprint as
+    this month's inputs, its analysis is returned as-is and the model is not called.
+    """
+    if deadline is None:
+        deadline = RowDeadline(None)
+    if previous is None and LLM_BREAKER.is_open():
+        # Don't crawl for a row whose model call is certain to be rejected
+        raise CircuitOpenError(f"circuit {LLM_BREAKER.name} is open")
     log(f"Building prompt for {startup_name} ({url})")
     taxonomy_json = json.dumps(TAXONOMY, ensure_ascii=False)
     system_prompt = (
@@ -589,10 +1633,20 @@ def run_analysis_for_startup(
     industries_block = f"\nOrganization Industries (from CSV): {org_industries}" if org_industries else ""
     serp_ctx = ""
     try:
-        serp_ctx = gather_serp_context(url, max_pages=5, max_chars=6000)
+        serp_ctx = gather_serp_context(
+            url, max_pages=5, max_chars=6000, deadline=deadline, use_sitemap=use_sitemap
+        )
     except Exception as exc:  # noqa: BLE001
         log(f"SERP context error: {exc}")
         serp_ctx = ""
+    fingerprint = compute_fingerprint(org_description, org_industries, serp_ctx)
+    if previous is not None:
+        if previous.get("analysis_fingerprint") == fingerprint:
+            log(f"Fingerprint unchanged for {startup_name} ({fingerprint}); reusing previous analysis")
+            reused: Dict[str, Any] = {k: previous.get(k, "") for k in ANALYSIS_COLUMNS}
+            reused.update(startup_name=startup_name, url=url, analysis_source="reused")
+            return reused
+        log(f"Fingerprint changed for {startup_name}: {previous.get('analysis_fingerprint')} -> {fingerprint}")
     context_block = f"\n\nWebsite context (SERP-crawled excerpts):\n{serp_ctx}\n" if serp_ctx else ""
     user_prompt = (
         f"Startup URL: {url}\nStartup name: {startup_name}.{desc_block}{industries_block}{context_block}\n"
@@ -614,12 +1668,20 @@ def run_analysis_for_startup(
     last_exc: Exception | None = None
     for attempt in range(1, MAX_MODEL_RETRIES + 1):
         t0 = time.time()
-        log(f"Calling model via client.responses.create() (attempt {attempt}/{MAX_MODEL_RETRIES})")
+        llm_timeout = deadline.llm_timeout()
+        log(
+            f"Calling model via client.responses.create() (attempt {attempt}/{MAX_MODEL_RETRIES}"
+            + (f", timeout={llm_timeout:.1f}s)" if llm_timeout is not None else ")")
+        )
+        LLM_BREAKER.check()
         try:
+            extra: Dict[str, Any] = {"timeout": llm_timeout} if llm_timeout is not None else {}
             response = client.responses.create(
                 model=model,
                 input=prompt,
+                **extra,
             )
+            LLM_BREAKER.record_success()
             dt = time.time() - t0
             log(f"Model call finished in {dt:.2f}s on attempt {attempt}")
             break
@@ -630,9 +1692,17 @@ def run_analysis_for_startup(
             msg = str(exc).lower()
             status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
             transient = ("timeout" in msg) or (status in (429, 500, 502, 503, 504))
+            if transient or "connection" in msg or status in (401, 403):
+                LLM_BREAKER.record_failure()
+            else:
+                # e.g. a 400 for this prompt: no evidence either way about the service
+                LLM_BREAKER.release_probe()
             log(f"Model call failed in {dt:.2f}s on attempt {attempt}: {exc} | transient={transient} status={status}")
             if transient and attempt < MAX_MODEL_RETRIES:
                 delay = RETRY_BASE_DELAY_S * (2 ** (attempt - 1))
+                if deadline.remaining() < delay + MIN_STAGE_TIMEOUT_S:
+                    log(f"Row deadline: not retrying ({deadline.remaining():.1f}s left)")
+                    raise
                 log(f"Retrying in {delay:.1f}s...")
                 time.sleep(delay)
                 continue
@@ -663,7 +1733,7 @@ def run_analysis_for_startup(
             "startup_vertical": "",
             "startup_sub_vertical": "",
             "use_case": final_text,
-            "evidence": "Model response could not be parsed as JSON.",
+            "evidence": UNPARSED_EVIDENCE,
             "uses_genai": False,
             "genai_details": "",
             "uses_traditional_ml": False,
@@ -684,6 +1754,11 @@ def run_analysis_for_startup(
     parsed.setdefault("ml_details", "")
     parsed.setdefault("unique_value", "")
     parsed.setdefault("site_context_summary", "")
+    parsed = enforce_taxonomy(client, model, parsed, deadline)
+    # Unparsed or still off-taxonomy answers are not worth reusing: leave them unfingerprinted so next
+    # month's run analyzes the row again
+    parsed["analysis_fingerprint"] = fingerprint if is_reusable_analysis(parsed) else ""
+    parsed["analysis_source"] = "fresh"
     return parsed
 
 
@@ -718,7 +1793,255 @@ def write_results_csv(results: Iterable[Dict[str, Any]], path: Path) -> None:
             writer.writerow(out_row)
 
 
+# ------- Month-over-month report -------
+# `report` subcommand: each monthly *.with_analysis.csv is converted once into a columnar cache
+# (taxonomy codes, bit-packed flags, host hashes as .npy files, skipping the free-text columns) and
+# the cross-month aggregates are computed with NumPy over memory-mapped chunks of those columns.
+REPORT_CACHE_DIR = ".report_cache"
+REPORT_CACHE_FORMAT = 2
+REPORT_CHUNK_ROWS = 1 << 20
+REPORT_FLAGS = ("analyzed", "uses_genai", "uses_traditional_ml")
+VERTICALS = list(TAXONOMY)
+SUB_VERTICALS = [(vertical, sub) for vertical in VERTICALS for sub in TAXONOMY[vertical]]
+# Code 0 is "unclassified" (empty or off-taxonomy label) in both code spaces
+VERTICAL_CODES = {vertical: i for i, vertical in enumerate(VERTICALS, start=1)}
+SUB_VERTICAL_CODES = {pair: i for i, pair in enumerate(SUB_VERTICALS, start=1)}
+TAXONOMY_HASH = hashlib.blake2b(json.dumps(TAXONOMY, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+
+
+YYMM_TOKEN = re.compile(r"(?<!\d)(\d{2}(?:0[1-9]|1[0-2]))(?!\d)")
+
+
+def month_label(path: Path) -> str | None:
+    """The YYMM nearest the file: in its name, else in the closest parent directory; None if there is none.
+
+    'out/2508_inv.with_analysis.csv' -> '2508', 'out/2509/inv.csv' -> '2509'.
+    """
+    for part in (path.name, *(parent.name for parent in path.parents)):
+        match = YYMM_TOKEN.search(part)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _month_argument(value: str) -> tuple[str | None, Path]:
+    """Parse a report input: 'FILE', or 'LABEL=FILE' to name the month explicitly."""
+    label, sep, path = value.partition("=")
+    if sep and label and not Path(value).is_file():
+        return label, Path(path)
+    return None, Path(value)
+
+
+def _truthy(value: str | None) -> bool:
+    return (value or "").strip().lower() in ("true", "yes", "1")
+
+
+def _host_hash(url: str) -> int:
+    """64-bit hash of the canonical host (0 when the row has no usable URL)."""
+    key = row_key(url)
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") if key else 0
+
+
+def build_month_cache(csv_path: Path, cache_root: Path) -> tuple[Path, bool]:
+    """Convert one output CSV into cached columns unless an up-to-date cache exists; returns (cache dir, rebuilt)."""
+    import numpy as np
+
+    stat = csv_path.stat()
+    source = str(csv_path.resolve())
+    source_key = hashlib.blake2b(source.encode("utf-8"), digest_size=4).hexdigest()
+    target = cache_root / f"{re.sub(r'[^A-Za-z0-9._-]', '_', csv_path.stem)}-{source_key}"
+    expected = {
+        "format": REPORT_CACHE_FORMAT,
+        "source": source,
+        "size": stat.st_size,
+        "mtimeNs": stat.st_mtime_ns,
+        "taxonomy": TAXONOMY_HASH,
+    }
+    meta_path = target / "meta.json"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if all(meta.get(k) == v for k, v in expected.items()):
+            return target, False
+    except (OSError, ValueError):
+        pass
+
+    verticals = array("B")
+    subs = array("H")
+    flags = {name: array("B") for name in REPORT_FLAGS}
+    hosts = array("Q")
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))  # evidence/context cells can exceed the 128 KB default
+    with csv_path.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            # Stored labels are counted as written; the analysis already snapped them to the taxonomy
+            vertical = (row.get("startup_vertical") or "").strip()
+            sub = (row.get("startup_sub_vertical") or "").strip()
+            verticals.append(VERTICAL_CODES.get(vertical, 0))
+            subs.append(SUB_VERTICAL_CODES.get((vertical, sub), 0))
+            flags["analyzed"].append(
+                row.get("analysis_source") != "failed" and not (row.get("genai_details") or "").startswith("Error:")
+            )
+            flags["uses_genai"].append(_truthy(row.get("uses_genai")))
+            flags["uses_traditional_ml"].append(_truthy(row.get("uses_traditional_ml")))
+            hosts.append(_host_hash(row.get("Organization Website") or row.get("url") or ""))
+
+    target.mkdir(parents=True, exist_ok=True)
+    meta_path.unlink(missing_ok=True)  # the cache only counts as complete once meta.json is back
+    np.save(target / "vertical.npy", np.frombuffer(verticals, dtype=np.uint8))
+    np.save(target / "sub_vertical.npy", np.frombuffer(subs, dtype=np.uint16))
+    for name, values in flags.items():
+        np.save(target / f"{name}.npy", np.packbits(np.frombuffer(values, dtype=np.uint8)))
+    np.save(target / "host.npy", np.frombuffer(hosts, dtype=np.uint64))
+    meta_path.write_text(json.dumps({**expected, "rows": len(verticals)}), encoding="utf-8")
+    return target, True
+
+
+def aggregate_months(months: List[tuple[str, Path]], chunk_rows: int = REPORT_CHUNK_ROWS) -> List[Dict[str, Any]]:
+    """Per-month mix, GenAI/ML shares and new entrants from cached columns, in ``months`` order.
+
+    Columns are memory-mapped and read ``chunk_rows`` at a time; group-bys over the vertical and
+    sub-vertical codes are bincounts over the analyzed rows. A host is a new entrant the first month
+    it appears in; the first month has no baseline, so its count is None.
+    """
+    import numpy as np
+
+    chunk_rows = max(8, chunk_rows - chunk_rows % 8)  # chunk boundaries stay on whole bytes of the bit arrays
+    n_verticals, n_subs = len(VERTICALS) + 1, len(SUB_VERTICALS) + 1
+    seen = np.empty(0, dtype=np.uint64)
+    report: List[Dict[str, Any]] = []
+    for index, (label, directory) in enumerate(months):
+        rows = json.loads((directory / "meta.json").read_text(encoding="utf-8"))["rows"]
+        vertical = np.load(directory / "vertical.npy", mmap_mode="r")
+        sub = np.load(directory / "sub_vertical.npy", mmap_mode="r")
+        bits = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in REPORT_FLAGS}
+        host = np.load(directory / "host.npy", mmap_mode="r")
+
+        vertical_counts = np.zeros(n_verticals, dtype=np.int64)
+        sub_counts = np.zeros(n_subs, dtype=np.int64)
+        genai_by_vertical = np.zeros(n_verticals, dtype=np.int64)
+        ml_by_vertical = np.zeros(n_verticals, dtype=np.int64)
+        month_hosts = []
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            flag = {
+                name: np.unpackbits(packed[start // 8 : (stop + 7) // 8], count=stop - start).view(bool)
+                for name, packed in bits.items()
+            }
+            ok = flag["analyzed"]
+            v = vertical[start:stop][ok]
+            vertical_counts += np.bincount(v, minlength=n_verticals)
+            sub_counts += np.bincount(sub[start:stop][ok], minlength=n_subs)
+            genai_by_vertical += np.bincount(v[flag["uses_genai"][ok]], minlength=n_verticals)
+            ml_by_vertical += np.bincount(v[flag["uses_traditional_ml"][ok]], minlength=n_verticals)
+            h = host[start:stop]
+            month_hosts.append(np.unique(h[h != 0]))
+
+        hosts = np.unique(np.concatenate(month_hosts)) if month_hosts else np.empty(0, dtype=np.uint64)
+        new_entrants = int(np.count_nonzero(~np.isin(hosts, seen, assume_unique=True)))
+        seen = np.union1d(seen, hosts)
+        analyzed = int(vertical_counts.sum())
+        names = ["(unclassified)"] + VERTICALS
+        report.append(
+            {
+                "month": label,
+                "rows": rows,
+                "analyzed": analyzed,
+                "genaiShare": int(genai_by_vertical.sum()) / analyzed if analyzed else 0.0,
+                "mlShare": int(ml_by_vertical.sum()) / analyzed if analyzed else 0.0,
+                "newEntrants": new_entrants if index else None,
+                "verticals": {names[i]: int(c) for i, c in enumerate(vertical_counts) if c},
+                "subVerticals": {
+                    f"{SUB_VERTICALS[i - 1][0]} / {SUB_VERTICALS[i - 1][1]}" if i else "(unclassified)": int(c)
+                    for i, c in enumerate(sub_counts)
+                    if c
+                },
+                "genaiShareByVertical": {
+                    names[i]: int(genai_by_vertical[i]) / int(c) for i, c in enumerate(vertical_counts) if c
+                },
+                "mlShareByVertical": {names[i]: int(ml_by_vertical[i]) / int(c) for i, c in enumerate(vertical_counts) if c},
+            }
+        )
+    return report
+
+
+def print_report(report: List[Dict[str, Any]], top: int = 3) -> None:
+    """Month-over-month table: shares, new entrants and the top verticals with their share change."""
+    print(f"{'month':<8} {'rows':>7} {'analyzed':>9} {'GenAI':>7} {'trad ML':>8} {'new':>6}  top verticals (share, Δ pp)")
+    previous: Dict[str, float] = {}
+    for month in report:
+        analyzed = month["analyzed"] or 1
+        shares = {name: count / analyzed for name, count in month["verticals"].items()}
+        ranked = sorted(shares.items(), key=lambda item: item[1], reverse=True)
+        leaders = [(name, share) for name, share in ranked if name in VERTICAL_CODES][:top]
+        mix = ", ".join(
+            f"{name} {share:.0%}" + (f" ({(share - previous.get(name, 0.0)) * 100:+.1f})" if previous else "")
+            for name, share in leaders
+        )
+        new = "–" if month["newEntrants"] is None else str(month["newEntrants"])
+        print(
+            f"{month['month']:<8} {month['rows']:>7} {month['analyzed']:>9} {month['genaiShare']:>7.1%} "
+            f"{month['mlShare']:>8.1%} {new:>6}  {mix}"
+        )
+        previous = shares
+
+
+def report_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog=f"{Path(sys.argv[0]).name} report",
+        description="Month-over-month vertical mix, GenAI/ML shares and new entrants over monthly *.with_analysis.csv outputs",
+    )
+    parser.add_argument(
+        "outputs",
+        nargs="+",
+        type=_month_argument,
+        metavar="[LABEL=]FILE",
+        help="Monthly output CSVs, ordered by the YYMM nearest each file in its path or by an explicit LABEL",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(REPORT_CACHE_DIR),
+        help=f"Columnar cache, one directory per output CSV (default: {REPORT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=REPORT_CHUNK_ROWS,
+        help=f"Rows per memory-mapped chunk when aggregating (default: {REPORT_CHUNK_ROWS})",
+    )
+    parser.add_argument("--top", type=int, default=3, help="Verticals to show per month (default: 3)")
+    parser.add_argument("--json", type=Path, metavar="FILE", help="Also write the full per-month aggregates as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        parser.error("the report needs numpy (pip install numpy)")
+    missing = [str(p) for _, p in args.outputs if not p.is_file()]
+    if missing:
+        parser.error(f"no such file: {', '.join(missing)}")
+    inputs = [(label or month_label(path), path) for label, path in args.outputs]
+    unlabeled = [str(p) for label, p in inputs if label is None]
+    if unlabeled:
+        parser.error(f"no YYMM in the path of {', '.join(unlabeled)}; pass it as LABEL=FILE")
+
+    months = []
+    for label, path in sorted(inputs, key=lambda item: item[0]):
+        directory, rebuilt = build_month_cache(path, args.cache_dir)
+        if rebuilt:
+            log(f"Cached {path} as columns in {directory}")
+        months.append((label, directory))
+    report = aggregate_months(months, args.chunk_rows)
+    print_report(report, args.top)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        log(f"Report written to {args.json}")
+    return 0
+
+
 def build_client() -> OpenAI:
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
     load_dotenv()
 
     api_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -733,7 +2056,14 @@ def build_client() -> OpenAI:
 
 
 def main(argv: list[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description=__doc__)
+    global CASSETTE, RENDER_PROFILE
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["report"]:
+        return report_main(argv[1:])
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        epilog="Month-over-month report over finished outputs: %(prog)s report [LABEL=]OUTPUT.csv [...]",
+    )
     parser.add_argument(
         "--input",
         type=Path,
@@ -746,17 +2076,90 @@ def main(argv: list[str] | None = None) -> int:
         default=Path(OUTPUT_CSV),
         help="Output CSV path (a copy of input with appended analysis columns)",
     )
+    parser.add_argument(
+        "--row-deadline",
+        type=parse_duration,
+        default=None,
+        help="Wall-clock budget per row shared by SERP, crawl, render and LLM stages (e.g. 60s, 2m); unlimited by default",
+    )
+    parser.add_argument(
+        "--llm-reserve",
+        type=float,
+        default=DEFAULT_LLM_RESERVE_FRACTION,
+        help=f"Fraction of --row-deadline always reserved for the model call (default: {DEFAULT_LLM_RESERVE_FRACTION})",
+    )
+    parser.add_argument(
+        "--no-sitemap",
+        action="store_true",
+        help="Skip robots.txt/sitemap.xml discovery and find candidate pages via SerpAPI only",
+    )
+    parser.add_argument(
+        "--render-profile",
+        choices=("text", "full"),
+        default=RENDER_PROFILE,
+        help="Playwright profile: 'text' blocks images/fonts/CSS/trackers and bounds waits; 'full' waits for networkidle",
+    )
+    parser.add_argument(
+        "--previous-output",
+        type=Path,
+        default=None,
+        help="Last month's *.with_analysis.csv; rows whose fingerprint is unchanged reuse its analysis without a model call",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        type=Path,
+        metavar="DIR",
+        help="Record every SERP response, fetched page, sitemap lookup and LLM response into a cassette in DIR",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        type=Path,
+        metavar="DIR",
+        help="Serve all external I/O from the cassette in DIR (no network, no API keys needed)",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=None,
+        metavar="FACTOR",
+        help="With --replay, sleep FACTOR x each call's recorded duration (default: 0, no simulated latency)",
+    )
     args = parser.parse_args(argv)
 
+    if not 0.0 <= args.llm_reserve < 1.0:
+        parser.error("--llm-reserve must be in [0, 1)")
+    if args.replay_latency is not None and not args.replay:
+        parser.error("--replay-latency only applies with --replay")
+
     if args.input.suffix.lower() != ".csv":
         raise RuntimeError("This script expects a CSV input (e.g., 2508_inv.csv)")
 
-    client = build_client()
+    RENDER_PROFILE = args.render_profile
+    if args.replay:
+        CASSETTE = Cassette(args.replay, "replay", latency_factor=args.replay_latency or 0.0)
+        client: Any = RecordedClient(None, CASSETTE)
+    elif args.record:
+        CASSETTE = Cassette(args.record, "record")
+        client = RecordedClient(build_client(), CASSETTE)
+    else:
+        client = build_client()
+    try:
+        return process_rows(args, client)
+    finally:
+        if CASSETTE is not None:
+            CASSETTE.close()
+
 
+def process_rows(args: argparse.Namespace, client: Any) -> int:
+    """Analyze every input row and write the output CSV (the body of a normal run)."""
     model = DEFAULT_MODEL_DEPLOYMENT
     print(f"Using Azure OpenAI deployment: {model}")
+    if args.row_deadline:
+        log(f"Row deadline: {args.row_deadline:.1f}s per row ({args.llm_reserve:.0%} reserved for the LLM)")
     out_abs = args.output.resolve()
     log(f"Output will be written to: {out_abs}")
+    previous_results = load_previous_results(args.previous_output) if args.previous_output else {}
 
     # Read input and prepare output schema
     with args.input.open("r", encoding="utf-8") as fin, args.output.open("w", newline="", encoding="utf-8") as fout:
@@ -766,19 +2169,7 @@ def main(argv: list[str] | None = None) -> int:
             raise RuntimeError("Input CSV missing required 'Organization Website' column")
 
         # Analysis columns to append
-        analysis_cols = [
-            "products_summary",
-            "startup_vertical",
-            "startup_sub_vertical",
-            "use_case",
-            "uses_genai",
-            "genai_details",
-            "uses_traditional_ml",
-            "ml_details",
-            "unique_value",
-            "site_context_summary",
-            "evidence",
-        ]
+        analysis_cols = ANALYSIS_COLUMNS
 
         out_fieldnames = original_fieldnames + [c for c in analysis_cols if c not in original_fieldnames]
 
@@ -792,6 +2183,7 @@ def main(argv: list[str] | None = None) -> int:
             pass
 
         total = 0
+        reused = 0
         for idx, row in enumerate(reader, start=1):
             url = (row.get("Organization Website") or "").strip() or "N/A"
             desc = (row.get("Organization Description") or "").strip()
@@ -801,11 +2193,22 @@ def main(argv: list[str] | None = None) -> int:
             log(
                 f"[{idx}] Start: {startup_name} ({url}); desc chars: {len(desc)} | industries: {safe_preview(industries, 120)}"
             )
+            deadline = RowDeadline(args.row_deadline, args.llm_reserve)
             try:
                 analysis = run_analysis_for_startup(
-                    client, startup_name, url, model=model, org_description=desc, org_industries=industries
+                    client,
+                    startup_name,
+                    url,
+                    model=model,
+                    org_description=desc,
+                    org_industries=industries,
+                    deadline=deadline,
+                    use_sitemap=not args.no_sitemap,
+                    previous=previous_results.get(row_key(url)),
                 )
-                print(f"Processed {startup_name} ({url})")
+                if analysis.get("analysis_source") == "reused":
+                    reused += 1
+                print(f"Processed {startup_name} ({url}) in {deadline.elapsed():.1f}s")
                 log(f"[{idx}] Parsed keys: {list(analysis.keys())}")
             except Exception as exc:  # noqa: BLE001
                 print(f"Failed to process {url}: {exc}", file=sys.stderr)
@@ -821,6 +2224,8 @@ def main(argv: list[str] | None = None) -> int:
                     "ml_details": "",
                     "unique_value": "",
                     "evidence": f"Error: {exc}",
+                    "analysis_fingerprint": "",
+                    "analysis_source": "failed",
                 }
 
             # Flatten evidence for output
@@ -848,6 +2253,8 @@ def main(argv: list[str] | None = None) -> int:
                 log(f"Wrote row {total} to {out_abs}")
 
     log(f"Finished writing rows to {out_abs}")
+    if previous_results:
+        log(f"Reused {reused}/{total} row(s) from {args.previous_output}")
     return 0
 
 
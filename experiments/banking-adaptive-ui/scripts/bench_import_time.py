@@ -0,0 +1,109 @@
+"""
+Benchmark cold-start time of the Python CLI scripts.
+
+Runs each script's ``--help`` in a fresh interpreter under ``python -X importtime``
+several times and reports the median wall time, the median total import time and
+the heaviest top-level imports. Use ``--max-ms`` to fail (exit 1) when a script's
+median cold start regresses past a budget.
+
+Usage:
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py ../../analyze_startups_serpapi_startups_monthly.py --runs 10 --max-ms 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_SCRIPTS = [SCRIPT_DIR / "genui_llm_composer.py"]
+
+
+def parse_importtime(stderr: str) -> tuple[int, list[tuple[int, str]]]:
+    """Return (total cumulative µs, [(cumulative µs, module)] for top-level imports) from -X importtime output."""
+    top_level: list[tuple[int, str]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue
+        name = parts[2]
+        # Nested imports are indented under their parent; only count top-level ones
+        if name.startswith(" ") and not name.startswith("  "):
+            top_level.append((cumulative, name.strip()))
+    return sum(c for c, _ in top_level), top_level
+
+
+def bench_script(script: Path, runs: int) -> dict:
+    walls: list[float] = []
+    imports: list[int] = []
+    heaviest: dict[str, int] = {}
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", str(script), "--help"],
+            capture_output=True,
+            text=True,
+        )
+        walls.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{script} --help exited {proc.returncode}: {proc.stderr[-500:]}")
+        total_us, top_level = parse_importtime(proc.stderr)
+        imports.append(total_us)
+        for cumulative, name in top_level:
+            heaviest[name] = max(heaviest.get(name, 0), cumulative)
+    return {
+        "script": script.name,
+        "wall_ms": statistics.median(walls),
+        "import_ms": statistics.median(imports) / 1000,
+        "heaviest": sorted(heaviest.items(), key=lambda kv: kv[1], reverse=True),
+    }
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark CLI cold-start (import) time")
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        type=Path,
+        help="Scripts to benchmark (default: genui_llm_composer.py)",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs per script (default: 5)")
+    parser.add_argument("--top", type=int, default=8, help="Number of heaviest imports to list (default: 8)")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="Fail if any script's median wall time exceeds this budget",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for script in args.scripts or DEFAULT_SCRIPTS:
+        result = bench_script(script, args.runs)
+        print(
+            f"{result['script']}: median wall {result['wall_ms']:.1f} ms, "
+            f"imports {result['import_ms']:.1f} ms ({args.runs} runs)"
+        )
+        for name, cumulative in result["heaviest"][: args.top]:
+            print(f"  {cumulative / 1000:8.2f} ms  {name}")
+        if args.max_ms is not None and result["wall_ms"] > args.max_ms:
+            print(f"❌ {result['script']} exceeds cold-start budget of {args.max_ms:.0f} ms", file=sys.stderr)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Shared core of the GenUI composer: the model contract and client, schema
+generation (whole and streamed), validation, trait buckets and the schema cache.
+
+``genui_llm_composer`` (the CLI) and the modules it loads on demand (packed
+composer, layout library, compose service) all import these from here, so running
+the CLI as a script never executes it a second time as an importable module with
+its own SYSTEM_PROMPT and SchemaCache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from genui_schema_validator import SectionRepairer, missing_required, repair_ui_schema, validate_ui_schema
+
+# openai (with pydantic) and dotenv are imported in build_client(), so --help, argument
+# errors and runs that never call the model don't pay for them at startup.
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# Paths
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+# Azure OpenAI configuration (read from the environment / .env in build_client)
+DEFAULT_AZURE_OPENAI_ENDPOINT = "https://aoai-ep-swedencentral02.openai.azure.com/openai/v1/"
+DEFAULT_MODEL = "gpt-5-mini"
+DEFAULT_CONCURRENCY = 8
+
+# Schema cache (trait buckets -> UISchema)
+DEFAULT_CACHE_DIR = PROJECT_ROOT / ".genui_cache" / "schemas"
+DEFAULT_CACHE_SIZE = 1024
+BUCKET_VERSION = "v1"
+BUCKET_TOP_ACTIONS = 3  # ranked top actions a bucket keeps; later ones never change the layout
+AFFINITY_THRESHOLDS = (0.3, 0.4)  # layout rules switch at >0.3 (beneficiaries/account card) and >0.4 (prompt rules 1-2)
+
+# System prompt with UISchema contract and rules
+SYSTEM_PROMPT = """You are a UI layout composer for a modern banking app. Your task is to generate a personalized UI schema based on user behavior and preferences.
+
+# UISchema Contract
+
+type ActionId = "TRANSFER" | "PAY_BILL" | "FX" | "OPEN_SAVINGS";
+
+type UISchema = {
+  version: "1.0",
+  sections: Array<
+    | { id: string; component: "HeroCard"; props: { title: string; subtitle?: string } }
+    | { id: string; component: "ActionGrid"; props: { actions: { label: string; actionId: ActionId }[] } }
+    | { id: string; component: "FXRates"; props: { expanded?: boolean } }
+    | { id: string; component: "Balances"; props: {} }
+    | { id: string; component: "OffersCard"; props: { title: string; body: string; cta?: { text: string; actionId: ActionId } } }
+    | { id: string; component: "RecentBeneficiaries"; props: { aliases: string[] } }
+    | { id: string; component: "ContinueBillPay"; props: { visible: boolean } }
+  >;
+};
+
+# Constraints
+
+1. JSON only, ≤8 sections
+2. Always include "Balances" and "ActionGrid" components
+3. Only use allowlisted ActionIds: TRANSFER, PAY_BILL, FX, OPEN_SAVINGS
+4. Locale: if TR → use Turkish copy; else English
+5. Neutral copy (no fees/rates/APR/claims), no PII
+6. Aliases only for beneficiaries (e.g., "Alias-A", "Alias-B")
+
+# Layout Rules
+
+1. If fxAffinity > 0.4 → include FXRates near top; expanded=true if "exchange" searched ≥2× in last 7 days
+2. If transferAffinity > 0.4 → prioritize TRANSFER or PAY_BILL based on topActions
+3. If lastPaths contains /payments/utilities → PAY_BILL first in ActionGrid
+4. If aliases exist → include RecentBeneficiaries with 2–3 masked strings
+5. If explorerScore high or Savings dwell detected → include OffersCard (Auto-Save) with OPEN_SAVINGS CTA
+6. If incompleteBillPay → include ContinueBillPay with visible=true
+7. Respect prefersDense; keep copy concise
+8. Obey locale (TR/EN)
+
+# Self-Check
+
+Before returning:
+- Valid JSON?
+- ≤8 sections?
+- Includes Balances and ActionGrid?
+- All ActionIds from allowlist?
+- Locale matches user?
+- No PII or hard-coded rates?
+
+Return JSON only, no markdown."""
+
+
+def prompt_payload(traits: dict) -> tuple[dict, dict]:
+    """The (behavior, preferences) fields of ``traits`` that are sent to the model."""
+    behavior = {
+        "fxAffinity": traits.get("fxAffinity", 0),
+        "transferAffinity": traits.get("transferAffinity", 0),
+        "explorerScore": traits.get("explorerScore", 0),
+        "topActions": traits.get("topActions", []),
+        "lastPaths": traits.get("lastPaths", []),
+        "searchTerms": traits.get("searchTerms", [])[:5],  # top 5
+        "incompleteBillPay": traits.get("incompleteBillPay"),
+    }
+
+    prefs = {
+        "locale": traits.get("locale", "en"),
+        "prefersDense": traits.get("prefersDense", False),
+        "darkMode": traits.get("darkMode", False),
+    }
+    return behavior, prefs
+
+
+def build_user_prompt(traits: dict) -> str:
+    """Build user prompt from traits."""
+    behavior, prefs = prompt_payload(traits)
+    return f"""Generate a personalized UI schema for this user:
+
+# User Traits
+{json.dumps(behavior, indent=2)}
+
+# User Preferences
+{json.dumps(prefs, indent=2)}
+
+Return a valid UISchema JSON object following all constraints and rules."""
+
+
+def build_client() -> OpenAI:
+    """Build Azure OpenAI client."""
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    # Load environment variables
+    load_dotenv()
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("AZURE_OPENAI_API_KEY must be set in environment")
+
+    return OpenAI(
+        api_key=api_key,
+        base_url=os.getenv("AZURE_OPENAI_ENDPOINT", DEFAULT_AZURE_OPENAI_ENDPOINT),
+    )
+
+
+def request_output_text(client: OpenAI, model: str, full_input: str) -> tuple[str, dict]:
+    """One responses.create() call; returns (output text, token usage).
+
+    Usage is {"input_tokens", "output_tokens", "estimated"}; when the response
+    carries no usage the counts are estimated at 4 chars per token.
+    """
+    # Call responses.create() API as per analyze_startups pattern
+    response = client.responses.create(
+        model=model,
+        input=full_input,
+    )
+
+    # Extract text from response - try multiple paths
+    output_text = None
+
+    # Try output_text attribute first
+    if hasattr(response, "output_text") and response.output_text:
+        output_text = response.output_text
+    # Try output attribute
+    elif hasattr(response, "output") and response.output:
+        output_text = response.output
+    # Try choices path (fallback for different API versions)
+    elif hasattr(response, "choices") and len(response.choices) > 0:
+        choice = response.choices[0]
+        if hasattr(choice, "message") and hasattr(choice.message, "content"):
+            output_text = choice.message.content
+        elif hasattr(choice, "text"):
+            output_text = choice.text
+
+    if not output_text:
+        raise RuntimeError(f"Could not extract text from response: {response}")
+
+    usage = getattr(response, "usage", None)
+    if getattr(usage, "input_tokens", None) is not None:
+        tokens = {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens or 0, "estimated": False}
+    else:
+        tokens = {"input_tokens": len(full_input) // 4, "output_tokens": len(output_text) // 4, "estimated": True}
+    return output_text, tokens
+
+
+def parse_model_json(output_text: str):
+    """Parse model output as JSON, tolerating a surrounding markdown code fence."""
+    output_text = output_text.strip()
+    if output_text.startswith("```json"):
+        output_text = output_text[7:]
+    if output_text.startswith("```"):
+        output_text = output_text[3:]
+    if output_text.endswith("```"):
+        output_text = output_text[:-3]
+    return json.loads(output_text.strip())
+
+
+def generate_schema(client: OpenAI, traits: dict, model: str, verbose: bool = True) -> dict:
+    """Call GPT-5 to generate UI schema using Responses API."""
+    user_prompt = build_user_prompt(traits)
+    full_input = f"{SYSTEM_PROMPT}\n\n{user_prompt}"
+
+    if verbose:
+        print(f"Calling Azure OpenAI {model} via responses.create()...")
+        print(f"Input length: {len(full_input)} chars")
+    output_text = None
+
+    try:
+        output_text, _ = request_output_text(client, model, full_input)
+        if verbose:
+            print(f"✓ Response received ({len(output_text)} chars)")
+
+        # Parse JSON
+        schema = parse_model_json(output_text)
+        if verbose:
+            print("✓ JSON parsed successfully")
+        return schema
+
+    except json.JSONDecodeError as e:
+        if verbose:
+            print(f"❌ Failed to parse JSON: {e}", file=sys.stderr)
+            print(f"Response preview: {output_text[:500] if output_text else 'None'}", file=sys.stderr)
+        raise
+    except Exception as e:
+        if verbose:
+            print(f"❌ API call failed: {e}", file=sys.stderr)
+        raise
+
+
+class SectionStreamParser:
+    """Incremental JSON scanner that yields each ``sections[i]`` object as soon as it closes.
+
+    Feed text deltas in order; anything before the first ``{`` (e.g. a code fence)
+    is skipped. Only the brace/bracket/string structure is tracked, so each
+    character is looked at once and a closed section is parsed with one json.loads.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string = ""
+        self.key = ""
+        self.sections_depth = 0  # depth inside the "sections" array, 0 until it opens
+        self.section_start = -1
+        self.sections_seen = 0
+
+    def feed(self, delta: str) -> list[tuple[int, dict | None]]:
+        """Consume ``delta``; return (index in sections, section or None if unparsable) for each section it closed."""
+        self.text += delta
+        closed: list[tuple[int, dict | None]] = []
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start : i]
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = i + 1
+            elif ch == ":":
+                self.key = self.last_string
+            elif ch in "{[":
+                self.depth += 1
+                if ch == "[" and self.depth == 2 and self.key == "sections":
+                    self.sections_depth = 2
+                elif ch == "{" and self.sections_depth and self.depth == self.sections_depth + 1:
+                    self.section_start = i
+            elif ch in "}]":
+                if ch == "}" and self.section_start >= 0 and self.depth == self.sections_depth + 1:
+                    try:
+                        section = json.loads(text[self.section_start : i + 1])
+                    except json.JSONDecodeError:
+                        section = None
+                    closed.append((self.sections_seen, section))
+                    self.sections_seen += 1
+                    self.section_start = -1
+                elif ch == "]" and self.depth == self.sections_depth:
+                    self.sections_depth = 0
+                self.depth -= 1
+        self.pos = len(text)
+        return closed
+
+
+def stream_schema(
+    client: OpenAI, traits: dict, model: str, on_section: Callable[[dict, float], None]
+) -> tuple[dict, dict]:
+    """Stream the model response, handing each repaired section to ``on_section(section, elapsed_s)`` as it closes.
+
+    Sections go through the same per-section repair as repair_ui_schema, and
+    missing required sections are emitted at the end. Returns (schema, stats)
+    with time-to-first-section and total time in ms.
+    """
+    t0 = time.perf_counter()
+    parser = SectionStreamParser()
+    repairer = SectionRepairer(traits)
+    first_section_s = None
+
+    def emit(section: dict) -> None:
+        nonlocal first_section_s
+        elapsed = time.perf_counter() - t0
+        if first_section_s is None:
+            first_section_s = elapsed
+        on_section(section, elapsed)
+
+    stream = client.responses.create(
+        model=model,
+        input=f"{SYSTEM_PROMPT}\n\n{build_user_prompt(traits)}",
+        stream=True,
+    )
+    for event in stream:
+        event_type = getattr(event, "type", "")
+        if event_type == "response.output_text.delta":
+            for index, raw in parser.feed(event.delta):
+                section = repairer.add(raw, index)
+                if section is not None:
+                    emit(section)
+        elif event_type in ("error", "response.failed"):
+            raise RuntimeError(f"Response stream failed: {event}")
+    if parser.sections_seen == 0:
+        raise RuntimeError("Response stream contained no sections")
+    for section in repairer.finish():
+        emit(section)
+
+    stats = {
+        "ttfsMs": round((first_section_s or 0) * 1000, 1),
+        "totalMs": round((time.perf_counter() - t0) * 1000, 1),
+        "fixes": repairer.fixes,
+    }
+    return {"version": "1.0", "sections": repairer.sections}, stats
+
+
+def validate_schema(schema: dict, verbose: bool = True) -> bool:
+    """Full UISchemaValidator check (see genui_schema_validator) plus the required Balances/ActionGrid."""
+    errors = validate_ui_schema(schema)
+    if not errors:
+        errors = [f"missing required component {c}" for c in missing_required(schema)]
+    if errors:
+        if verbose:
+            print(f"❌ Schema invalid ({len(errors)} error(s)): " + "; ".join(errors[:5]), file=sys.stderr)
+        return False
+
+    if verbose:
+        print("✅ Schema validation passed")
+    return True
+
+
+def generate_valid_schema(client: OpenAI, traits: dict, model: str, verbose: bool = True) -> dict:
+    """generate_schema, repairing invalid output locally instead of calling the model again."""
+    schema = generate_schema(client, traits, model, verbose=verbose)
+    if validate_schema(schema, verbose=False):
+        return schema
+    repaired, fixes = repair_ui_schema(schema, traits)
+    if verbose:
+        print("✓ Repaired model output locally: " + "; ".join(fixes))
+    return repaired
+
+
+def _affinity_level(value: float | None) -> int:
+    """Quantize an affinity to the number of layout-rule thresholds it exceeds."""
+    v = float(value or 0)
+    return sum(1 for t in AFFINITY_THRESHOLDS if v > t)
+
+
+def trait_bucket(traits: dict) -> dict:
+    """Reduce traits to the coarse signals the layout rules actually react to.
+
+    Two users with the same bucket get the same prompt-relevant picture: affinities
+    by threshold band, ranked top actions, rule-relevant path flags, how often
+    "exchange" was searched (0/1/2+), the open bill-pay journey, locale and density.
+    """
+    paths = [p for p in traits.get("lastPaths") or [] if isinstance(p, str)]
+    exchange_searches = sum(
+        int(t.get("count", 1))
+        for t in (traits.get("searchTerms") or [])[:5]
+        if isinstance(t, dict) and "exchange" in str(t.get("term", ""))
+    )
+    return {
+        "fx": _affinity_level(traits.get("fxAffinity")),
+        "transfer": _affinity_level(traits.get("transferAffinity")),
+        "explorer": _affinity_level(traits.get("explorerScore")),
+        "topActions": list((traits.get("topActions") or [])[:BUCKET_TOP_ACTIONS]),
+        "utilities": any("/payments/utilities" in p for p in paths),
+        "savings": any("/savings" in p for p in paths),
+        "offers": any("/offers" in p for p in paths),
+        "exchangeSearches": min(exchange_searches, 2),
+        "incompleteBillPay": bool(traits.get("incompleteBillPay")),
+        "locale": "tr" if traits.get("locale") == "tr" else "en",
+        "prefersDense": bool(traits.get("prefersDense")),
+    }
+
+
+def trait_bucket_key(traits: dict) -> str:
+    """Canonical, hashable cache key for a traits dict (see trait_bucket)."""
+    return f"{BUCKET_VERSION}:" + json.dumps(trait_bucket(traits), sort_keys=True, separators=(",", ":"))
+
+
+class SchemaCache:
+    """In-memory LRU of UISchemas by trait-bucket key, backed by one JSON file per key on disk.
+
+    Thread-safe, and concurrent misses on the same key are coalesced: only the first
+    caller computes, the rest wait for and share its result.
+    """
+
+    def __init__(self, directory: Path | None, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / f"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.json"
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            schema = self._memory.get(key)
+            if schema is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return schema
+        path = self._path(key)
+        if path is not None and path.exists():
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                entry = None
+            if entry and entry.get("key") == key:
+                self._remember(key, entry["schema"])
+                with self._lock:
+                    self.hits += 1
+                return entry["schema"]
+        return None
+
+    def _remember(self, key: str, schema: dict) -> None:
+        with self._lock:
+            self._memory[key] = schema
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key: str, schema: dict) -> None:
+        self._remember(key, schema)
+        path = self._path(key)
+        if path is not None:
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump({"key": key, "schema": schema}, f)
+            os.replace(tmp, path)
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict], valid: Callable[[dict], bool]) -> tuple[dict, bool]:
+        """Return (schema, was_cached); only schemas passing ``valid`` are stored."""
+        schema = self.get(key)
+        if schema is not None:
+            return schema, True
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                schema = self.get(key)
+                if schema is not None:
+                    return schema, True
+                with self._lock:
+                    self.misses += 1
+                schema = compute()
+                if valid(schema):
+                    self.put(key, schema)
+                return schema, False
+        finally:
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
@@ -0,0 +1,357 @@
+"""
+Long-running compose service: ``POST /compose`` traits JSON, get a validated UISchema.
+
+Started by ``genui_llm_composer.py --serve [HOST:]PORT``. One process keeps a
+single warm OpenAI client (and with it the HTTP connection pool to Azure), the
+schema cache and the rule engine loaded, so a request pays only for the model
+call, or for nothing at all on a cache hit or a rule-served hybrid request.
+
+Concurrent requests that map to the same key (the trait bucket with the cache on,
+the exact traits without it) are merged: the first one calls the model and the
+rest await its result; if the first one's client disconnects, a waiting request
+takes over the call. Model calls run in worker threads, at most ``concurrency``
+at a time.
+
+Plain asyncio streams, no framework: HTTP/1.1 with keep-alive, JSON in and out.
+Bodies over MAX_BODY_BYTES get 413, and one not received within
+KEEPALIVE_TIMEOUT_S gets 408.
+
+    POST /compose   body: traits object or {"traits": {...}}
+                    200 UISchema, headers X-Compose-Source and Server-Timing
+    POST /compose?stream=1
+                    200 chunked NDJSON: {"type": "section"} per section as the model
+                    closes it, then {"type": "done"} with source, ttfsMs and totalMs
+                    (streamed model calls are not merged with other requests)
+    GET  /healthz   200 {"ok": true, ...counters}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+from genui_compose_core import (
+    SchemaCache,
+    build_client,
+    generate_valid_schema,
+    stream_schema,
+    trait_bucket_key,
+    validate_schema,
+)
+from genui_layout_rules import HYBRID_MIN_CONFIDENCE, rule_confidence
+from genui_schema_validator import rule_layout
+
+if TYPE_CHECKING:
+    from genui_layout_library import LayoutLibrary
+    from openai import OpenAI
+
+MAX_BODY_BYTES = 256 * 1024
+KEEPALIVE_TIMEOUT_S = 30.0
+
+
+class ComposeError(Exception):
+    """A request that cannot be answered with a schema; carries the HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ComposeService:
+    def __init__(
+        self, model: str, mode: str, cache: SchemaCache | None, concurrency: int, library: LayoutLibrary | None = None
+    ):
+        self.model = model
+        self.mode = mode
+        self.cache = cache
+        self.library = library
+        self.client: OpenAI | None = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.counters = {"requests": 0, "model_calls": 0, "coalesced": 0, "errors": 0}
+
+    def start(self) -> None:
+        """Build the one shared client up front so the first request doesn't pay for it."""
+        if self.mode != "rules":
+            self.client = build_client()
+
+    # ------- Compose -------
+
+    async def compose(self, traits: dict) -> tuple[dict, str, float]:
+        """Return (schema, source, model_ms); source is rules, library, cache, llm, coalesced or fallback."""
+        if self.mode == "rules":
+            return rule_layout(traits), "rules", 0.0
+        if self.mode == "hybrid" and rule_confidence(traits)[0] >= HYBRID_MIN_CONFIDENCE:
+            return rule_layout(traits), "rules", 0.0
+        if self.library is not None and (hit := self.library.lookup(traits)) is not None:
+            return hit[0], "library", 0.0
+        try:
+            return await self._compose_model(traits)
+        except ComposeError:
+            if self.mode == "hybrid":
+                return rule_layout(traits), "fallback", 0.0
+            raise
+
+    def _key(self, traits: dict) -> str:
+        if self.cache is not None:
+            return trait_bucket_key(traits)
+        return "exact:" + hashlib.blake2b(json.dumps(traits, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    async def _compose_model(self, traits: dict) -> tuple[dict, str, float]:
+        key = self._key(traits)
+        while (leader := self._inflight.get(key)) is not None:
+            try:
+                schema, _, model_ms = await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled():
+                    raise  # this request was cancelled, not the leader
+                # The leader's client went away; the first follower to get here takes over
+                continue
+            self.counters["coalesced"] += 1
+            return schema, "coalesced", model_ms
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_model(key, traits)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved here so unawaited failures aren't logged
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _call_model(self, key: str, traits: dict) -> tuple[dict, str, float]:
+        if self.cache is not None:
+            schema = await asyncio.to_thread(self.cache.get, key)
+            if schema is not None:
+                return schema, "cache", 0.0
+        async with self._slots:
+            self.counters["model_calls"] += 1
+            t0 = time.perf_counter()
+            try:
+                schema = await asyncio.to_thread(generate_valid_schema, self.client, traits, self.model, False)
+            except Exception as exc:  # noqa: BLE001
+                raise ComposeError(HTTPStatus.BAD_GATEWAY, f"model call failed: {type(exc).__name__}: {exc}") from exc
+            model_ms = (time.perf_counter() - t0) * 1000
+        if not validate_schema(schema, verbose=False):
+            raise ComposeError(HTTPStatus.BAD_GATEWAY, "model returned a schema that could not be repaired")
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, key, schema)
+        return schema, "llm", model_ms
+
+    # ------- HTTP -------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT_S)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    return
+                keep_alive = await self._handle_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        t0 = time.perf_counter()
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request line"}, keep_alive=False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "bad Content-Length"}, keep_alive=False)
+            return False
+        if length < 0:
+            self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "bad Content-Length"}, keep_alive=False)
+            return False
+        if length > MAX_BODY_BYTES:
+            self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, keep_alive=False)
+            return False
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), KEEPALIVE_TIMEOUT_S) if length else b""
+        except asyncio.TimeoutError:
+            self._respond(writer, HTTPStatus.REQUEST_TIMEOUT, {"error": "body not received in time"}, keep_alive=False)
+            return False
+
+        path, _, query = target.partition("?")
+        if path == "/healthz" and method == "GET":
+            self._respond(writer, HTTPStatus.OK, {"ok": True, "mode": self.mode, **self.counters}, keep_alive)
+            return keep_alive
+        if path != "/compose":
+            self._respond(writer, HTTPStatus.NOT_FOUND, {"error": f"no route {path}"}, keep_alive)
+            return keep_alive
+        if method != "POST":
+            self._respond(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}, keep_alive)
+            return keep_alive
+
+        self.counters["requests"] += 1
+        try:
+            try:
+                payload = json.loads(body or b"null")
+            except json.JSONDecodeError as exc:
+                raise ComposeError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {exc}") from exc
+            traits = payload.get("traits", payload) if isinstance(payload, dict) else None
+            if not isinstance(traits, dict):
+                raise ComposeError(HTTPStatus.BAD_REQUEST, "expected a traits object")
+            if "stream=1" in query.split("&"):
+                await self._stream(traits, writer, keep_alive, t0)
+                return keep_alive
+            schema, source, model_ms = await self.compose(traits)
+        except ComposeError as exc:
+            self.counters["errors"] += 1
+            self._respond(writer, exc.status, {"error": str(exc)}, keep_alive, _timing(t0))
+            return keep_alive
+        except Exception as exc:  # noqa: BLE001
+            self.counters["errors"] += 1
+            print(f"❌ /compose failed: {type(exc).__name__}: {exc}", file=sys.stderr)
+            self._respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, keep_alive, _timing(t0))
+            return keep_alive
+
+        timing = _timing(t0) + (f", model;dur={model_ms:.1f}" if model_ms else "")
+        self._respond(writer, HTTPStatus.OK, schema, keep_alive, timing, {"X-Compose-Source": source})
+        return keep_alive
+
+    async def _stream(self, traits: dict, writer: asyncio.StreamWriter, keep_alive: bool, t0: float) -> None:
+        head = (
+            "HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+            f"Transfer-Encoding: chunked\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1"))
+        first_ms = None
+
+        async def send(record: dict) -> None:
+            nonlocal first_ms
+            if record["type"] == "section" and first_ms is None:
+                first_ms = (time.perf_counter() - t0) * 1000
+            data = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+            await writer.drain()
+
+        source, error = await self._stream_sections(traits, send)
+        done = {"type": "done", "source": source, "ttfsMs": round(first_ms or 0, 1)}
+        done["totalMs"] = round((time.perf_counter() - t0) * 1000, 1)
+        if error:
+            self.counters["errors"] += 1
+            done["error"] = error
+        await send(done)
+        writer.write(b"0\r\n\r\n")
+
+    async def _stream_sections(self, traits: dict, send) -> tuple[str, str | None]:
+        """Send section records; returns (source, error message or None)."""
+        schema, source = None, "llm"
+        if self.mode == "rules" or (self.mode == "hybrid" and rule_confidence(traits)[0] >= HYBRID_MIN_CONFIDENCE):
+            schema, source = rule_layout(traits), "rules"
+        elif self.library is not None and (hit := self.library.lookup(traits)) is not None:
+            schema, source = hit[0], "library"
+        elif self.cache is not None:
+            schema = await asyncio.to_thread(self.cache.get, trait_bucket_key(traits))
+            source = "cache" if schema is not None else source
+        if schema is not None:
+            for section in schema["sections"]:
+                await send({"type": "section", "section": section})
+            return source, None
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def run() -> tuple[dict, dict]:
+            try:
+                return stream_schema(
+                    self.client, traits, self.model, lambda section, _: loop.call_soon_threadsafe(queue.put_nowait, section)
+                )
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        sent = 0
+        async with self._slots:
+            self.counters["model_calls"] += 1
+            task = asyncio.ensure_future(asyncio.to_thread(run))
+            while (section := await queue.get()) is not done:
+                await send({"type": "section", "section": section})
+                sent += 1
+            try:
+                schema, _ = await task
+            except Exception as exc:  # noqa: BLE001
+                if self.mode == "hybrid" and not sent:
+                    for section in rule_layout(traits)["sections"]:
+                        await send({"type": "section", "section": section})
+                    return "fallback", None
+                return source, f"model stream failed: {type(exc).__name__}: {exc}"
+        if self.cache is not None and validate_schema(schema, verbose=False):
+            await asyncio.to_thread(self.cache.put, trait_bucket_key(traits), schema)
+        return source, None
+
+    @staticmethod
+    def _respond(
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: dict,
+        keep_alive: bool,
+        server_timing: str | None = None,
+        extra_headers: dict[str, str] | None = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(extra_headers or {}),
+        }
+        if server_timing:
+            headers["Server-Timing"] = server_timing
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+
+def _timing(t0: float) -> str:
+    return f"total;dur={(time.perf_counter() - t0) * 1000:.1f}"
+
+
+async def serve(host: str, port: int, service: ComposeService) -> None:
+    service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"✓ Compose service ({service.mode} mode, {service.model}) listening on http://{host}:{port}/compose")
+    async with server:
+        await server.serve_forever()
+
+
+def run_service(
+    bind: str, model: str, mode: str, cache: SchemaCache | None, concurrency: int, library: LayoutLibrary | None = None
+) -> None:
+    """Entry point for ``genui_llm_composer.py --serve``; blocks until interrupted."""
+    host, _, port = bind.rpartition(":")
+    try:
+        asyncio.run(serve(host or "127.0.0.1", int(port), ComposeService(model, mode, cache, concurrency, library)))
+    except KeyboardInterrupt:
+        print("\nStopped", file=sys.stderr)
@@ -0,0 +1,340 @@
+"""
+Derive user traits for many users at once from exported event logs.
+
+Vectorized port of ``deriveTraits`` (``lib/analytics/derive.ts``): every user's
+event array is loaded into one set of columnar NumPy arrays (type codes,
+timestamps, action/journey codes, interned paths and search terms) and each trait
+is computed for all users in a single pass instead of one filter per trait per
+user. Semantics follow the TS version exactly: the 30-day window, 7-day searches,
+exp(-ageDays/7) action ranking with ties in first-seen order, first-seen term
+order for equal search counts, and the last-10-views lastPaths rule. The one
+deliberate difference: an action whose name isn't an ActionId still counts
+towards the affinity denominators but is never ranked into topActions.
+
+The output is what the composer's batch mode reads, so the two chain directly:
+
+Usage:
+    python scripts/genui_derive_traits.py --events-dir EXPORTS_DIR --output-jsonl traits.jsonl
+    python scripts/genui_llm_composer.py --mode hybrid --traits-jsonl traits.jsonl --output-dir schemas/
+
+Each export is either a bare event array or {"events": [...], "preferences": {...}};
+JSONL lines carry {"userId": ..., "events": [...], "preferences": {...}}.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# Mirrors lib/analytics/events.ts and storage.ts
+EVENT_TYPES = ("view", "time", "scroll", "click", "action", "search", "journey", "balance_seen")
+ACTION_IDS = ("TRANSFER", "PAY_BILL", "FX", "OPEN_SAVINGS")
+JOURNEY_IDS = (
+    "BILLPAY_STARTED",
+    "BILLPAY_CANCELLED",
+    "BILLPAY_COMPLETED",
+    "TRANSFER_STARTED",
+    "TRANSFER_COMPLETED",
+    "TRANSFER_CANCELLED",
+)
+MAX_EVENTS = 1000
+
+ONE_DAY_MS = 24 * 60 * 60 * 1000
+SEVEN_DAYS_MS = 7 * ONE_DAY_MS
+RECENT_WINDOW_MS = 30 * ONE_DAY_MS
+
+TYPE_CODE = {name: i for i, name in enumerate(EVENT_TYPES)}
+ACTION_CODE = {name: i for i, name in enumerate(ACTION_IDS)}
+JOURNEY_CODE = {name: i for i, name in enumerate(JOURNEY_IDS)}
+VIEW, ACTION, SEARCH, JOURNEY, BALANCE_SEEN = (TYPE_CODE[t] for t in ("view", "action", "search", "journey", "balance_seen"))
+FX, TRANSFER = ACTION_CODE["FX"], ACTION_CODE["TRANSFER"]
+BILLPAY_STARTED, BILLPAY_COMPLETED = JOURNEY_CODE["BILLPAY_STARTED"], JOURNEY_CODE["BILLPAY_COMPLETED"]
+
+DEFAULT_CHUNK_USERS = 5000
+
+
+@dataclass
+class EventColumns:
+    """All users' events as parallel arrays, grouped by user in original event order.
+
+    Codes are -1 where the column does not apply to the event type.
+    """
+
+    user_ids: list[str]
+    preferences: list[dict]
+    user: np.ndarray  # int32 index into user_ids
+    kind: np.ndarray  # int8 EVENT_TYPES code
+    ts: np.ndarray  # float64 epoch ms (JS numbers)
+    action: np.ndarray  # int8 ACTION_IDS code
+    journey: np.ndarray  # int8 JOURNEY_IDS code
+    path: np.ndarray  # int32 index into paths (view events)
+    term: np.ndarray  # int32 index into terms (search events)
+    paths: list[str | None]  # None for a view without "path", like undefined in the TS Set
+    terms: list[str | None]
+
+    @classmethod
+    def from_users(cls, users: Iterable[tuple[str, list[dict], dict]]) -> EventColumns:
+        """Intern and pack (user_id, events, preferences) triples, keeping the last MAX_EVENTS per user."""
+        user_ids: list[str] = []
+        preferences: list[dict] = []
+        path_ids: dict[str, int] = {}
+        term_ids: dict[str, int] = {}
+        cols: dict[str, list] = {k: [] for k in ("user", "kind", "ts", "action", "journey", "path", "term")}
+        for user_id, events, prefs in users:
+            u = len(user_ids)
+            user_ids.append(user_id)
+            preferences.append(prefs)
+            for e in events[-MAX_EVENTS:]:
+                kind = TYPE_CODE.get(e.get("type"), -1)
+                cols["user"].append(u)
+                cols["kind"].append(kind)
+                cols["ts"].append(e.get("timestamp", 0))
+                cols["action"].append(ACTION_CODE.get(e.get("name"), -1) if kind == ACTION else -1)
+                cols["journey"].append(JOURNEY_CODE.get(e.get("id"), -1) if kind == JOURNEY else -1)
+                cols["path"].append(path_ids.setdefault(e.get("path"), len(path_ids)) if kind == VIEW else -1)
+                cols["term"].append(term_ids.setdefault(e.get("term"), len(term_ids)) if kind == SEARCH else -1)
+        return cls(
+            user_ids=user_ids,
+            preferences=preferences,
+            user=np.array(cols["user"], dtype=np.int32),
+            kind=np.array(cols["kind"], dtype=np.int8),
+            ts=np.array(cols["ts"], dtype=np.float64),
+            action=np.array(cols["action"], dtype=np.int8),
+            journey=np.array(cols["journey"], dtype=np.int8),
+            path=np.array(cols["path"], dtype=np.int32),
+            term=np.array(cols["term"], dtype=np.int32),
+            paths=list(path_ids),
+            terms=list(term_ids),
+        )
+
+
+def _group_rank(groups: np.ndarray) -> np.ndarray:
+    """0-based position of each element within its run of equal (sorted) group values."""
+    n = len(groups)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    return np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+
+def _split_by_user(users: np.ndarray, values: np.ndarray, n_users: int) -> list[np.ndarray]:
+    """Split values (sorted by user) into one array per user index."""
+    bounds = np.searchsorted(users, np.arange(1, n_users))
+    return np.split(values, bounds)
+
+
+def derive_traits_batch(cols: EventColumns, now_ms: float) -> list[dict]:
+    """Compute UserTraits for every user in ``cols`` as of ``now_ms``; same order as cols.user_ids."""
+    n_users = len(cols.user_ids)
+    idx = np.arange(len(cols.kind))
+    age = now_ms - cols.ts
+    recent = age < RECENT_WINDOW_MS
+
+    # Affinities
+    is_action = recent & (cols.kind == ACTION)
+    total_actions = np.maximum(np.bincount(cols.user[is_action], minlength=n_users), 1)
+    fx_count = np.bincount(cols.user[is_action & (cols.action == FX)], minlength=n_users)
+    transfer_count = np.bincount(cols.user[is_action & (cols.action == TRANSFER)], minlength=n_users)
+    fx_affinity = np.minimum(fx_count / total_actions, 1)
+    transfer_affinity = np.minimum(transfer_count / total_actions, 1)
+
+    # Explorer score: distinct recent view paths / 10
+    is_view = recent & (cols.kind == VIEW)
+    n_paths = max(len(cols.paths), 1)
+    view_user, view_path = cols.user[is_view].astype(np.int64), cols.path[is_view].astype(np.int64)
+    distinct = np.unique(view_user * n_paths + view_path)
+    explorer_score = np.minimum(np.bincount(distinct // n_paths, minlength=n_users) / 10, 1)
+
+    # lastPaths: distinct paths of the last 10 recent views in first-seen order, reversed, first 5
+    from_end = np.bincount(view_user, minlength=n_users)[view_user] - 1 - _group_rank(view_user)
+    tail = from_end < 10
+    tail_keys = view_user[tail] * n_paths + view_path[tail]
+    keys, first = np.unique(tail_keys, return_index=True)
+    order = np.lexsort((-first, keys // n_paths))
+    last_users, last_paths = keys[order] // n_paths, keys[order] % n_paths
+    keep = _group_rank(last_users) < 5
+    last_paths_by_user = _split_by_user(last_users[keep], last_paths[keep], n_users)
+
+    # topActions: recency-weighted counts, ties in first-seen order. Unknown action names still count
+    # towards total_actions (as in the TS version) but have no ActionId slot to rank in
+    n_actions = len(ACTION_IDS)
+    is_ranked = is_action & (cols.action >= 0)
+    action_keys = cols.user[is_ranked].astype(np.int64) * n_actions + cols.action[is_ranked]
+    weights = np.exp(-(age[is_ranked] / ONE_DAY_MS) / 7)
+    score = np.bincount(action_keys, weights=weights, minlength=n_users * n_actions).reshape(n_users, n_actions)
+    seen = np.bincount(action_keys, minlength=n_users * n_actions).reshape(n_users, n_actions) > 0
+    first_seen = np.full(n_users * n_actions, len(idx), dtype=np.int64)
+    np.minimum.at(first_seen, action_keys, idx[is_ranked])
+    first_seen = first_seen.reshape(n_users, n_actions)
+    ranked = np.lexsort((first_seen, np.where(seen, -score, np.inf)), axis=1)[:, :3]
+    ranked_seen = np.take_along_axis(seen, ranked, axis=1)
+
+    # searchTerms: last 7 days, count desc (first-seen order on ties), top 10
+    is_search = (cols.kind == SEARCH) & (age < SEVEN_DAYS_MS)
+    n_terms = max(len(cols.terms), 1)
+    search_keys = cols.user[is_search].astype(np.int64) * n_terms + cols.term[is_search]
+    term_keys, term_first, term_inverse, term_counts = np.unique(
+        search_keys, return_index=True, return_inverse=True, return_counts=True
+    )
+    term_last_seen = np.zeros(len(term_keys))
+    np.maximum.at(term_last_seen, term_inverse, cols.ts[is_search])
+    order = np.lexsort((term_first, -term_counts, term_keys // n_terms))
+    term_users = term_keys[order] // n_terms
+    keep = _group_rank(term_users) < 10
+    term_rows = np.stack([term_keys[order] % n_terms, term_counts[order], term_last_seen[order]], axis=1)[keep]
+    terms_by_user = _split_by_user(term_users[keep], term_rows, n_users)
+
+    # incompleteBillPay: first recent start, no recent completion, started < 1 day ago
+    is_journey = recent & (cols.kind == JOURNEY)
+    started_mask = is_journey & (cols.journey == BILLPAY_STARTED)
+    started_users, started_first = np.unique(cols.user[started_mask], return_index=True)
+    started_ts = np.full(n_users, np.nan)
+    started_ts[started_users] = cols.ts[started_mask][started_first]
+    completed = np.zeros(n_users, dtype=bool)
+    completed[cols.user[is_journey & (cols.journey == BILLPAY_COMPLETED)]] = True
+    incomplete = ~np.isnan(started_ts) & ~completed & (now_ms - started_ts < ONE_DAY_MS)
+
+    # lastBalanceSeen: last recent balance_seen in event order
+    is_balance = recent & (cols.kind == BALANCE_SEEN)
+    last_balance = np.full(n_users, -1, dtype=np.int64)
+    np.maximum.at(last_balance, cols.user[is_balance], idx[is_balance])
+
+    traits: list[dict] = []
+    for u in range(n_users):
+        prefs = cols.preferences[u] or {}
+        traits.append(
+            {
+                "fxAffinity": float(fx_affinity[u]),
+                "transferAffinity": float(transfer_affinity[u]),
+                "explorerScore": float(explorer_score[u]),
+                "lastPaths": [cols.paths[p] for p in last_paths_by_user[u]],
+                "topActions": [ACTION_IDS[a] for a, ok in zip(ranked[u], ranked_seen[u]) if ok],
+                "lastBalanceSeen": _js_number(cols.ts[last_balance[u]]) if last_balance[u] >= 0 else None,
+                "searchTerms": [
+                    {"term": cols.terms[int(t)], "count": int(c), "lastSeen": _js_number(s)}
+                    for t, c, s in terms_by_user[u]
+                ],
+                "incompleteBillPay": {"started": _js_number(started_ts[u])} if incomplete[u] else None,
+                "locale": prefs.get("locale") or "en",
+                "prefersDense": prefs.get("prefersDense") if prefs.get("prefersDense") is not None else False,
+                "darkMode": prefs.get("darkMode") if prefs.get("darkMode") is not None else False,
+                "favoriteQuickActions": [],
+                "suppressions": {},
+            }
+        )
+    return traits
+
+
+def _js_number(value: float) -> int | float:
+    """Timestamps come back as floats; keep integral ones as ints like JSON.stringify does."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def iter_event_exports(events_dir: Path | None, events_jsonl: Path | None) -> Iterator[tuple[str, list[dict], dict]]:
+    """Yield (user_id, events, preferences) from a directory of *.json exports or a JSONL file."""
+    if events_dir is not None:
+        for path in sorted(events_dir.glob("*.json")):
+            with open(path) as f:
+                record = json.load(f)
+            if isinstance(record, list):
+                yield path.stem, record, {}
+            else:
+                yield path.stem, record.get("events", []), record.get("preferences") or {}
+    if events_jsonl is not None:
+        with open(events_jsonl) as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield str(record.get("userId") or line_no), record.get("events", []), record.get("preferences") or {}
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    chunk: list = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Derive UserTraits for a cohort of exported event logs")
+    parser.add_argument("--events-dir", type=Path, help="Directory of per-user <userId>.json event exports")
+    parser.add_argument("--events-jsonl", type=Path, help="JSONL file with one {userId, events} record per line")
+    parser.add_argument("--output-dir", type=Path, help="Write one <userId>.json traits file per user here")
+    parser.add_argument(
+        "--output-jsonl", type=Path, help="Write {userId, traits} records (composer --traits-jsonl input)"
+    )
+    parser.add_argument(
+        "--now",
+        type=float,
+        help="Reference time in epoch ms for the recency windows (default: current time)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_USERS,
+        help=f"Users per vectorized pass, bounds memory (default: {DEFAULT_CHUNK_USERS})",
+    )
+    args = parser.parse_args()
+
+    if args.events_dir is None and args.events_jsonl is None:
+        parser.error("provide --events-dir or --events-jsonl")
+    if args.output_dir is None and args.output_jsonl is None:
+        parser.error("provide --output-dir or --output-jsonl")
+
+    now_ms = args.now if args.now is not None else time.time() * 1000
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    jsonl_out = None
+    if args.output_jsonl is not None:
+        args.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        jsonl_out = open(args.output_jsonl, "w")
+
+    users = events = 0
+    load_s = derive_s = 0.0
+    try:
+        for chunk in _chunks(iter_event_exports(args.events_dir, args.events_jsonl), args.chunk_size):
+            t0 = time.perf_counter()
+            cols = EventColumns.from_users(chunk)
+            t1 = time.perf_counter()
+            traits = derive_traits_batch(cols, now_ms)
+            derive_s += time.perf_counter() - t1
+            load_s += t1 - t0
+            users += len(cols.user_ids)
+            events += len(cols.kind)
+            for user_id, user_traits in zip(cols.user_ids, traits):
+                if args.output_dir is not None:
+                    safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", user_id)
+                    with open(args.output_dir / f"{safe_id}.json", "w") as f:
+                        json.dump(user_traits, f, indent=2, ensure_ascii=False)
+                if jsonl_out is not None:
+                    jsonl_out.write(json.dumps({"userId": user_id, "traits": user_traits}, ensure_ascii=False) + "\n")
+    finally:
+        if jsonl_out is not None:
+            jsonl_out.close()
+
+    if users == 0:
+        print("❌ No event exports found", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"✅ Derived traits for {users} users ({events} events): load {load_s:.2f}s, "
+        f"derive {derive_s:.2f}s ({users / max(derive_s, 1e-9):,.0f} users/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Offline layout library: a UISchema precomputed for every cell of a grid over the trait space.
+
+Most users have similar trait vectors, so rather than calling the model per user,
+``precompute`` enumerates a grid over the signals the composer reacts to:
+
+    fx / transfer / explorer affinity band (AFFINITY_THRESHOLDS: 3 levels each)
+    ranked top-action prefix (every permutation up to --top-depth actions, at most
+    BUCKET_TOP_ACTIONS since trait_bucket keeps no more)
+    locale (en/tr), prefersDense, open bill-pay journey, /payments/utilities visited
+
+It composes and validates one schema per cell (packed calls, see
+genui_packed_composer) and writes a gzip'd JSON library: each distinct schema
+once, plus a dense uint16 lookup table indexed by the cell's mixed-radix code.
+
+At runtime ``LayoutLibrary.lookup`` quantizes traits exactly like
+``trait_bucket``, reads the cell's schema from the table or takes the nearest
+populated cell within ``radius`` affinity steps (all other dimensions must
+match), and returns None outside the library's coverage: signals the grid does
+not model (savings or offers paths, "exchange" searches), a top-action list
+longer than the grid's depth, or no populated cell near enough. The composer
+then generates live. Lists longer than BUCKET_TOP_ACTIONS are cut to that
+prefix first, like everywhere trait_bucket is used, so at the maximum depth
+they are served the prefix's cell rather than sent out of coverage.
+
+Usage:
+    python scripts/genui_layout_library.py --output layouts.lib.gz [--top-depth 3] [--pack 8] [--concurrency 8]
+    python scripts/genui_layout_library.py --output layouts.lib.gz --resume
+    python scripts/genui_layout_library.py --inspect layouts.lib.gz
+    python scripts/genui_llm_composer.py --library layouts.lib.gz --traits-dir exports/ --output-dir schemas/
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import json
+import sys
+import time
+from array import array
+from itertools import permutations, product
+from pathlib import Path
+from typing import Iterator
+
+from genui_compose_core import (
+    AFFINITY_THRESHOLDS,
+    BUCKET_TOP_ACTIONS,
+    BUCKET_VERSION,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MODEL,
+    build_client,
+    trait_bucket,
+    validate_schema,
+)
+
+LIBRARY_FORMAT = "genui-layout-library/1"
+ACTION_ORDER = ("TRANSFER", "PAY_BILL", "FX", "OPEN_SAVINGS")
+DEFAULT_TOP_DEPTH = 3
+DEFAULT_RADIUS = 1
+DEFAULT_PACK = 8
+EMPTY = 0xFFFF  # table value for a cell without a schema
+
+# One representative value inside each affinity band: (0, 0.3], (0.3, 0.4], (0.4, 1]
+_bounds = (0.0, *AFFINITY_THRESHOLDS, 1.0)
+LEVEL_VALUES = tuple(round((lo + hi) / 2, 3) for lo, hi in zip(_bounds, _bounds[1:]))
+
+
+def top_action_prefixes(depth: int) -> list[tuple[str, ...]]:
+    """Every ranked top-action list of length 0..depth, in a fixed order."""
+    return [p for n in range(depth + 1) for p in permutations(ACTION_ORDER, n)]
+
+
+class Grid:
+    """Mixed-radix cell coding for one top-action depth."""
+
+    def __init__(self, top_depth: int):
+        if not 0 <= top_depth <= BUCKET_TOP_ACTIONS:
+            # Deeper cells could never be looked up: trait_bucket keeps only the first BUCKET_TOP_ACTIONS
+            raise ValueError(f"top-action depth must be 0..{BUCKET_TOP_ACTIONS}, got {top_depth}")
+        self.top_depth = top_depth
+        self.tops = top_action_prefixes(top_depth)
+        self.top_index = {top: i for i, top in enumerate(self.tops)}
+        levels = len(LEVEL_VALUES)
+        # fx, transfer, explorer, top, locale, prefersDense, incompleteBillPay, utilities
+        self.radices = (levels, levels, levels, len(self.tops), 2, 2, 2, 2)
+        self.size = 1
+        for radix in self.radices:
+            self.size *= radix
+
+    def encode(self, coords: tuple[int, ...]) -> int:
+        code = 0
+        for value, radix in zip(coords, self.radices):
+            code = code * radix + value
+        return code
+
+    def cells(self) -> Iterator[tuple[int, ...]]:
+        return product(*(range(radix) for radix in self.radices))
+
+    def cell_traits(self, coords: tuple[int, ...]) -> dict:
+        """Representative traits for a cell, in the exported traits shape."""
+        fx, transfer, explorer, top, locale, dense, bill_pay, utilities = coords
+        return {
+            "fxAffinity": LEVEL_VALUES[fx],
+            "transferAffinity": LEVEL_VALUES[transfer],
+            "explorerScore": LEVEL_VALUES[explorer],
+            "topActions": list(self.tops[top]),
+            "lastPaths": ["/", "/payments/utilities"] if utilities else ["/"],
+            "searchTerms": [],
+            "incompleteBillPay": {"started": 0} if bill_pay else None,
+            "locale": "tr" if locale else "en",
+            "prefersDense": bool(dense),
+            "darkMode": False,
+        }
+
+    def coords_for(self, traits: dict) -> tuple[int, ...] | None:
+        """Quantize traits to a cell (via trait_bucket); None when they fall outside the grid."""
+        bucket = trait_bucket(traits)
+        if bucket["savings"] or bucket["offers"] or bucket["exchangeSearches"]:
+            return None
+        top = self.top_index.get(tuple(bucket["topActions"]))
+        if top is None:
+            return None
+        return (
+            bucket["fx"],
+            bucket["transfer"],
+            bucket["explorer"],
+            top,
+            int(bucket["locale"] == "tr"),
+            int(bucket["prefersDense"]),
+            int(bucket["incompleteBillPay"]),
+            int(bucket["utilities"]),
+        )
+
+
+class LayoutLibrary:
+    """A loaded library file: distinct schemas plus the cell -> schema lookup table."""
+
+    def __init__(self, grid: Grid, schemas: list[dict], table: array, meta: dict, radius: int = DEFAULT_RADIUS):
+        self.grid = grid
+        self.schemas = schemas
+        self.table = table
+        self.meta = meta
+        # Affinity offsets within the radius, nearest first
+        steps = range(-radius, radius + 1)
+        self._offsets = sorted(
+            (offset for offset in product(steps, steps, steps) if sum(map(abs, offset)) <= radius),
+            key=lambda offset: sum(map(abs, offset)),
+        )
+
+    @classmethod
+    def load(cls, path: Path, radius: int = DEFAULT_RADIUS) -> LayoutLibrary:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != LIBRARY_FORMAT:
+            raise ValueError(f"{path}: not a layout library ({data.get('format')!r})")
+        if data["bucketVersion"] != BUCKET_VERSION or tuple(data["affinityThresholds"]) != AFFINITY_THRESHOLDS:
+            raise ValueError(f"{path}: built for another trait bucketing; rebuild it")
+        grid = Grid(data["topDepth"])
+        table = array("H")
+        table.frombytes(base64.b64decode(data["table"]))
+        if sys.byteorder != "little":
+            table.byteswap()
+        if len(table) != grid.size:
+            raise ValueError(f"{path}: table has {len(table)} cells, grid has {grid.size}")
+        meta = {k: v for k, v in data.items() if k not in ("schemas", "table")}
+        return cls(grid, data["schemas"], table, meta, radius)
+
+    def lookup(self, traits: dict) -> tuple[dict, int] | None:
+        """Return (schema, affinity distance to the cell used), or None outside coverage."""
+        coords = self.grid.coords_for(traits)
+        if coords is not None:
+            levels = len(LEVEL_VALUES)
+            for offset in self._offsets:
+                affinities = tuple(c + o for c, o in zip(coords[:3], offset))
+                if min(affinities) < 0 or max(affinities) >= levels:
+                    continue
+                index = self.table[self.grid.encode(affinities + coords[3:])]
+                if index != EMPTY:
+                    return self.schemas[index], sum(map(abs, offset))
+        return None
+
+    def coverage(self) -> float:
+        return sum(1 for index in self.table if index != EMPTY) / len(self.table)
+
+
+def save_library(path: Path, grid: Grid, cell_schemas: dict[int, dict], meta: dict) -> int:
+    """Write the library (distinct schemas + lookup table); returns the number of distinct schemas."""
+    schemas: list[dict] = []
+    index_of: dict[str, int] = {}
+    table = array("H", [EMPTY]) * grid.size
+    for code, schema in cell_schemas.items():
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        if canonical not in index_of:
+            if len(schemas) == EMPTY:
+                raise ValueError(f"more than {EMPTY} distinct schemas")
+            index_of[canonical] = len(schemas)
+            schemas.append(schema)
+        table[code] = index_of[canonical]
+    if sys.byteorder != "little":
+        table.byteswap()
+    data = {
+        "format": LIBRARY_FORMAT,
+        "bucketVersion": BUCKET_VERSION,
+        "affinityThresholds": list(AFFINITY_THRESHOLDS),
+        "topDepth": grid.top_depth,
+        **meta,
+        "schemas": schemas,
+        "table": base64.b64encode(table.tobytes()).decode("ascii"),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+    tmp.replace(path)
+    return len(schemas)
+
+
+def precompute(args: argparse.Namespace) -> int:
+    """Compose a schema for every grid cell not already in the library and write it."""
+    from genui_packed_composer import compose_packed
+
+    grid = Grid(args.top_depth)
+    cell_schemas: dict[int, dict] = {}
+    if args.resume and args.output.exists():
+        library = LayoutLibrary.load(args.output)
+        if library.grid.top_depth != grid.top_depth:
+            raise SystemExit(f"{args.output} was built with --top-depth {library.grid.top_depth}")
+        cell_schemas = {code: library.schemas[i] for code, i in enumerate(library.table) if i != EMPTY}
+        print(f"Resuming: {len(cell_schemas)}/{grid.size} cells already in {args.output}")
+
+    todo = [
+        (str(code), grid.cell_traits(coords))
+        for code, coords in enumerate(grid.cells())
+        if code not in cell_schemas
+    ]
+    print(f"Composing {len(todo)} of {grid.size} cells with {args.model} ({args.pack} per call, concurrency={args.concurrency})...")
+
+    clients = []
+
+    def get_client():
+        if not clients:
+            clients.append(build_client())
+        return clients[0]
+
+    failed = 0
+
+    def on_result(cell: str, schema: dict | None, error: str | None, latency: float) -> None:
+        nonlocal failed
+        if error is None and validate_schema(schema, verbose=False):
+            cell_schemas[int(cell)] = schema
+        else:
+            failed += 1
+            print(f"❌ cell {cell}: {error or 'schema failed validation'}", file=sys.stderr)
+
+    started = time.perf_counter()
+    summary = compose_packed(get_client, todo, args.model, args.pack, args.concurrency, on_result)
+    meta = {"model": args.model, "createdAt": int(time.time())}
+    distinct = save_library(args.output, grid, cell_schemas, meta)
+    print(
+        f"✅ {len(cell_schemas)}/{grid.size} cells, {distinct} distinct schemas written to {args.output} "
+        f"({args.output.stat().st_size / 1024:.0f} KB) in {time.perf_counter() - started:.1f}s, "
+        f"{summary['model_calls']} model call(s)"
+    )
+    if failed:
+        print(f"⚠️  {failed} cell(s) failed; rerun with --resume to fill them", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def inspect(path: Path) -> int:
+    library = LayoutLibrary.load(path)
+    meta = library.meta
+    print(f"{path}: {meta.get('model')} (built {time.strftime('%Y-%m-%d %H:%M', time.localtime(meta.get('createdAt', 0)))})")
+    print(f"  grid: top-depth {library.grid.top_depth}, {library.grid.size} cells, {library.coverage():.1%} populated")
+    print(f"  {len(library.schemas)} distinct schemas")
+    return 0
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Precompute a layout library over a grid of trait profiles")
+    parser.add_argument("--output", type=Path, help="Library file to write (gzip'd JSON)")
+    parser.add_argument("--inspect", type=Path, metavar="LIBRARY", help="Print a library's metadata and coverage")
+    parser.add_argument(
+        "--top-depth",
+        type=int,
+        default=DEFAULT_TOP_DEPTH,
+        choices=range(0, BUCKET_TOP_ACTIONS + 1),
+        help=f"Longest top-action list in the grid (default: {DEFAULT_TOP_DEPTH}, max: {BUCKET_TOP_ACTIONS})",
+    )
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"Azure OpenAI model deployment name (default: {DEFAULT_MODEL})")
+    parser.add_argument("--pack", type=int, default=DEFAULT_PACK, help=f"Cells per model call (default: {DEFAULT_PACK})")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum concurrent model requests (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument("--resume", action="store_true", help="Keep the cells already in --output and compose only the rest")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.pack < 1:
+        parser.error("--concurrency and --pack must be >= 1")
+
+    if args.inspect:
+        sys.exit(inspect(args.inspect))
+    if args.output is None:
+        parser.error("--output is required unless --inspect is given")
+    sys.exit(precompute(args))
+
+
+if __name__ == "__main__":
+    main()
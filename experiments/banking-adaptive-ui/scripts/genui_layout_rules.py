@@ -0,0 +1,189 @@
+"""
+Rule-based layout selection from user traits.
+
+Python port of ``lib/analytics/layout.ts`` (``chooseLayout`` and its helpers).
+The output must stay identical to the TypeScript version for the same traits, so
+keep the thresholds, section order and copy in sync when either side changes.
+
+``rule_confidence`` scores how well the rules fit a trait profile; the composer's
+``--mode hybrid`` only calls the model for profiles below ``HYBRID_MIN_CONFIDENCE``.
+"""
+
+from __future__ import annotations
+
+DEFAULT_ACTION_ORDER = ["TRANSFER", "PAY_BILL", "FX", "OPEN_SAVINGS"]
+
+ACTION_LABELS = {
+    "TRANSFER": {"en": "Transfer", "tr": "Transfer"},
+    "PAY_BILL": {"en": "Pay Bill", "tr": "Fatura Öde"},
+    "FX": {"en": "Exchange", "tr": "Döviz"},
+    "OPEN_SAVINGS": {"en": "Savings", "tr": "Tasarruf"},
+}
+
+# Every affinity threshold chooseLayout branches on
+AFFINITY_THRESHOLDS = (0.2, 0.3, 0.4, 0.5, 0.6)
+BORDERLINE_MARGIN = 0.03
+CONFLICT_MIN_AFFINITY = 0.4
+CONFLICT_MAX_GAP = 0.1
+HYBRID_MIN_CONFIDENCE = 0.7
+
+# Subset of DEFAULT_TRAITS (events.ts) that the rules read
+DEFAULT_TRAITS = {
+    "fxAffinity": 0,
+    "transferAffinity": 0,
+    "explorerScore": 0,
+    "lastPaths": [],
+    "topActions": [],
+    "searchTerms": [],
+    "incompleteBillPay": None,
+    "locale": "en",
+}
+
+
+def _traits(traits: dict) -> dict:
+    return {**DEFAULT_TRAITS, **traits}
+
+
+def _exchange_searches(traits: dict) -> int:
+    return sum(1 for s in traits["searchTerms"] if "exchange" in s.get("term", ""))
+
+
+def _visited(traits: dict, fragment: str) -> bool:
+    return any(fragment in p for p in traits["lastPaths"])
+
+
+def get_personalized_greeting(traits: dict) -> dict:
+    """Hero copy based on user behavior."""
+    t = _traits(traits)
+    tr = t["locale"] == "tr"
+    if t["explorerScore"] > 0.6 or len(t["topActions"]) >= 3:
+        return {
+            "title": "Tekrar Hoş Geldiniz!" if tr else "Welcome Back!",
+            "subtitle": "Size özel bankacılık deneyiminiz hazır" if tr else "Your personalized banking experience is ready",
+        }
+    if t["fxAffinity"] > 0.5:
+        return {
+            "title": "Döviz İşlemleriniz" if tr else "Your Currency Exchange",
+            "subtitle": "Güncel kurlar ve hızlı işlem imkanı" if tr else "Live rates and quick exchange",
+        }
+    if t["transferAffinity"] > 0.5:
+        return {
+            "title": "Hızlı Transfer" if tr else "Quick Transfer",
+            "subtitle": "En sık kullandığınız alıcılar hazır" if tr else "Your frequent recipients are ready",
+        }
+    return {
+        "title": "Hesabınıza Hoş Geldiniz" if tr else "Welcome to Your Account",
+        "subtitle": "Kişiselleştirilmiş bankacılık deneyimi" if tr else "Your personalized banking experience",
+    }
+
+
+def build_action_order(traits: dict) -> list[dict]:
+    """ActionGrid actions: utilities visitors get PAY_BILL first, else topActions, else the default order."""
+    t = _traits(traits)
+    if _visited(t, "/payments/utilities"):
+        ordered = ["PAY_BILL"] + [a for a in DEFAULT_ACTION_ORDER if a != "PAY_BILL"]
+    elif t["topActions"]:
+        top = list(t["topActions"])
+        ordered = top + [a for a in DEFAULT_ACTION_ORDER if a not in top]
+    else:
+        ordered = DEFAULT_ACTION_ORDER
+    return [{"label": ACTION_LABELS[a][t["locale"]], "actionId": a} for a in ordered]
+
+
+def should_show_fx(traits: dict) -> bool:
+    t = _traits(traits)
+    return t["fxAffinity"] > 0.2 or _exchange_searches(t) > 0
+
+
+def should_expand_fx(traits: dict) -> bool:
+    t = _traits(traits)
+    return _exchange_searches(t) >= 2 or t["fxAffinity"] > 0.4
+
+
+def should_show_offers(traits: dict) -> bool:
+    t = _traits(traits)
+    return t["explorerScore"] > 0.5 or _visited(t, "/savings") or _visited(t, "/offers")
+
+
+def choose_layout(traits: dict) -> dict:
+    """Choose layout based on user traits (same output as chooseLayout in layout.ts)."""
+    t = _traits(traits)
+    tr = t["locale"] == "tr"
+    sections: list[dict] = [{"id": "hero", "component": "HeroCard", "props": get_personalized_greeting(t)}]
+
+    if t["explorerScore"] > 0.3 or t["transferAffinity"] > 0.4:
+        sections.append({"id": "account-card", "component": "AccountCard", "props": {"accountType": "checking"}})
+
+    if t["incompleteBillPay"]:
+        sections.append({"id": "continue-billpay", "component": "ContinueBillPay", "props": {"visible": True}})
+
+    sections.append({"id": "actions", "component": "ActionGrid", "props": {"actions": build_action_order(t)}})
+
+    if t["topActions"] or t["explorerScore"] > 0.2:
+        sections.append(
+            {"id": "transactions", "component": "TransactionHistory", "props": {"compact": t["explorerScore"] < 0.5}}
+        )
+
+    if should_show_fx(t):
+        sections.append({"id": "fx-rates", "component": "FXRates", "props": {"expanded": should_expand_fx(t)}})
+
+    sections.append({"id": "balances", "component": "Balances", "props": {}})
+
+    if t["transferAffinity"] > 0.3:
+        sections.append(
+            {
+                "id": "recent-beneficiaries",
+                "component": "RecentBeneficiaries",
+                "props": {"aliases": ["John D.", "Alice M.", "Rent Payment"]},
+            }
+        )
+
+    if should_show_offers(t):
+        sections.append(
+            {
+                "id": "offers",
+                "component": "OffersCard",
+                "props": {
+                    "title": "Otomatik Tasarruf Başlat" if tr else "Set up Auto-Save",
+                    "body": (
+                        "Her ay otomatik olarak tasarruf edin ve hedeflerinize daha hızlı ulaşın"
+                        if tr
+                        else "Automatically save every month and reach your goals faster"
+                    ),
+                    "cta": {"text": "Başlat" if tr else "Get Started", "actionId": "OPEN_SAVINGS"},
+                },
+            }
+        )
+
+    return {"version": "1.0", "sections": sections}
+
+
+def rule_confidence(traits: dict) -> tuple[float, list[str]]:
+    """
+    Score (0..1) how well the fixed rules fit these traits, with the reasons it was lowered.
+
+    The rules are least trustworthy when two affinities compete for the same slot,
+    when an affinity sits right on a threshold (a tiny change flips a section), or
+    when recent navigation contradicts the ranked top actions.
+    """
+    t = _traits(traits)
+    confidence = 1.0
+    reasons: list[str] = []
+
+    fx, transfer = t["fxAffinity"], t["transferAffinity"]
+    if min(fx, transfer) >= CONFLICT_MIN_AFFINITY and abs(fx - transfer) <= CONFLICT_MAX_GAP:
+        confidence -= 0.4
+        reasons.append(f"conflicting affinities (fx {fx:.2f} vs transfer {transfer:.2f})")
+
+    for name in ("fxAffinity", "transferAffinity", "explorerScore"):
+        value = t[name]
+        near = [th for th in AFFINITY_THRESHOLDS if abs(value - th) <= BORDERLINE_MARGIN]
+        if near:
+            confidence -= 0.15
+            reasons.append(f"{name} {value:.2f} on the {near[0]} threshold")
+
+    if _visited(t, "/payments/utilities") and t["topActions"] and t["topActions"][0] != "PAY_BILL":
+        confidence -= 0.2
+        reasons.append(f"utilities visit overrides top action {t['topActions'][0]}")
+
+    return max(confidence, 0.0), reasons
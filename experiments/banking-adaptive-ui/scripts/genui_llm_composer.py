@@ -6,6 +6,14 @@ simulation) and calls GPT-5 to generate a UISchema JSON file.
 
 Usage:
     python scripts/genui_llm_composer.py [--traits-file TRAITS.json]
+    python scripts/genui_llm_composer.py --traits-dir TRAITS_DIR --output-dir SCHEMAS_DIR [--concurrency 8]
+    python scripts/genui_llm_composer.py --traits-jsonl cohort.jsonl --output-jsonl schemas.jsonl
+    python scripts/genui_llm_composer.py --mode hybrid --traits-dir TRAITS_DIR --output-dir SCHEMAS_DIR
+    python scripts/genui_llm_composer.py --traits-jsonl cohort.jsonl --output-jsonl schemas.jsonl --pack 8
+    python scripts/genui_llm_composer.py --traits-jsonl cohort.jsonl --pack-sweep 1,4,8,16
+    python scripts/genui_llm_composer.py --stream [sections.ndjson]
+    python scripts/genui_llm_composer.py --library layouts.lib.gz --traits-dir TRAITS_DIR --output-dir SCHEMAS_DIR
+    python scripts/genui_llm_composer.py --serve 127.0.0.1:8787 [--mode hybrid]
 
 If no traits file is provided, uses sample traits for demo purposes.
 """
@@ -13,203 +21,156 @@ If no traits file is provided, uses sample traits for demo purposes.
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
-import os
+import re
+import statistics
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TextIO
+
+from genui_compose_core import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MODEL,
+    PROJECT_ROOT,
+    SchemaCache,
+    build_client,
+    generate_valid_schema,
+    stream_schema,
+    trait_bucket_key,
+    validate_schema,
+)
+from genui_layout_rules import HYBRID_MIN_CONFIDENCE, rule_confidence
+from genui_schema_validator import rule_layout
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
+# openai (with pydantic) and dotenv are imported in build_client(), so --help, argument
+# errors and runs that never call the model don't pay for them at startup.
+if TYPE_CHECKING:
+    from genui_layout_library import LayoutLibrary
+    from openai import OpenAI
 
 # Paths
-SCRIPT_DIR = Path(__file__).parent
-PROJECT_ROOT = SCRIPT_DIR.parent
 OUTPUT_FILE = PROJECT_ROOT / "public" / "llm_schema.json"
 
-# Azure OpenAI configuration
-AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_ENDPOINT = os.getenv(
-    "AZURE_OPENAI_ENDPOINT",
-    "https://aoai-ep-swedencentral02.openai.azure.com/openai/v1/",
-)
-DEFAULT_MODEL = "gpt-5-mini"
-
-# System prompt with UISchema contract and rules
-SYSTEM_PROMPT = """You are a UI layout composer for a modern banking app. Your task is to generate a personalized UI schema based on user behavior and preferences.
-
-# UISchema Contract
-
-type ActionId = "TRANSFER" | "PAY_BILL" | "FX" | "OPEN_SAVINGS";
-
-type UISchema = {
-  version: "1.0",
-  sections: Array<
-    | { id: string; component: "HeroCard"; props: { title: string; subtitle?: string } }
-    | { id: string; component: "ActionGrid"; props: { actions: { label: string; actionId: ActionId }[] } }
-    | { id: string; component: "FXRates"; props: { expanded?: boolean } }
-    | { id: string; component: "Balances"; props: {} }
-    | { id: string; component: "OffersCard"; props: { title: string; body: string; cta?: { text: string; actionId: ActionId } } }
-    | { id: string; component: "RecentBeneficiaries"; props: { aliases: string[] } }
-    | { id: string; component: "ContinueBillPay"; props: { visible: boolean } }
-  >;
-};
-
-# Constraints
-
-1. JSON only, ≤5 sections
-2. Always include "Balances" and "ActionGrid" components
-3. Only use allowlisted ActionIds: TRANSFER, PAY_BILL, FX, OPEN_SAVINGS
-4. Locale: if TR → use Turkish copy; else English
-5. Neutral copy (no fees/rates/APR/claims), no PII
-6. Aliases only for beneficiaries (e.g., "Alias-A", "Alias-B")
-
-# Layout Rules
-
-1. If fxAffinity > 0.4 → include FXRates near top; expanded=true if "exchange" searched ≥2× in last 7 days
-2. If transferAffinity > 0.4 → prioritize TRANSFER or PAY_BILL based on topActions
-3. If lastPaths contains /payments/utilities → PAY_BILL first in ActionGrid
-4. If aliases exist → include RecentBeneficiaries with 2–3 masked strings
-5. If explorerScore high or Savings dwell detected → include OffersCard (Auto-Save) with OPEN_SAVINGS CTA
-6. If incompleteBillPay → include ContinueBillPay with visible=true
-7. Respect prefersDense; keep copy concise
-8. Obey locale (TR/EN)
-
-# Self-Check
-
-Before returning:
-- Valid JSON?
-- ≤5 sections?
-- Includes Balances and ActionGrid?
-- All ActionIds from allowlist?
-- Locale matches user?
-- No PII or hard-coded rates?
-
-Return JSON only, no markdown."""
-
-
-def build_user_prompt(traits: dict) -> str:
-    """Build user prompt from traits."""
-    behavior = {
-        "fxAffinity": traits.get("fxAffinity", 0),
-        "transferAffinity": traits.get("transferAffinity", 0),
-        "explorerScore": traits.get("explorerScore", 0),
-        "topActions": traits.get("topActions", []),
-        "lastPaths": traits.get("lastPaths", []),
-        "searchTerms": traits.get("searchTerms", [])[:5],  # top 5
-        "incompleteBillPay": traits.get("incompleteBillPay"),
-    }
-
-    prefs = {
-        "locale": traits.get("locale", "en"),
-        "prefersDense": traits.get("prefersDense", False),
-        "darkMode": traits.get("darkMode", False),
-    }
-
-    return f"""Generate a personalized UI schema for this user:
+MODES = ("llm", "rules", "hybrid")
 
-# User Traits
-{json.dumps(behavior, indent=2)}
-
-# User Preferences
-{json.dumps(prefs, indent=2)}
-
-Return a valid UISchema JSON object following all constraints and rules."""
-
-
-def build_client() -> OpenAI:
-    """Build Azure OpenAI client."""
-    if not AZURE_OPENAI_API_KEY:
-        raise RuntimeError("AZURE_OPENAI_API_KEY must be set in environment")
-
-    return OpenAI(
-        api_key=AZURE_OPENAI_API_KEY,
-        base_url=AZURE_OPENAI_ENDPOINT,
-    )
 
+def build_cache(args: argparse.Namespace) -> SchemaCache | None:
+    if args.no_cache:
+        return None
+    return SchemaCache(args.cache_dir, max_entries=args.cache_size)
 
-def generate_schema(client: OpenAI, traits: dict, model: str) -> dict:
-    """Call GPT-5 to generate UI schema using Responses API."""
-    user_prompt = build_user_prompt(traits)
-    full_input = f"{SYSTEM_PROMPT}\n\n{user_prompt}"
 
-    print(f"Calling Azure OpenAI {model} via responses.create()...")
-    print(f"Input length: {len(full_input)} chars")
+def load_library(args: argparse.Namespace) -> LayoutLibrary | None:
+    if args.library is None:
+        return None
+    from genui_layout_library import LayoutLibrary
 
     try:
-        # Call responses.create() API as per analyze_startups pattern
-        response = client.responses.create(
-            model=model,
-            input=full_input,
-        )
-
-        # Extract text from response - try multiple paths
-        output_text = None
-        
-        # Try output_text attribute first
-        if hasattr(response, "output_text") and response.output_text:
-            output_text = response.output_text
-        # Try output attribute
-        elif hasattr(response, "output") and response.output:
-            output_text = response.output
-        # Try choices path (fallback for different API versions)
-        elif hasattr(response, "choices") and len(response.choices) > 0:
-            choice = response.choices[0]
-            if hasattr(choice, "message") and hasattr(choice.message, "content"):
-                output_text = choice.message.content
-            elif hasattr(choice, "text"):
-                output_text = choice.text
-
-        if not output_text:
-            raise RuntimeError(f"Could not extract text from response: {response}")
-
-        print(f"✓ Response received ({len(output_text)} chars)")
-
-        # Clean up response (remove markdown code blocks if present)
-        output_text = output_text.strip()
-        if output_text.startswith("```json"):
-            output_text = output_text[7:]
-        if output_text.startswith("```"):
-            output_text = output_text[3:]
-        if output_text.endswith("```"):
-            output_text = output_text[:-3]
-        output_text = output_text.strip()
-
-        # Parse JSON
-        schema = json.loads(output_text)
-        print("✓ JSON parsed successfully")
-        return schema
-
-    except json.JSONDecodeError as e:
-        print(f"❌ Failed to parse JSON: {e}", file=sys.stderr)
-        print(f"Response preview: {output_text[:500] if output_text else 'None'}", file=sys.stderr)
-        raise
-    except Exception as e:
-        print(f"❌ API call failed: {e}", file=sys.stderr)
-        raise
-
-
-def validate_schema(schema: dict) -> bool:
-    """Basic validation of generated schema."""
-    if schema.get("version") != "1.0":
-        print("❌ Invalid version", file=sys.stderr)
-        return False
-
-    sections = schema.get("sections", [])
-    if not sections or len(sections) > 5:
-        print(f"❌ Invalid section count: {len(sections)}", file=sys.stderr)
-        return False
+        library = LayoutLibrary.load(args.library, radius=args.library_radius)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"❌ Could not load layout library: {exc}")
+    print(f"✓ Layout library {args.library}: {len(library.schemas)} schemas, {library.coverage():.0%} of cells populated")
+    return library
+
+
+def cached_generate(
+    get_client: Callable[[], OpenAI], traits: dict, model: str, cache: SchemaCache | None, verbose: bool = True
+) -> dict:
+    """generate_valid_schema behind the trait-bucket cache; the client is only built on a miss."""
+    if cache is None:
+        return generate_valid_schema(get_client(), traits, model, verbose=verbose)
+    key = trait_bucket_key(traits)
+    schema, was_cached = cache.get_or_compute(
+        key,
+        lambda: generate_valid_schema(get_client(), traits, model, verbose=verbose),
+        lambda sc: validate_schema(sc, verbose=False),
+    )
+    if verbose and was_cached:
+        print(f"✓ Schema served from cache (bucket {key})")
+    return schema
+
+
+def stream_generate(
+    get_client: Callable[[], OpenAI],
+    traits: dict,
+    model: str,
+    cache: SchemaCache | None,
+    out: TextIO,
+    library: LayoutLibrary | None = None,
+) -> dict:
+    """stream_schema to NDJSON: one {"type": "section"} line per section as it closes, then a {"type": "done"} line.
+
+    A layout-library or cache hit is emitted at once; a streamed schema is cached once complete.
+    """
+    t0 = time.perf_counter()
+    key = trait_bucket_key(traits) if cache is not None else None
+    hit = library.lookup(traits) if library is not None else None
+    if hit is not None:
+        schema, served_by = hit[0], "library"
+    else:
+        schema, served_by = (cache.get(key) if cache is not None else None), "cached"
 
-    # Check for required components
-    components = [s.get("component") for s in sections]
-    if "Balances" not in components or "ActionGrid" not in components:
-        print("❌ Missing required components (Balances, ActionGrid)", file=sys.stderr)
-        return False
+    def on_section(section: dict, elapsed_s: float) -> None:
+        record = {"type": "section", "elapsedMs": round(elapsed_s * 1000, 1), "section": section}
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
 
-    print("✅ Schema validation passed")
-    return True
+    if schema is not None:
+        for section in schema["sections"]:
+            on_section(section, time.perf_counter() - t0)
+        stats = {"ttfsMs": round((time.perf_counter() - t0) * 1000, 1), "fixes": [], served_by: True}
+    else:
+        print(f"Streaming {model} response...")
+        schema, stats = stream_schema(get_client(), traits, model, on_section)
+        if cache is not None and validate_schema(schema, verbose=False):
+            cache.put(key, schema)
+    stats["totalMs"] = round((time.perf_counter() - t0) * 1000, 1)
+    out.write(json.dumps({"type": "done", **stats}, ensure_ascii=False) + "\n")
+    out.flush()
+    print(f"✓ First section after {stats['ttfsMs']:.0f} ms, complete after {stats['totalMs']:.0f} ms")
+    return schema
+
+
+def compose_for_mode(
+    mode: str,
+    get_client: Callable[[], OpenAI],
+    traits: dict,
+    model: str,
+    cache: SchemaCache | None,
+    library: LayoutLibrary | None = None,
+) -> tuple[dict, str]:
+    """Compose one schema in batch mode; returns (schema, source) with source rules/library/llm/fallback.
+
+    ``hybrid`` answers from the rule engine unless rule_confidence is below
+    HYBRID_MIN_CONFIDENCE, and falls back to the rules if the model call fails.
+    A user the layout library covers is served from it instead of the model.
+    Only model output is run through validate_schema; rule layouts come from
+    rule_layout, which caps chooseLayout's up to 9 sections to the validator's limit.
+    """
+    if mode == "rules":
+        return rule_layout(traits), "rules"
+    if mode == "hybrid" and rule_confidence(traits)[0] >= HYBRID_MIN_CONFIDENCE:
+        return rule_layout(traits), "rules"
+    if library is not None and (hit := library.lookup(traits)) is not None:
+        return hit[0], "library"
+    if mode == "hybrid":
+        try:
+            schema = cached_generate(get_client, traits, model, cache, verbose=False)
+        except Exception:  # noqa: BLE001
+            return rule_layout(traits), "fallback"
+        if not validate_schema(schema, verbose=False):
+            return rule_layout(traits), "fallback"
+        return schema, "llm"
+    schema = cached_generate(get_client, traits, model, cache, verbose=False)
+    if not validate_schema(schema, verbose=False):
+        raise ValueError("schema failed validation")
+    return schema, "llm"
 
 
 def get_sample_traits() -> dict:
@@ -230,24 +191,219 @@ def get_sample_traits() -> dict:
     }
 
 
-def main() -> None:
-    """Main entry point."""
-    parser = argparse.ArgumentParser(
-        description="Generate UI schema using Azure OpenAI GPT-5"
-    )
-    parser.add_argument(
-        "--traits-file",
-        type=Path,
-        help="Path to JSON file with user traits (optional, uses sample if not provided)",
-    )
-    parser.add_argument(
-        "--model",
-        default=DEFAULT_MODEL,
-        help=f"Azure OpenAI model deployment name (default: {DEFAULT_MODEL})",
+def iter_traits_batch(traits_dir: Path | None, traits_jsonl: Path | None) -> Iterator[tuple[str, dict | ValueError]]:
+    """Yield (user_id, traits) pairs from a directory of exported *.json files or a JSONL file.
+
+    Directory entries use the file stem as user id. JSONL lines are either
+    {"userId": ..., "traits": {...}} or a bare traits object carrying "userId"
+    (falls back to the line number). An entry that isn't a JSON object is
+    yielded as (user_id, ValueError) so the batch reports that user as failed
+    instead of stopping.
+    """
+    if traits_dir is not None:
+        for path in sorted(traits_dir.glob("*.json")):
+            try:
+                with open(path) as f:
+                    traits = json.load(f)
+            except (OSError, ValueError) as e:
+                yield path.stem, ValueError(f"unreadable traits file: {e}")
+                continue
+            yield path.stem, traits if isinstance(traits, dict) else ValueError("traits file is not a JSON object")
+    if traits_jsonl is not None:
+        with open(traits_jsonl) as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield str(line_no), ValueError(f"line {line_no} is not valid JSON: {e}")
+                    continue
+                traits = record.get("traits", record) if isinstance(record, dict) else None
+                if not isinstance(traits, dict):
+                    yield str(line_no), ValueError(f"line {line_no} holds no traits object")
+                    continue
+                user_id = str(record.get("userId") or traits.get("userId") or line_no)
+                yield user_id, traits
+
+
+def compose_batch(
+    client: OpenAI | None,
+    items: Iterable[tuple[str, dict]],
+    model: str,
+    concurrency: int,
+    on_result: Callable[[str, dict | None, str | None, float], None],
+    compose: Callable[[dict], dict] | None = None,
+    validate: bool = True,
+) -> dict:
+    """Compose schemas for many users concurrently over one shared (pooled) client.
+
+    At most ``concurrency`` requests are in flight, and input is pulled lazily so a
+    large JSONL cohort is never held in memory. ``on_result(user_id, schema, error,
+    latency_s)`` is called on the calling thread as each user finishes, in
+    completion order; items whose traits are an exception (see iter_traits_batch)
+    are reported as failed without being composed. Pass ``validate=False`` when
+    ``compose`` validates its own output. Returns a throughput summary.
+    """
+    if compose is None:
+        def compose(traits: dict) -> dict:
+            return generate_valid_schema(client, traits, model, verbose=False)
+
+    def _run(user_id: str, traits: dict) -> tuple[str, dict | None, str | None, float]:
+        t0 = time.perf_counter()
+        try:
+            schema = compose(traits)
+        except Exception as e:  # noqa: BLE001
+            return user_id, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0
+        if validate and not validate_schema(schema, verbose=False):
+            return user_id, None, "schema failed validation", time.perf_counter() - t0
+        return user_id, schema, None, time.perf_counter() - t0
+
+    latencies: list[float] = []
+    ok = failed = 0
+    started = time.perf_counter()
+    pending: set[Future] = set()
+    source = iter(items)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            while len(pending) < concurrency:
+                item = next(source, None)
+                if item is None:
+                    break
+                user_id, traits = item
+                if isinstance(traits, Exception):
+                    failed += 1
+                    latencies.append(0.0)
+                    on_result(user_id, None, f"{type(traits).__name__}: {traits}", 0.0)
+                    continue
+                pending.add(pool.submit(_run, user_id, traits))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                user_id, schema, error, latency = future.result()
+                latencies.append(latency)
+                if error is None:
+                    ok += 1
+                else:
+                    failed += 1
+                on_result(user_id, schema, error, latency)
+
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "users": ok + failed,
+        "ok": ok,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "users_per_s": (ok + failed) / elapsed if elapsed else 0.0,
+        "p50_s": statistics.median(ordered) if ordered else 0.0,
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.0,
+    }
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Batch mode: compose per-user schemas and stream them to --output-dir or --output-jsonl."""
+    if args.output_dir is None and args.output_jsonl is None:
+        raise SystemExit("Batch mode needs --output-dir or --output-jsonl")
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    jsonl_out = None
+    if args.output_jsonl is not None:
+        args.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        jsonl_out = open(args.output_jsonl, "w")
+
+    def on_result(user_id: str, schema: dict | None, error: str | None, latency: float) -> None:
+        if error is not None:
+            print(f"❌ {user_id}: {error} ({latency:.2f}s)", file=sys.stderr)
+        else:
+            print(f"✓ {user_id} ({latency:.2f}s)")
+            if args.output_dir is not None:
+                safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", user_id)
+                with open(args.output_dir / f"{safe_id}.json", "w") as f:
+                    json.dump(schema, f, indent=2)
+        if jsonl_out is not None:
+            record = {"userId": user_id, "schema": schema} if error is None else {"userId": user_id, "error": error}
+            jsonl_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            jsonl_out.flush()
+
+    # The client is built on first use, so rules-only and fully rule-served hybrid runs need no credentials
+    client_lock = threading.Lock()
+    clients: list[OpenAI] = []
+
+    def get_client() -> OpenAI:
+        with client_lock:
+            if not clients:
+                clients.append(build_client())
+            return clients[0]
+
+    sources: dict[str, int] = {}
+    sources_lock = threading.Lock()
+
+    def compose(traits: dict) -> dict:
+        schema, source = compose_for_mode(args.mode, get_client, traits, args.model, cache, library)
+        with sources_lock:
+            sources[source] = sources.get(source, 0) + 1
+        return schema
+
+    cache = build_cache(args)
+    library = load_library(args)
+    items = iter_traits_batch(args.traits_dir, args.traits_jsonl)
+    packing = f", {args.pack} users per call" if args.pack > 1 else ""
+    print(f"Composing schemas in {args.mode} mode with {args.model} (concurrency={args.concurrency}{packing})...")
+    try:
+        if args.pack > 1:
+            from genui_packed_composer import compose_packed
+
+            summary = compose_packed(
+                get_client, items, args.model, args.pack, args.concurrency, on_result, args.mode, cache, library
+            )
+            sources = summary["sources"]
+        else:
+            summary = compose_batch(None, items, args.model, args.concurrency, on_result, compose=compose, validate=False)
+    finally:
+        if jsonl_out is not None:
+            jsonl_out.close()
+
+    print(
+        f"\n✅ Batch done: {summary['ok']}/{summary['users']} ok, {summary['failed']} failed in "
+        f"{summary['elapsed_s']:.1f}s ({summary['users_per_s']:.2f} users/s, "
+        f"p50 {summary['p50_s']:.2f}s, p95 {summary['p95_s']:.2f}s)"
     )
+    if args.pack > 1:
+        print(
+            f"   Packed: {summary['model_calls']} model call(s) for {summary['model_users']} user(s), "
+            f"{summary['retried']} retried alone, {summary['input_tokens']} input / {summary['output_tokens']} output tokens"
+        )
+    if set(sources) - {"llm"}:
+        print("   Sources: " + ", ".join(f"{n} {src}" for src, n in sorted(sources.items())))
+    if cache is not None and clients and args.pack <= 1:
+        print(f"   Cache: {cache.hits} hit(s), {cache.misses} model call(s)")
+    return 1 if summary["failed"] else 0
+
+
+def run_pack_sweep(args: argparse.Namespace) -> int:
+    """--pack-sweep: compose the batch input once per pack size and print the per-user cost table."""
+    from genui_packed_composer import print_sweep_report, sweep_pack_sizes
+
+    try:
+        pack_sizes = [int(k) for k in args.pack_sweep.split(",")]
+    except ValueError:
+        raise SystemExit(f"--pack-sweep expects comma-separated integers, got {args.pack_sweep!r}")
+    if not pack_sizes or min(pack_sizes) < 1:
+        raise SystemExit("--pack-sweep sizes must be >= 1")
+    items = list(iter_traits_batch(args.traits_dir, args.traits_jsonl))
+    if not items:
+        raise SystemExit("--pack-sweep needs users from --traits-dir or --traits-jsonl")
+    client = build_client()
+    summaries = sweep_pack_sizes(lambda: client, items, args.model, pack_sizes, args.concurrency)
+    print_sweep_report(summaries)
+    return 0
 
-    args = parser.parse_args()
 
+def run_single(args: argparse.Namespace, ndjson_out: TextIO | None) -> None:
+    """Single-user mode: compose one schema and write it to OUTPUT_FILE (streaming sections to ndjson_out if given)."""
     # Load or generate traits
     if args.traits_file and args.traits_file.exists():
         print(f"Loading traits from {args.traits_file}")
@@ -257,20 +413,44 @@ def main() -> None:
         print("Using sample traits (no traits file provided)")
         traits = get_sample_traits()
 
-    # Build client
-    client = build_client()
-
-    # Generate schema
-    schema = generate_schema(client, traits, args.model)
+    if args.mode != "llm":
+        # The rule-based schema is written immediately; hybrid may then replace it
+        rule_schema = rule_layout(traits)
+        write_schema(rule_schema)
+        print(f"✓ Rule-based schema written to {OUTPUT_FILE}")
+        if args.mode == "rules":
+            sys.exit(0)
+        confidence, reasons = rule_confidence(traits)
+        if confidence >= HYBRID_MIN_CONFIDENCE:
+            print(f"✅ Rules confident ({confidence:.2f}), no model call needed")
+            sys.exit(0)
+        print(f"Rules confidence {confidence:.2f} < {HYBRID_MIN_CONFIDENCE}: " + "; ".join(reasons))
+
+    # Generate schema (the client is only built when the library and the cache miss)
+    library = load_library(args)
+    try:
+        if ndjson_out is not None:
+            schema = stream_generate(build_client, traits, args.model, build_cache(args), ndjson_out, library)
+        elif library is not None and (hit := library.lookup(traits)) is not None:
+            schema = hit[0]
+            print(f"✓ Schema served from layout library ({hit[1]} affinity step(s) from this user's cell)")
+        else:
+            schema = cached_generate(build_client, traits, args.model, build_cache(args))
+    except Exception:
+        if args.mode == "hybrid":
+            print("⚠️  Model call failed; keeping the rule-based schema", file=sys.stderr)
+            sys.exit(0)
+        raise
 
     # Validate
     if not validate_schema(schema):
+        if args.mode == "hybrid":
+            print("⚠️  Keeping the rule-based schema", file=sys.stderr)
+            sys.exit(0)
         sys.exit(1)
 
     # Write to output
-    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(schema, f, indent=2)
+    write_schema(schema)
 
     print(f"✅ Schema written to {OUTPUT_FILE}")
     print("\nTo use this schema:")
@@ -279,5 +459,128 @@ def main() -> None:
     print("3. Reload the page")
 
 
+
+def write_schema(schema: dict) -> None:
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(schema, f, indent=2)
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Generate UI schema using Azure OpenAI GPT-5"
+    )
+    parser.add_argument(
+        "--traits-file",
+        type=Path,
+        help="Path to JSON file with user traits (optional, uses sample if not provided)",
+    )
+    parser.add_argument(
+        "--model",
+        default=DEFAULT_MODEL,
+        help=f"Azure OpenAI model deployment name (default: {DEFAULT_MODEL})",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="llm",
+        help="llm: always call the model; rules: port of chooseLayout (layout.ts), no model; "
+        "hybrid: rules unless their confidence is low, then the model (default: llm)",
+    )
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--traits-dir", type=Path, help="Directory of exported per-user traits *.json files")
+    batch.add_argument("--traits-jsonl", type=Path, help="JSONL file with one user's traits per line")
+    batch.add_argument("--output-dir", type=Path, help="Write one <userId>.json schema per user here")
+    batch.add_argument("--output-jsonl", type=Path, help="Stream {userId, schema|error} records to this JSONL file")
+    batch.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum concurrent model requests in batch and service mode (default: {DEFAULT_CONCURRENCY})",
+    )
+    batch.add_argument(
+        "--pack",
+        type=int,
+        default=1,
+        metavar="K",
+        help="Send up to K users' traits per model call with one shared system prompt (default: 1)",
+    )
+    batch.add_argument(
+        "--pack-sweep",
+        metavar="K,K,...",
+        help="Report tokens and latency per user for each pack size over the batch input; writes no schemas",
+    )
+    parser.add_argument(
+        "--stream",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="Stream sections as NDJSON while the model generates them (to FILE, default stdout)",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="[HOST:]PORT",
+        help="Run as a long-lived HTTP service (POST /compose) instead of a one-shot CLI",
+    )
+
+    cache_group = parser.add_argument_group("schema cache")
+    cache_group.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"On-disk schema cache keyed by trait bucket (default: {DEFAULT_CACHE_DIR.relative_to(PROJECT_ROOT)})",
+    )
+    cache_group.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"In-memory LRU entries (default: {DEFAULT_CACHE_SIZE})",
+    )
+    cache_group.add_argument("--no-cache", action="store_true", help="Always call the model")
+
+    library_group = parser.add_argument_group("layout library")
+    library_group.add_argument(
+        "--library",
+        type=Path,
+        metavar="FILE",
+        help="Serve users covered by a precomputed layout library (genui_layout_library.py) without a model call",
+    )
+    library_group.add_argument(
+        "--library-radius",
+        type=int,
+        default=1,
+        help="Affinity steps to search for the nearest populated cell (default: 1)",
+    )
+
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if args.pack < 1:
+        parser.error("--pack must be >= 1")
+
+    if args.serve:
+        from genui_compose_service import run_service
+
+        run_service(args.serve, args.model, args.mode, build_cache(args), args.concurrency, load_library(args))
+        return
+
+    if args.pack_sweep:
+        sys.exit(run_pack_sweep(args))
+
+    if args.traits_dir or args.traits_jsonl:
+        sys.exit(run_batch(args))
+
+    if not args.stream:
+        run_single(args, None)
+    elif args.stream == "-":
+        # NDJSON owns stdout; status lines go to stderr
+        ndjson_out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            run_single(args, ndjson_out)
+    else:
+        with open(args.stream, "w") as ndjson_out:
+            run_single(args, ndjson_out)
+
 if __name__ == "__main__":
     main()
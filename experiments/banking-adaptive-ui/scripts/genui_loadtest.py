@@ -0,0 +1,153 @@
+"""
+Load-test the compose service (``genui_llm_composer.py --serve``).
+
+Opens ``--connections`` keep-alive connections and sends ``POST /compose``
+requests back to back on each until ``--requests`` have completed, then reports
+requests/s, latency percentiles, status codes and the X-Compose-Source mix
+(rules / cache / llm / coalesced / fallback).
+
+Traits come from ``--traits-jsonl`` (composer batch format) or are sample-trait
+variants; ``--distinct`` controls how many different profiles are cycled, which
+sets how much the service can coalesce and cache.
+
+Usage:
+    python scripts/genui_loadtest.py --url http://127.0.0.1:8787/compose --requests 500 --connections 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from itertools import cycle
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+def load_payloads(traits_jsonl: Path | None, distinct: int) -> list[bytes]:
+    if traits_jsonl is not None:
+        with open(traits_jsonl) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [json.dumps(r.get("traits", r)).encode() for r in records[:distinct]]
+    payloads = []
+    for i in range(distinct):
+        # Spread affinities so profiles land in different cache buckets / rule branches
+        payloads.append(
+            json.dumps(
+                {
+                    "fxAffinity": round((i * 0.37) % 1, 2),
+                    "transferAffinity": round((i * 0.61) % 1, 2),
+                    "explorerScore": round((i * 0.23) % 1, 2),
+                    "topActions": ["FX", "TRANSFER", "PAY_BILL"][: i % 4],
+                    "lastPaths": ["/", "/exchange"] if i % 2 else ["/payments/utilities"],
+                    "searchTerms": [{"term": "exchange rates", "count": 2, "lastSeen": 0}] * (i % 3),
+                    "incompleteBillPay": {"started": 0} if i % 5 == 0 else None,
+                    "locale": "tr" if i % 7 == 0 else "en",
+                    "prefersDense": False,
+                    "darkMode": False,
+                }
+            ).encode()
+        )
+    return payloads
+
+
+async def _post(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str, body: bytes
+) -> tuple[int, dict[str, str]]:
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ", 2)[1])
+    headers = {}
+    for line in head[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers
+
+
+async def run_load(url: str, payloads: list[bytes], total: int, connections: int) -> dict:
+    parts = urlsplit(url)
+    host, port, path = parts.hostname or "127.0.0.1", parts.port or 80, parts.path or "/compose"
+    bodies = cycle(payloads)
+    remaining = total
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    sources: Counter = Counter()
+
+    async def worker() -> None:
+        nonlocal remaining
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                status, headers = await _post(reader, writer, f"{host}:{port}", path, next(bodies))
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] += 1
+                sources[headers.get("x-compose-source", "-")] += 1
+                if headers.get("connection") == "close":
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(connections, total))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        "statuses": dict(statuses),
+        "sources": dict(sources),
+    }
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Load-test the GenUI compose service")
+    parser.add_argument("--url", default="http://127.0.0.1:8787/compose", help="Service endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send (default: 200)")
+    parser.add_argument("--connections", type=int, default=16, help="Concurrent keep-alive connections (default: 16)")
+    parser.add_argument("--traits-jsonl", type=Path, help="Traits to send (composer batch JSONL); default: sample variants")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct trait profiles to cycle through (default: 20)")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.traits_jsonl, args.distinct)
+    if not payloads:
+        print("❌ No traits to send", file=sys.stderr)
+        sys.exit(1)
+    try:
+        result = asyncio.run(run_load(args.url, payloads, args.requests, args.connections))
+    except ConnectionError as exc:
+        print(f"❌ Could not reach {args.url}: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    print(
+        f"{result['requests']} requests in {result['elapsed_s']:.2f}s over {args.connections} connections: "
+        f"{result['rps']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+        f"p99 {result['p99_ms']:.1f} ms"
+    )
+    print("  status:  " + ", ".join(f"{k}×{v}" for k, v in sorted(result["statuses"].items())))
+    print("  sources: " + ", ".join(f"{k}×{v}" for k, v in sorted(result["sources"].items())))
+    if any(status != 200 for status in result["statuses"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Packed prompts: compose schemas for K users per model call.
+
+A single-user request is ~3 KB of SYSTEM_PROMPT in front of a few hundred bytes
+of pretty-printed traits, so in a cohort run most input tokens are the repeated
+contract. Packed mode sends the contract once, followed by K minified trait
+payloads tagged u0..u{K-1}, and asks for one JSON object mapping each tag to its
+UISchema. Every schema is split out and validated on its own (with the same local
+repair as generate_valid_schema); only users whose entry is missing or unusable,
+or whose whole call failed, are retried with a single-user request.
+
+K=1 sends the regular single-user prompt, so the K=1 row of a sweep is today's
+cost. Started from the composer's batch mode:
+
+Usage:
+    python scripts/genui_llm_composer.py --traits-jsonl cohort.jsonl --output-jsonl schemas.jsonl --pack 8
+    python scripts/genui_llm_composer.py --traits-jsonl cohort.jsonl --pack-sweep 1,4,8,16
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from genui_compose_core import (
+    SYSTEM_PROMPT,
+    SchemaCache,
+    build_user_prompt,
+    parse_model_json,
+    prompt_payload,
+    request_output_text,
+    trait_bucket_key,
+    validate_schema,
+)
+from genui_layout_rules import HYBRID_MIN_CONFIDENCE, rule_confidence
+from genui_schema_validator import repair_ui_schema, rule_layout
+
+if TYPE_CHECKING:
+    from genui_layout_library import LayoutLibrary
+    from openai import OpenAI
+
+PACK_INSTRUCTIONS = """# Packed Request
+
+This request covers several users. Each line under "# Users" is one user: a tag, then that user's traits and preferences as minified JSON (same fields as above). Apply every rule above to each user independently and never mix traits between users.
+
+Return ONE JSON object whose keys are exactly the user tags and whose values are complete UISchema objects:
+{"u0": {"version": "1.0", "sections": [...]}, "u1": {"version": "1.0", "sections": [...]}}
+
+Return JSON only, no markdown."""
+
+
+def compact_traits(traits: dict) -> str:
+    """The prompt fields of ``traits`` as one minified JSON object."""
+    behavior, prefs = prompt_payload(traits)
+    return json.dumps({**behavior, **prefs}, separators=(",", ":"), ensure_ascii=False)
+
+
+def build_packed_prompt(batch: list[tuple[str, dict]]) -> str:
+    """Full model input for a packed call; users are tagged by position, not by user id."""
+    users = "\n".join(f"u{i} {compact_traits(traits)}" for i, (_, traits) in enumerate(batch))
+    return f"{SYSTEM_PROMPT}\n\n{PACK_INSTRUCTIONS}\n\n# Users\n{users}"
+
+
+def generate_packed(client: OpenAI, model: str, batch: list[tuple[str, dict]]) -> tuple[list[Any], dict]:
+    """One model call for ``batch``; returns (raw entry per user in batch order, token usage).
+
+    Entries are whatever the model put under each tag (None when the tag is
+    missing). A single user gets the regular single-user prompt.
+    """
+    if len(batch) == 1:
+        text, usage = request_output_text(client, model, f"{SYSTEM_PROMPT}\n\n{build_user_prompt(batch[0][1])}")
+        return [parse_model_json(text)], usage
+    text, usage = request_output_text(client, model, build_packed_prompt(batch))
+    data = parse_model_json(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"expected an object keyed by user tag, got {type(data).__name__}")
+    return [data.get(f"u{i}") for i in range(len(batch))], usage
+
+
+def accept_entry(entry: Any, traits: dict) -> dict | None:
+    """A valid schema from one user's entry, repaired locally; None when there is nothing to repair."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("sections"), list) or not entry["sections"]:
+        return None
+    if validate_schema(entry, verbose=False):
+        return entry
+    return repair_ui_schema(entry, traits)[0]
+
+
+def _run_chunk(client: OpenAI, model: str, chunk: list[tuple[str, dict]]) -> dict:
+    """Packed call for ``chunk``: per-user results, the users to retry alone, and the call's token usage."""
+    t0 = time.perf_counter()
+    try:
+        entries, usage = generate_packed(client, model, chunk)
+        packed_error = None
+    except Exception as exc:  # noqa: BLE001
+        entries, packed_error = [None] * len(chunk), f"{type(exc).__name__}: {exc}"
+        usage = {"input_tokens": 0, "output_tokens": 0, "estimated": False}
+
+    results, retry = [], []
+    for (user_id, traits), entry in zip(chunk, entries):
+        schema = accept_entry(entry, traits)
+        if schema is None:
+            retry.append((user_id, traits, packed_error, t0))
+        else:
+            results.append((user_id, traits, schema, None, time.perf_counter() - t0))
+    return {"results": results, "retry": retry, "usage": usage, "calls": 1, "retried": 0}
+
+
+def _run_solo(client: OpenAI, model: str, user_id: str, traits: dict, packed_error: str | None, t0: float) -> dict:
+    """Single-user retry for a user the packed call didn't answer; same outcome shape as _run_chunk."""
+    usage = {"input_tokens": 0, "output_tokens": 0, "estimated": False}
+    try:
+        entries, usage = generate_packed(client, model, [(user_id, traits)])
+        schema = accept_entry(entries[0], traits)
+        error = None if schema is not None else "no usable schema after retry"
+    except Exception as exc:  # noqa: BLE001
+        schema = None
+        error = f"{type(exc).__name__}: {exc}" + (f" (packed call: {packed_error})" if packed_error else "")
+    result = (user_id, traits, schema, error, time.perf_counter() - t0)
+    return {"results": [result], "retry": [], "usage": usage, "calls": 1, "retried": 1}
+
+
+def compose_packed(
+    get_client: Callable[[], OpenAI],
+    items: Iterable[tuple[str, dict]],
+    model: str,
+    pack_size: int,
+    concurrency: int,
+    on_result: Callable[[str, dict | None, str | None, float], None],
+    mode: str = "llm",
+    cache: SchemaCache | None = None,
+    library: LayoutLibrary | None = None,
+) -> dict:
+    """compose_batch with up to ``pack_size`` users per model call and ``concurrency`` calls in flight.
+
+    Users answered by the rules (``rules`` / confident ``hybrid``), the layout
+    library or the cache never reach a pack, users whose traits failed to
+    parse are reported as failed, and users sharing a trait bucket
+    with one already packed wait for its schema. Users a packed call leaves
+    unanswered are retried alone, each as its own task on the pool. In hybrid
+    mode a user whose schema can't be produced falls back to the rule layout.
+    ``on_result`` has compose_batch's signature; latency is measured from the
+    start of the user's packed call. Returns compose_batch's summary plus model
+    calls, retries, token totals and sources.
+    """
+    latencies: list[float] = []
+    sources: dict[str, int] = {}
+    usage = {"input_tokens": 0, "output_tokens": 0, "estimated": False}
+    ok = failed = calls = retried = model_users = 0
+    followers: dict[str, list[tuple[str, dict]]] = {}
+
+    def finish(user_id: str, traits: dict, schema: dict | None, error: str | None, latency: float, source: str) -> None:
+        nonlocal ok, failed
+        if schema is None and mode == "hybrid":
+            schema, error, source = rule_layout(traits), None, "fallback"
+        if error is None:
+            ok += 1
+            sources[source] = sources.get(source, 0) + 1
+        else:
+            failed += 1
+        latencies.append(latency)
+        on_result(user_id, schema, error, latency)
+
+    def failed_input(user_id: str, exc: Exception) -> None:
+        nonlocal failed
+        failed += 1
+        latencies.append(0.0)
+        on_result(user_id, None, f"{type(exc).__name__}: {exc}", 0.0)
+
+    def route(user_id: str, traits: dict | Exception) -> bool:
+        """Answer a user without the model if possible; False when it has to be packed."""
+        if isinstance(traits, Exception):
+            failed_input(user_id, traits)
+            return True
+        if mode == "rules" or (mode == "hybrid" and rule_confidence(traits)[0] >= HYBRID_MIN_CONFIDENCE):
+            finish(user_id, traits, rule_layout(traits), None, 0.0, "rules")
+            return True
+        hit = library.lookup(traits) if library is not None else None
+        if hit is not None:
+            finish(user_id, traits, hit[0], None, 0.0, "library")
+            return True
+        if cache is None:
+            return False
+        key = trait_bucket_key(traits)
+        if key in followers:
+            followers[key].append((user_id, traits))
+            return True
+        schema = cache.get(key)
+        if schema is not None:
+            finish(user_id, traits, schema, None, 0.0, "cache")
+            return True
+        followers[key] = []
+        return False
+
+    started = time.perf_counter()
+    pending: set[Future] = set()
+    source = iter(items)
+    chunk: list[tuple[str, dict]] = []
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                item = next(source, None)
+                if item is None:
+                    exhausted = True
+                elif not route(*item):
+                    chunk.append(item)
+                if chunk and (exhausted or len(chunk) == pack_size):
+                    pending.add(pool.submit(_run_chunk, get_client(), model, chunk))
+                    chunk = []
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                calls += outcome["calls"]
+                retried += outcome["retried"]
+                usage["input_tokens"] += outcome["usage"]["input_tokens"]
+                usage["output_tokens"] += outcome["usage"]["output_tokens"]
+                usage["estimated"] |= outcome["usage"]["estimated"]
+                for user_id, traits, packed_error, t0 in outcome["retry"]:
+                    pending.add(pool.submit(_run_solo, get_client(), model, user_id, traits, packed_error, t0))
+                for user_id, traits, schema, error, latency in outcome["results"]:
+                    model_users += 1
+                    finish(user_id, traits, schema, error, latency, "llm")
+                    if cache is None:
+                        continue
+                    key = trait_bucket_key(traits)
+                    if schema is not None:
+                        cache.put(key, schema)
+                    for follower_id, follower_traits in followers.pop(key, []):
+                        finish(follower_id, follower_traits, schema, error, latency, "cache")
+
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "users": ok + failed,
+        "ok": ok,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "users_per_s": (ok + failed) / elapsed if elapsed else 0.0,
+        "p50_s": statistics.median(ordered) if ordered else 0.0,
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.0,
+        "pack_size": pack_size,
+        "model_users": model_users,
+        "model_calls": calls,
+        "retried": retried,
+        **usage,
+        "sources": sources,
+    }
+
+
+def sweep_pack_sizes(
+    get_client: Callable[[], OpenAI], items: list[tuple[str, dict]], model: str, pack_sizes: list[int], concurrency: int
+) -> list[dict]:
+    """Run the same cohort once per pack size (llm mode, no cache) and return the summaries."""
+    summaries = []
+    for k in pack_sizes:
+        print(f"K={k}: {len(items)} users in {-(-len(items) // k)} packed call(s)...")
+        summaries.append(compose_packed(get_client, items, model, k, concurrency, lambda *_: None))
+    return summaries
+
+
+def print_sweep_report(summaries: list[dict]) -> None:
+    """Per-K table: model calls, retries, tokens per user, wait per user and throughput.
+
+    The wait columns are each user's time from the start of its packed call to its schema
+    (a retried user includes the failed packed call), not call latency divided by K.
+    """
+    print(
+        f"\n{'K':>4} {'calls':>6} {'retried':>8} {'ok':>6} {'in tok/user':>12} {'out tok/user':>13} "
+        f"{'p50 wait s':>11} {'p95 wait s':>11} {'users/s':>8}"
+    )
+    for s in summaries:
+        users = max(s["model_users"], 1)
+        print(
+            f"{s['pack_size']:>4} {s['model_calls']:>6} {s['retried']:>8} {s['ok']:>6} "
+            f"{s['input_tokens'] / users:>12.0f} {s['output_tokens'] / users:>13.0f} "
+            f"{s['p50_s']:>11.2f} {s['p95_s']:>11.2f} {s['users_per_s']:>8.2f}"
+        )
+    if any(s["estimated"] for s in summaries):
+        print("(token counts estimated at 4 chars/token where the response carried no usage)")
@@ -0,0 +1,260 @@
+"""
+UISchema validation and local repair, mirroring ``personalization/schema.ts``.
+
+``validate_ui_schema`` applies the same rules as the Zod ``UISchemaValidator``
+(version literal, ≤8 sections, the discriminated union over ``component`` with
+each component's props) and returns every error instead of stopping at the first.
+The per-component prop specs below are compiled once into a dispatch table of
+checker functions, so a schema is checked with one dict lookup per section.
+
+``repair_ui_schema`` fixes what can be fixed without another model call: unknown
+or malformed sections are dropped, unknown prop keys stripped (as Zod's parse
+does), invalid ActionIds filtered, ids de-duplicated, exactly one ActionGrid and
+one Balances section kept (added when missing), and the section count capped.
+
+``rule_layout`` is ``choose_layout`` run through the same repair: chooseLayout
+can emit 9 sections, one more than the validator accepts.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from genui_layout_rules import build_action_order, choose_layout
+
+ACTION_IDS = frozenset({"TRANSFER", "PAY_BILL", "FX", "OPEN_SAVINGS"})
+MAX_SECTIONS = 8
+REQUIRED_COMPONENTS = ("ActionGrid", "Balances")
+
+Checker = Callable[[Any, str], list[str]]
+
+
+# ------- Spec -------
+# Field spec: (type, required). Types: "string", "boolean", "action_id", ("enum", values),
+# ("array", item_type) and ("object", {field: spec}).
+
+ACTION_SPEC = ("object", {"label": ("string", True), "actionId": ("action_id", True)})
+
+SECTION_PROPS: dict[str, dict[str, tuple]] = {
+    "HeroCard": {"title": ("string", True), "subtitle": ("string", False)},
+    "AccountCard": {"accountType": (("enum", ("checking", "savings")), False)},
+    "ActionGrid": {"actions": (("array", ACTION_SPEC), True)},
+    "TransactionHistory": {"compact": ("boolean", False)},
+    "FXRates": {"expanded": ("boolean", False)},
+    "Balances": {},
+    "OffersCard": {
+        "title": ("string", True),
+        "body": ("string", True),
+        "cta": (("object", {"text": ("string", True), "actionId": ("action_id", True)}), False),
+    },
+    "RecentBeneficiaries": {"aliases": (("array", "string"), True)},
+    "ContinueBillPay": {"visible": ("boolean", True)},
+}
+
+
+def _compile(kind: Any) -> Checker:
+    """Turn a type spec into a checker(value, where) -> errors."""
+    if kind == "string":
+        return lambda v, where: [] if isinstance(v, str) else [f"{where}: expected string"]
+    if kind == "boolean":
+        return lambda v, where: [] if isinstance(v, bool) else [f"{where}: expected boolean"]
+    if kind == "action_id":
+        return lambda v, where: [] if isinstance(v, str) and v in ACTION_IDS else [f"{where}: invalid ActionId {v!r}"]
+    if kind[0] == "enum":
+        allowed = frozenset(kind[1])
+        return lambda v, where: [] if isinstance(v, str) and v in allowed else [f"{where}: expected one of {sorted(allowed)}"]
+    if kind[0] == "array":
+        item = _compile(kind[1])
+
+        def check_array(v: Any, where: str) -> list[str]:
+            if not isinstance(v, list):
+                return [f"{where}: expected array"]
+            errors: list[str] = []
+            for i, element in enumerate(v):
+                errors += item(element, f"{where}[{i}]")
+            return errors
+
+        return check_array
+    if kind[0] == "object":
+        fields = [(name, required, _compile(sub)) for name, (sub, required) in kind[1].items()]
+
+        def check_object(v: Any, where: str) -> list[str]:
+            if not isinstance(v, dict):
+                return [f"{where}: expected object"]
+            errors: list[str] = []
+            for name, required, check in fields:
+                if name not in v:
+                    if required:
+                        errors.append(f"{where}.{name}: required")
+                    continue
+                errors += check(v[name], f"{where}.{name}")
+            return errors
+
+        return check_object
+    raise ValueError(f"unknown spec {kind!r}")
+
+
+# component -> props checker, built once at import
+SECTION_VALIDATORS: dict[str, Checker] = {
+    component: _compile(("object", props)) for component, props in SECTION_PROPS.items()
+}
+
+
+# ------- Validate -------
+
+
+def validate_ui_schema(schema: Any, max_sections: int = MAX_SECTIONS) -> list[str]:
+    """Return all UISchemaValidator errors for ``schema`` (empty list when valid)."""
+    if not isinstance(schema, dict):
+        return ["schema: expected object"]
+    errors: list[str] = []
+    if schema.get("version") != "1.0":
+        errors.append(f"version: expected '1.0', got {schema.get('version')!r}")
+    sections = schema.get("sections")
+    if not isinstance(sections, list):
+        return errors + ["sections: expected array"]
+    if len(sections) > max_sections:
+        errors.append(f"sections: {len(sections)} > {max_sections}")
+    for i, section in enumerate(sections):
+        where = f"sections[{i}]"
+        if not isinstance(section, dict):
+            errors.append(f"{where}: expected object")
+            continue
+        if not isinstance(section.get("id"), str):
+            errors.append(f"{where}.id: expected string")
+        component = section.get("component")
+        check = SECTION_VALIDATORS.get(component) if isinstance(component, str) else None
+        if check is None:
+            errors.append(f"{where}.component: unknown component {component!r}")
+            continue
+        errors += check(section.get("props"), f"{where}.props")
+    return errors
+
+
+def missing_required(schema: dict) -> list[str]:
+    """Required components (composer contract, not Zod) absent from a schema."""
+    present = {s.get("component") for s in schema.get("sections", []) if isinstance(s, dict)}
+    return [c for c in REQUIRED_COMPONENTS if c not in present]
+
+
+# ------- Repair -------
+
+
+def _strip(value: Any, kind: Any) -> Any:
+    """Keep only spec'd keys, like Zod's parse; returns None where the value can't be salvaged."""
+    if kind == "string":
+        return value if isinstance(value, str) else None
+    if kind == "boolean":
+        return value if isinstance(value, bool) else None
+    if kind == "action_id":
+        return value if isinstance(value, str) and value in ACTION_IDS else None
+    if kind[0] == "enum":
+        return value if isinstance(value, str) and value in kind[1] else None
+    if kind[0] == "array":
+        if not isinstance(value, list):
+            return None
+        items = (_strip(v, kind[1]) for v in value)
+        return [v for v in items if v is not None]
+    if not isinstance(value, dict):
+        return None
+    out = {}
+    for name, (sub, required) in kind[1].items():
+        if name not in value:
+            if required:
+                return None
+            continue
+        fixed = _strip(value[name], sub)
+        if fixed is None:
+            if required:
+                return None
+            continue
+        out[name] = fixed
+    return out
+
+
+class SectionRepairer:
+    """Incremental form of ``repair_ui_schema`` for sections arriving one at a time (streaming).
+
+    ``add`` returns each section repaired, or None when it has to be dropped; slots
+    are held back for required sections not seen yet, so optional sections are
+    the ones dropped when there are too many. ``finish`` appends the required
+    sections that never arrived and returns them.
+    """
+
+    def __init__(self, traits: dict | None = None, max_sections: int = MAX_SECTIONS):
+        self.traits = traits or {}
+        self.max_sections = max_sections
+        self.sections: list[dict] = []
+        self.fixes: list[str] = []
+        self._ids: set[str] = set()
+        self._required_seen: set[str] = set()
+
+    def add(self, section: Any, index: int) -> dict | None:
+        component = section.get("component") if isinstance(section, dict) else None
+        if not isinstance(component, str) or component not in SECTION_PROPS:
+            self.fixes.append(f"dropped sections[{index}] (unknown component {component!r})")
+            return None
+        if component in self._required_seen:
+            self.fixes.append(f"dropped sections[{index}] (duplicate {component})")
+            return None
+        props = _strip(section.get("props"), ("object", SECTION_PROPS[component]))
+        if props is None:
+            self.fixes.append(f"dropped sections[{index}] ({component} props invalid)")
+            return None
+        reserved = sum(1 for c in REQUIRED_COMPONENTS if c not in self._required_seen and c != component)
+        if len(self.sections) + reserved >= self.max_sections:
+            self.fixes.append(f"dropped sections[{index}] (over {self.max_sections} sections)")
+            return None
+        if props != section.get("props"):
+            self.fixes.append(f"cleaned {component} props")
+        if component == "ActionGrid" and not props["actions"]:
+            props["actions"] = build_action_order(self.traits)
+            self.fixes.append("filled empty ActionGrid")
+        return self._append(section.get("id"), component, props)
+
+    def finish(self) -> list[dict]:
+        added = []
+        for component in REQUIRED_COMPONENTS:
+            if component not in self._required_seen:
+                props = {"actions": build_action_order(self.traits)} if component == "ActionGrid" else {}
+                added.append(self._append(None, component, props))
+                self.fixes.append(f"added required {component}")
+        return added
+
+    def _append(self, section_id: Any, component: str, props: dict) -> dict:
+        if not isinstance(section_id, str) or not section_id or section_id in self._ids:
+            base = section_id if isinstance(section_id, str) and section_id else component.lower()
+            candidate, n = base, 2
+            while candidate in self._ids:
+                candidate, n = f"{base}-{n}", n + 1
+            if section_id is not None:
+                self.fixes.append(f"renamed section id {section_id!r} to {candidate!r}")
+            section_id = candidate
+        self._ids.add(section_id)
+        if component in REQUIRED_COMPONENTS:
+            self._required_seen.add(component)
+        section = {"id": section_id, "component": component, "props": props}
+        self.sections.append(section)
+        return section
+
+
+def repair_ui_schema(schema: Any, traits: dict | None = None, max_sections: int = MAX_SECTIONS) -> tuple[dict, list[str]]:
+    """Return (repaired schema, fixes applied); the input is not modified and the result passes validate_ui_schema.
+
+    Required sections that have to be added are built from ``traits`` with the
+    rule engine's action order (default order without traits).
+    """
+    source = schema if isinstance(schema, dict) else {}
+    repairer = SectionRepairer(traits, max_sections)
+    if source.get("version") != "1.0":
+        repairer.fixes.append("set version to 1.0")
+    raw_sections = source.get("sections")
+    for i, section in enumerate(raw_sections if isinstance(raw_sections, list) else []):
+        repairer.add(section, i)
+    repairer.finish()
+    return {"version": "1.0", "sections": repairer.sections}, repairer.fixes
+
+
+def rule_layout(traits: dict) -> dict:
+    """choose_layout output that passes validate_ui_schema (trailing optional sections dropped past MAX_SECTIONS)."""
+    return repair_ui_schema(choose_layout(traits), traits)[0]
@@ -0,0 +1,450 @@
+"""
+Incremental per-user trait aggregation for live event streams.
+
+``TraitState`` folds one event at a time (O(1) per event) into a small fixed-size
+state and produces the same ``UserTraits`` dict as ``deriveTraits`` in
+``lib/analytics/derive.ts`` (and ``genui_derive_traits.py``), which is what the
+composer's ``build_user_prompt`` consumes. Unlike the browser there is no
+1,000-event history cap: nothing per event is kept beyond the fixed windows.
+
+Differences from recomputing over the full history, all by design:
+- the 30-day action window and 7-day search window use hour buckets, so an event
+  leaves a window up to an hour late;
+- topActions ranks exponentially decayed weights kept since the first event
+  (events older than 30 days add at most exp(-30/7) ≈ 1.4% each), and only
+  actions seen in the last 30 days are ranked;
+- events are expected in timestamp order; a late event is counted in the newest
+  bucket.
+
+State snapshots to a compact binary format (``snapshot``/``restore``) so a
+service can persist users between restarts.
+
+Usage:
+    python scripts/genui_trait_stream.py --events-jsonl stream.jsonl --output-jsonl traits.jsonl
+    python scripts/genui_trait_stream.py --events-jsonl today.jsonl --state state.bin --output-jsonl traits.jsonl
+
+Stream lines are events carrying a "userId", e.g.
+{"userId": "u1", "type": "action", "name": "FX", "timestamp": 1760000000000},
+or preference updates in the export's "preferences" shape, e.g.
+{"userId": "u1", "preferences": {"locale": "tr", "prefersDense": true}}.
+Users without one keep the defaults (locale "en", not dense, light mode).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import struct
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterator
+
+ACTION_IDS = ("TRANSFER", "PAY_BILL", "FX", "OPEN_SAVINGS")
+ACTION_INDEX = {name: i for i, name in enumerate(ACTION_IDS)}
+FX, TRANSFER = ACTION_INDEX["FX"], ACTION_INDEX["TRANSFER"]
+
+HOUR_MS = 60 * 60 * 1000
+ONE_DAY_MS = 24 * HOUR_MS
+SEVEN_DAYS_MS = 7 * ONE_DAY_MS
+RECENT_WINDOW_MS = 30 * ONE_DAY_MS
+DECAY_MS = 7 * ONE_DAY_MS  # weight = exp(-ageDays / 7), as in rankActions
+
+LAST_VIEWS = 10  # lastPaths looks at the last 10 views
+MAX_TRACKED_PATHS = 32  # explorerScore saturates at 10 distinct paths
+MAX_TRACKED_TERMS = 64
+# incompleteBillPay reports the first start of the 30-day window only while it is under a
+# day old, so only a start more than 29 days after the one before it can ever be reported
+BILLPAY_RUN_GAP_MS = RECENT_WINDOW_MS - ONE_DAY_MS
+
+SNAPSHOT_MAGIC = b"GTS\x02"
+SNAPSHOT_MAGIC_V1 = b"GTS\x01"  # kept every start (up to 16); still restorable
+
+
+class TraitState:
+    """Fixed-size trait state for one user, updated one event at a time."""
+
+    __slots__ = (
+        "locale",
+        "prefers_dense",
+        "dark_mode",
+        "seq",
+        "weight_ts",
+        "weights",
+        "action_first",
+        "action_last",
+        "action_buckets",
+        "views",
+        "path_last",
+        "terms",
+        "billpay_prev",
+        "billpay_head",
+        "billpay_last",
+        "billpay_completed",
+        "balance_seen",
+    )
+
+    def __init__(self) -> None:
+        self.locale = "en"
+        self.prefers_dense = False
+        self.dark_mode = False
+        self.seq = 0  # events applied; orders first-seen ties like the TS sort
+        self.weight_ts = 0.0  # time the decayed weights are expressed at
+        self.weights = [0.0] * len(ACTION_IDS)
+        self.action_first = [-1] * len(ACTION_IDS)
+        self.action_last = [-math.inf] * len(ACTION_IDS)
+        # [hour, count per action] for hours with actions in the last 30 days
+        self.action_buckets: deque[list[int]] = deque()
+        self.views: deque[tuple[float, str]] = deque(maxlen=LAST_VIEWS)
+        self.path_last: dict[str, float] = {}
+        # term -> [last seen, deque of [hour, count, first seq] in the last 7 days]
+        self.terms: dict[str, list] = {}
+        self.billpay_prev = -math.inf  # start just before billpay_head
+        self.billpay_head = -math.inf  # latest start more than BILLPAY_RUN_GAP_MS after the previous one
+        self.billpay_last = -math.inf  # newest start
+        self.billpay_completed = -math.inf
+        self.balance_seen = -math.inf
+
+    # ------- Updates -------
+
+    def apply(self, event: dict) -> None:
+        """Fold one browser event (events.ts shape) into the state."""
+        kind = event.get("type")
+        ts = float(event.get("timestamp", 0))
+        self.seq += 1
+        if kind == "action":
+            action = ACTION_INDEX.get(event.get("name"))
+            if action is not None:
+                self._apply_action(action, ts)
+        elif kind == "view":
+            path = event.get("path", "")
+            self.views.append((ts, path))
+            self.path_last.pop(path, None)
+            self.path_last[path] = ts  # re-insert so dict order is least recent first
+            if len(self.path_last) > MAX_TRACKED_PATHS:
+                del self.path_last[next(iter(self.path_last))]
+        elif kind == "search":
+            self._apply_search(event.get("term", ""), ts)
+        elif kind == "journey":
+            if event.get("id") == "BILLPAY_STARTED":
+                self._apply_billpay_start(ts)
+            elif event.get("id") == "BILLPAY_COMPLETED":
+                self.billpay_completed = max(self.billpay_completed, ts)
+        elif kind == "balance_seen":
+            self.balance_seen = max(self.balance_seen, ts)
+
+    def set_preferences(self, prefs: dict) -> None:
+        """Apply a preferences update; fields that are absent or null keep their value."""
+        if prefs.get("locale"):
+            self.locale = prefs["locale"]
+        if prefs.get("prefersDense") is not None:
+            self.prefers_dense = bool(prefs["prefersDense"])
+        if prefs.get("darkMode") is not None:
+            self.dark_mode = bool(prefs["darkMode"])
+
+    def _apply_action(self, action: int, ts: float) -> None:
+        if ts >= self.weight_ts:
+            scale = math.exp(-(ts - self.weight_ts) / DECAY_MS)
+            self.weights = [w * scale for w in self.weights]
+            self.weight_ts = ts
+            self.weights[action] += 1.0
+        else:
+            self.weights[action] += math.exp(-(self.weight_ts - ts) / DECAY_MS)
+        if self.action_first[action] < 0 or ts - self.action_last[action] >= RECENT_WINDOW_MS:
+            self.action_first[action] = self.seq
+        self.action_last[action] = max(self.action_last[action], ts)
+
+        hour = int(ts // HOUR_MS)
+        buckets = self.action_buckets
+        if not buckets or buckets[-1][0] < hour:
+            buckets.append([hour] + [0] * len(ACTION_IDS))
+        buckets[-1][1 + action] += 1
+        _expire(buckets, ts, RECENT_WINDOW_MS)
+
+    def _apply_billpay_start(self, ts: float) -> None:
+        if ts - self.billpay_last > BILLPAY_RUN_GAP_MS:
+            self.billpay_prev, self.billpay_head = self.billpay_last, ts
+        self.billpay_last = max(self.billpay_last, ts)
+
+    def _apply_search(self, term: str, ts: float) -> None:
+        entry = self.terms.get(term)
+        if entry is None:
+            if len(self.terms) >= MAX_TRACKED_TERMS:
+                # 30-day expiry, then least recently searched if still full
+                for stale in [t for t, e in self.terms.items() if ts - e[0] >= RECENT_WINDOW_MS]:
+                    del self.terms[stale]
+                if len(self.terms) >= MAX_TRACKED_TERMS:
+                    del self.terms[min(self.terms, key=lambda t: self.terms[t][0])]
+            entry = self.terms[term] = [ts, deque()]
+        entry[0] = max(entry[0], ts)
+        hour = int(ts // HOUR_MS)
+        buckets = entry[1]
+        if not buckets or buckets[-1][0] < hour:
+            buckets.append([hour, 0, self.seq])
+        buckets[-1][1] += 1
+        _expire(buckets, ts, SEVEN_DAYS_MS)
+
+    # ------- Read -------
+
+    def traits(self, now_ms: float | None = None) -> dict:
+        """UserTraits as of now_ms (default: current time)."""
+        now = time.time() * 1000 if now_ms is None else now_ms
+
+        counts = [0] * len(ACTION_IDS)
+        for bucket in self.action_buckets:
+            if _in_window(bucket[0], now, RECENT_WINDOW_MS):
+                for i in range(len(ACTION_IDS)):
+                    counts[i] += bucket[1 + i]
+        total = sum(counts) or 1
+
+        recent_actions = [i for i in range(len(ACTION_IDS)) if now - self.action_last[i] < RECENT_WINDOW_MS]
+        top_actions = sorted(recent_actions, key=lambda i: (-self.weights[i], self.action_first[i]))[:3]
+
+        recent_views = [path for ts, path in self.views if now - ts < RECENT_WINDOW_MS]
+        last_paths = list(dict.fromkeys(recent_views))[::-1][:5]
+        distinct_paths = sum(1 for ts in self.path_last.values() if now - ts < RECENT_WINDOW_MS)
+
+        search_terms = []
+        for term, (last_seen, buckets) in self.terms.items():
+            live = [b for b in buckets if _in_window(b[0], now, SEVEN_DAYS_MS)]
+            if live:
+                count = sum(b[1] for b in live)
+                search_terms.append((live[0][2], {"term": term, "count": count, "lastSeen": _js_number(last_seen)}))
+        search_terms.sort(key=lambda item: (-item[1]["count"], item[0]))
+
+        # billpay_head is the first start of the window when nothing before it is still inside
+        incomplete = (
+            {"started": _js_number(self.billpay_head)}
+            if now - self.billpay_head < ONE_DAY_MS
+            and now - self.billpay_prev >= RECENT_WINDOW_MS
+            and now - self.billpay_completed >= RECENT_WINDOW_MS
+            else None
+        )
+
+        return {
+            "fxAffinity": min(counts[FX] / total, 1),
+            "transferAffinity": min(counts[TRANSFER] / total, 1),
+            "explorerScore": min(distinct_paths / 10, 1),
+            "lastPaths": last_paths,
+            "topActions": [ACTION_IDS[i] for i in top_actions],
+            "lastBalanceSeen": _js_number(self.balance_seen) if now - self.balance_seen < RECENT_WINDOW_MS else None,
+            "searchTerms": [entry for _, entry in search_terms[:10]],
+            "incompleteBillPay": incomplete,
+            "locale": self.locale,
+            "prefersDense": self.prefers_dense,
+            "darkMode": self.dark_mode,
+            "favoriteQuickActions": [],
+            "suppressions": {},
+        }
+
+    # ------- Snapshot -------
+
+    def snapshot(self) -> bytes:
+        """Serialize to a compact binary blob (strings interned once, fixed-width numbers)."""
+        strings: dict[str, int] = {}
+
+        def ref(s: str) -> int:
+            return strings.setdefault(s, len(strings))
+
+        body = _Writer()
+        flags = (self.locale == "tr") | (self.prefers_dense << 1) | (self.dark_mode << 2)
+        body.pack("<BQd", flags, self.seq, self.weight_ts)
+        n = len(ACTION_IDS)
+        body.pack(f"<{n}d{n}q{n}d", *self.weights, *self.action_first, *self.action_last)
+        body.pack("<I", len(self.action_buckets))
+        for bucket in self.action_buckets:
+            body.pack(f"<I{n}I", *bucket)
+        body.pack("<B", len(self.views))
+        for ts, path in self.views:
+            body.pack("<dH", ts, ref(path))
+        body.pack("<H", len(self.path_last))
+        for path, ts in self.path_last.items():
+            body.pack("<Hd", ref(path), ts)
+        body.pack("<H", len(self.terms))
+        for term, (last_seen, buckets) in self.terms.items():
+            body.pack("<HdH", ref(term), last_seen, len(buckets))
+            for bucket in buckets:
+                body.pack("<IIQ", *bucket)
+        body.pack("<ddd", self.billpay_prev, self.billpay_head, self.billpay_last)
+        body.pack("<dd", self.billpay_completed, self.balance_seen)
+
+        head = _Writer()
+        head.raw(SNAPSHOT_MAGIC)
+        head.pack("<H", len(strings))
+        for s in strings:
+            encoded = s.encode("utf-8")
+            head.pack("<H", len(encoded))
+            head.raw(encoded)
+        return bytes(head.buf + body.buf)
+
+    @classmethod
+    def restore(cls, data: bytes) -> TraitState:
+        """Rebuild a state from ``snapshot()`` output (current or version 1)."""
+        r = _Reader(data)
+        magic = r.raw(len(SNAPSHOT_MAGIC))
+        if magic not in (SNAPSHOT_MAGIC, SNAPSHOT_MAGIC_V1):
+            raise ValueError("not a trait state snapshot")
+        strings = [r.raw(r.unpack("<H")[0]).decode("utf-8") for _ in range(r.unpack("<H")[0])]
+
+        state = cls()
+        flags, state.seq, state.weight_ts = r.unpack("<BQd")
+        state.locale = "tr" if flags & 1 else "en"
+        state.prefers_dense = bool(flags & 2)
+        state.dark_mode = bool(flags & 4)
+        n = len(ACTION_IDS)
+        values = r.unpack(f"<{n}d{n}q{n}d")
+        state.weights = list(values[:n])
+        state.action_first = list(values[n : 2 * n])
+        state.action_last = list(values[2 * n :])
+        state.action_buckets = deque(list(r.unpack(f"<I{n}I")) for _ in range(r.unpack("<I")[0]))
+        for _ in range(r.unpack("<B")[0]):
+            ts, path = r.unpack("<dH")
+            state.views.append((ts, strings[path]))
+        for _ in range(r.unpack("<H")[0]):
+            path, ts = r.unpack("<Hd")
+            state.path_last[strings[path]] = ts
+        for _ in range(r.unpack("<H")[0]):
+            term, last_seen, n_buckets = r.unpack("<HdH")
+            state.terms[strings[term]] = [last_seen, deque(list(r.unpack("<IIQ")) for _ in range(n_buckets))]
+        if magic == SNAPSHOT_MAGIC_V1:
+            for _ in range(r.unpack("<B")[0]):
+                state._apply_billpay_start(r.unpack("<d")[0])
+        else:
+            state.billpay_prev, state.billpay_head, state.billpay_last = r.unpack("<ddd")
+        state.billpay_completed, state.balance_seen = r.unpack("<dd")
+        return state
+
+
+def _expire(buckets: deque, ts: float, window_ms: float) -> None:
+    """Drop leading hour buckets that are entirely outside the window ending at ts."""
+    while buckets and not _in_window(buckets[0][0], ts, window_ms):
+        buckets.popleft()
+
+
+def _in_window(hour: int, now: float, window_ms: float) -> bool:
+    """A bucket counts while any part of its hour is inside (now - window, now]."""
+    return now - (hour + 1) * HOUR_MS < window_ms
+
+
+def _js_number(value: float) -> int | float:
+    return int(value) if float(value).is_integer() else value
+
+
+class _Writer:
+    __slots__ = ("buf",)
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+
+    def pack(self, fmt: str, *values) -> None:
+        self.buf += struct.pack(fmt, *values)
+
+    def raw(self, data: bytes) -> None:
+        self.buf += data
+
+
+class _Reader:
+    __slots__ = ("data", "offset")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: str) -> tuple:
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def raw(self, size: int) -> bytes:
+        chunk = bytes(self.data[self.offset : self.offset + size])
+        self.offset += size
+        return chunk
+
+
+# ------- Many users -------
+
+
+def save_states(states: dict[str, TraitState], path: Path) -> None:
+    """Write {userId: state} as length-prefixed (userId, snapshot) records, atomically."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        for user_id, state in states.items():
+            encoded = user_id.encode("utf-8")
+            blob = state.snapshot()
+            f.write(struct.pack("<HI", len(encoded), len(blob)))
+            f.write(encoded)
+            f.write(blob)
+    tmp.replace(path)
+
+
+def load_states(path: Path) -> dict[str, TraitState]:
+    states: dict[str, TraitState] = {}
+    data = path.read_bytes()
+    offset = 0
+    while offset < len(data):
+        id_len, blob_len = struct.unpack_from("<HI", data, offset)
+        offset += struct.calcsize("<HI")
+        user_id = data[offset : offset + id_len].decode("utf-8")
+        offset += id_len
+        states[user_id] = TraitState.restore(data[offset : offset + blob_len])
+        offset += blob_len
+    return states
+
+
+def iter_stream(events_jsonl: Path) -> Iterator[tuple[str, dict]]:
+    with open(events_jsonl) as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                yield str(event.pop("userId")), event
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Fold an event stream into per-user traits incrementally")
+    parser.add_argument("--events-jsonl", type=Path, required=True, help="Event stream, one event with userId per line")
+    parser.add_argument("--state", type=Path, help="Binary state file to resume from (if present) and save to")
+    parser.add_argument("--output-jsonl", type=Path, help="Write {userId, traits} records (composer --traits-jsonl input)")
+    parser.add_argument("--now", type=float, help="Reference time in epoch ms for the windows (default: current time)")
+    args = parser.parse_args()
+
+    states = load_states(args.state) if args.state and args.state.exists() else {}
+    resumed = len(states)
+
+    t0 = time.perf_counter()
+    events = 0
+    for user_id, event in iter_stream(args.events_jsonl):
+        state = states.get(user_id)
+        if state is None:
+            state = states[user_id] = TraitState()
+        if "preferences" in event:
+            state.set_preferences(event["preferences"] or {})
+        else:
+            state.apply(event)
+        events += 1
+    elapsed = time.perf_counter() - t0
+    print(
+        f"✓ Applied {events} events to {len(states)} users ({resumed} resumed) in {elapsed:.2f}s "
+        f"({events / max(elapsed, 1e-9):,.0f} events/s)"
+    )
+
+    if args.state:
+        save_states(states, args.state)
+        print(f"✓ State saved to {args.state} ({args.state.stat().st_size / max(len(states), 1):.0f} bytes/user)")
+
+    if args.output_jsonl:
+        now = args.now if args.now is not None else time.time() * 1000
+        args.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output_jsonl, "w") as f:
+            for user_id, state in states.items():
+                f.write(json.dumps({"userId": user_id, "traits": state.traits(now)}, ensure_ascii=False) + "\n")
+        print(f"✅ Traits written to {args.output_jsonl}")
+    elif not args.state:
+        print("❌ Nothing to write: pass --output-jsonl and/or --state", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+
+from genui_compose_service import MAX_BODY_BYTES, ComposeService
+
+
+class SlowService(ComposeService):
+    """Model call replaced by a sleep, counting how many calls were made."""
+
+    def __init__(self):
+        super().__init__("test-model", "llm", cache=None, concurrency=4)
+        self.calls = 0
+
+    async def _call_model(self, key, traits):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"version": "1.0", "sections": []}, "llm", 1.0
+
+
+def test_follower_survives_cancelled_leader():
+    async def scenario():
+        service = SlowService()
+        leader = asyncio.ensure_future(service._compose_model({"fxAffinity": 0.5}))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(service._compose_model({"fxAffinity": 0.5})) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()  # its client disconnected
+        results = await asyncio.gather(*followers)
+        return service, results
+
+    service, results = asyncio.run(scenario())
+    # One follower took over as leader, the other two coalesced onto it
+    assert sorted(source for _, source, _ in results) == ["coalesced", "coalesced", "llm"]
+    assert service.calls == 2
+
+
+async def _request(service: ComposeService, raw: bytes) -> bytes:
+    reader = asyncio.StreamReader()
+    reader.feed_data(raw)
+
+    class Writer:
+        def __init__(self):
+            self.data = b""
+
+        def write(self, data):
+            self.data += data
+
+        async def drain(self):
+            pass
+
+        def close(self):
+            pass
+
+    writer = Writer()
+    head = await reader.readuntil(b"\r\n\r\n")
+    await service._handle_request(head, reader, writer)
+    return writer.data
+
+
+def test_oversized_body_is_rejected():
+    raw = f"POST /compose HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode()
+    assert asyncio.run(_request(SlowService(), raw)).startswith(b"HTTP/1.1 413")
+
+
+def test_slow_body_times_out(monkeypatch):
+    monkeypatch.setattr("genui_compose_service.KEEPALIVE_TIMEOUT_S", 0.05)
+    raw = b"POST /compose HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}"  # 8 bytes never arrive
+    assert asyncio.run(_request(SlowService(), raw)).startswith(b"HTTP/1.1 408")
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from genui_derive_traits import ACTION_IDS, EventColumns, derive_traits_batch  # noqa: E402
+
+NOW = 1_760_000_000_000
+DAY = 24 * 60 * 60 * 1000
+
+
+def derive_ts(events: list[dict], now: float) -> dict:
+    """Line-by-line port of deriveTraits (lib/analytics/derive.ts) for one user, default preferences."""
+    recent = [e for e in events if now - e.get("timestamp", 0) < 30 * DAY]
+    searches = [e for e in events if e.get("type") == "search" and now - e.get("timestamp", 0) < 7 * DAY]
+    actions = [e for e in recent if e.get("type") == "action"]
+    views = [e for e in recent if e.get("type") == "view"]
+    journeys = [e for e in recent if e.get("type") == "journey"]
+    started = next((e for e in journeys if e.get("id") == "BILLPAY_STARTED"), None)
+    completed = next((e for e in journeys if e.get("id") == "BILLPAY_COMPLETED"), None)
+    balances = [e for e in recent if e.get("type") == "balance_seen"]
+    total = len(actions) or 1
+
+    weights: dict = {}
+    for e in actions:
+        weights[e.get("name")] = weights.get(e.get("name"), 0) + math.exp(-((now - e["timestamp"]) / DAY) / 7)
+    ranked = [name for name, _ in sorted(weights.items(), key=lambda item: -item[1])]
+
+    terms: dict = {}
+    for e in searches:
+        count, last = terms.get(e.get("term"), (0, 0))
+        terms[e.get("term")] = (count + 1, max(last, e["timestamp"]))
+    return {
+        "fxAffinity": min(sum(e.get("name") == "FX" for e in actions) / total, 1),
+        "transferAffinity": min(sum(e.get("name") == "TRANSFER" for e in actions) / total, 1),
+        "explorerScore": min(len({e.get("path") for e in views}) / 10, 1),
+        "lastPaths": list(dict.fromkeys(e.get("path") for e in views[-10:]))[::-1][:5],
+        # derive.ts ranks whatever names it sees; the port only ranks ActionIds (module docstring)
+        "topActions": [name for name in ranked if name in ACTION_IDS][:3],
+        "lastBalanceSeen": balances[-1]["timestamp"] if balances else None,
+        "searchTerms": sorted(
+            ({"term": t, "count": c, "lastSeen": s} for t, (c, s) in terms.items()), key=lambda x: -x["count"]
+        )[:10],
+        "incompleteBillPay": (
+            {"started": started["timestamp"]}
+            if started and not completed and now - started["timestamp"] < DAY
+            else None
+        ),
+    }
+
+
+def action(name: str, age_days: float) -> dict:
+    return {"type": "action", "name": name, "timestamp": NOW - age_days * DAY}
+
+
+USERS = [
+    # Unknown action on user 0: its key used to go negative and crash np.bincount
+    ("first", [action("BOGUS", 0.1), action("FX", 1)]),
+    # Only TRANSFER; the previous user's unknown action used to alias into this user's last slot
+    ("a", [action("TRANSFER", 0.5)]),
+    ("b", [action("NOT_AN_ACTION", 0.2), action("PAY_BILL", 2), action("PAY_BILL", 3), action("TRANSFER", 0.3)]),
+    # Malformed view/search events (no path/term) are read with .get like every other field
+    (
+        "malformed",
+        [
+            {"type": "view", "timestamp": NOW - 10},
+            {"type": "view", "path": "/fx", "timestamp": NOW - 5},
+            {"type": "search", "timestamp": NOW - 3},
+            {"type": "search", "term": "exchange", "timestamp": NOW - 2},
+            {"type": "search", "term": "exchange", "timestamp": NOW - 1},
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize("index", range(len(USERS)))
+def test_matches_derive_ts(index):
+    cols = EventColumns.from_users((user_id, events, {}) for user_id, events in USERS)
+    traits = derive_traits_batch(cols, NOW)[index]
+    expected = derive_ts(USERS[index][1], NOW)
+    assert {k: traits[k] for k in expected} == expected
+
+
+def test_unknown_actions_never_cross_users():
+    cols = EventColumns.from_users((user_id, events, {}) for user_id, events in USERS)
+    traits = derive_traits_batch(cols, NOW)
+    assert traits[0]["topActions"] == ["FX"]
+    assert traits[1]["topActions"] == ["TRANSFER"]
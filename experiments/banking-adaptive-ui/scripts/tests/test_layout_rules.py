@@ -0,0 +1,28 @@
+from genui_layout_rules import choose_layout
+from genui_schema_validator import MAX_SECTIONS, missing_required, rule_layout, validate_ui_schema
+
+# Trips every optional branch of chooseLayout: 9 sections, one over the validator's limit
+ALL_CONDITIONS = {
+    "explorerScore": 0.6,
+    "transferAffinity": 0.35,
+    "fxAffinity": 0.3,
+    "incompleteBillPay": True,
+    "topActions": ["FX"],
+}
+
+
+def test_choose_layout_can_exceed_max_sections():
+    assert len(choose_layout(ALL_CONDITIONS)["sections"]) == MAX_SECTIONS + 1
+
+
+def test_rule_layout_passes_validator():
+    schema = rule_layout(ALL_CONDITIONS)
+    assert validate_ui_schema(schema) == []
+    assert missing_required(schema) == []
+    # The trailing optional section is the one dropped; the rest keep chooseLayout's order
+    assert schema["sections"] == choose_layout(ALL_CONDITIONS)["sections"][:MAX_SECTIONS]
+
+
+def test_rule_layout_leaves_valid_layouts_alone():
+    traits = {"fxAffinity": 0.5, "topActions": ["FX", "TRANSFER"], "locale": "tr"}
+    assert rule_layout(traits) == choose_layout(traits)
@@ -0,0 +1,29 @@
+import re
+from pathlib import Path
+
+from genui_compose_core import SYSTEM_PROMPT
+from genui_schema_validator import MAX_SECTIONS, SectionRepairer, validate_ui_schema
+
+SCHEMA_TS = Path(__file__).resolve().parents[2] / "personalization" / "schema.ts"
+
+
+def test_section_limit_matches_zod():
+    """personalization/schema.ts is authoritative; the validator mirrors its .max()."""
+    match = re.search(r"sections: z\.array\(SectionSchema\)\.max\((\d+)\)", SCHEMA_TS.read_text(encoding="utf-8"))
+    assert match and int(match.group(1)) == MAX_SECTIONS
+
+
+def test_prompt_states_the_validator_limit():
+    limits = {int(n) for n in re.findall(r"≤(\d+) sections", SYSTEM_PROMPT)}
+    assert limits == {MAX_SECTIONS}
+
+
+def test_validator_and_repairer_agree():
+    sections = [{"id": f"h{i}", "component": "HeroCard", "props": {"title": "x"}} for i in range(MAX_SECTIONS + 2)]
+    assert validate_ui_schema({"version": "1.0", "sections": sections[:MAX_SECTIONS]}) == []
+    assert validate_ui_schema({"version": "1.0", "sections": sections[: MAX_SECTIONS + 1]}) != []
+    repairer = SectionRepairer()
+    for i, section in enumerate(sections):
+        repairer.add(section, i)
+    repairer.finish()
+    assert len(repairer.sections) == MAX_SECTIONS
@@ -0,0 +1,17 @@
+from genui_compose_core import trait_bucket, trait_bucket_key
+
+
+def test_trait_bucket_skips_malformed_entries():
+    traits = {
+        "searchTerms": ["exchange", None, {"term": "exchange rate", "count": 3}],
+        "lastPaths": [None, "/payments/utilities"],
+    }
+    bucket = trait_bucket(traits)
+    assert bucket["exchangeSearches"] == 2
+    assert bucket["utilities"] is True
+
+
+def test_trait_bucket_key_ignores_malformed_entries():
+    clean = {"searchTerms": [{"term": "exchange", "count": 1}], "lastPaths": ["/savings"]}
+    noisy = {"searchTerms": [{"term": "exchange", "count": 1}, 42], "lastPaths": ["/savings", None]}
+    assert trait_bucket_key(clean) == trait_bucket_key(noisy)
@@ -0,0 +1,61 @@
+import random
+import struct
+
+import pytest
+
+from genui_trait_stream import SNAPSHOT_MAGIC_V1, TraitState
+
+NOW = 1_760_000_000_000
+DAY = 24 * 60 * 60 * 1000
+
+
+def incomplete_ts(starts: list[float], now: float) -> dict | None:
+    """incompleteBillPay from derive.ts for starts only: the first start of the window, if under a day old."""
+    recent = [ts for ts in starts if now - ts < 30 * DAY]
+    return {"started": recent[0]} if recent and now - recent[0] < DAY else None
+
+
+def state_with_starts(starts: list[float]) -> TraitState:
+    state = TraitState()
+    for ts in starts:
+        state.apply({"type": "journey", "id": "BILLPAY_STARTED", "timestamp": ts})
+    return state
+
+
+@pytest.mark.parametrize(
+    "ages",
+    [
+        [0.5],
+        [29.5, 0.5],  # earlier start still inside the window, so the journey is not new
+        [30.5, 0.5],  # earlier start just left the window
+        [40, 30.2, 0.9, 0.5, 0.1],
+        # More starts than the old 16-entry history kept: the earliest one decides
+        [1.5 - i * 0.05 for i in range(20)],
+        [35 - i * 0.05 for i in range(20)] + [0.2, 0.1],
+    ],
+)
+def test_incomplete_billpay_matches_derive_ts(ages):
+    starts = [NOW - age * DAY for age in ages]
+    assert state_with_starts(starts).traits(NOW)["incompleteBillPay"] == incomplete_ts(starts, NOW)
+
+
+def test_incomplete_billpay_random_histories():
+    rng = random.Random(7)
+    for _ in range(500):
+        starts = sorted(NOW - rng.uniform(0, 70) * DAY for _ in range(rng.randint(1, 30)))
+        state = state_with_starts(starts)
+        for now in (NOW, NOW + rng.uniform(0, 40) * DAY):
+            assert state.traits(now)["incompleteBillPay"] == incomplete_ts(starts, now)
+
+
+def test_snapshot_round_trip_and_v1_restore():
+    starts = [NOW - age * DAY for age in (31, 0.6, 0.3)]
+    state = state_with_starts(starts)
+    restored = TraitState.restore(state.snapshot())
+    assert restored.traits(NOW) == state.traits(NOW)
+
+    # Version 1 stored the start list where the current format stores (prev, head, last)
+    blob = state.snapshot()
+    v1 = SNAPSHOT_MAGIC_V1 + blob[4:-40] + struct.pack("<B", len(starts))
+    v1 += b"".join(struct.pack("<d", ts) for ts in starts) + blob[-16:]
+    assert TraitState.restore(v1).traits(NOW) == state.traits(NOW)